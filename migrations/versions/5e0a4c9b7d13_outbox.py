@@ -0,0 +1,35 @@
+"""Outbox.
+
+Revision ID: 5e0a4c9b7d13
+Revises: b3f81c6d2e07
+Create Date: 2026-10-18 17:05:33.918241
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e0a4c9b7d13"
+down_revision = "b3f81c6d2e07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("exchange", sa.String(length=255), nullable=False),
+        sa.Column("routing_key", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("occurred_on", sa.DateTime(), nullable=False),
+        sa.Column("sent_on", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_outbox_sent_on_id", "outbox", ["sent_on", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_sent_on_id", table_name="outbox")
+    op.drop_table("outbox")
@@ -0,0 +1,80 @@
+"""Lookup indexes.
+
+Revision ID: 7c1d2e9a4b50
+Revises: 412185f204a3
+Create Date: 2026-10-18 10:12:41.204917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c1d2e9a4b50"
+down_revision = "412185f204a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint("uq_server_name", "server", ["name"])
+    # Leads with `server_id`, so it also serves the foreign key.
+    op.create_unique_constraint(
+        "uq_credential_server_id_username",
+        "credential",
+        ["server_id", "username"],
+    )
+    op.create_unique_constraint(
+        "uq_application_name_version_architect",
+        "application",
+        ["name", "version", "architect"],
+    )
+    op.create_index(
+        "ix_server_application_application_id",
+        "server_application",
+        ["application_id"],
+    )
+
+
+def downgrade() -> None:
+    _drop_foreign_key_index(
+        "server_application",
+        "application_id",
+        lambda: op.drop_index(
+            "ix_server_application_application_id",
+            table_name="server_application",
+        ),
+    )
+    op.drop_constraint(
+        "uq_application_name_version_architect", "application", type_="unique"
+    )
+    _drop_foreign_key_index(
+        "credential",
+        "server_id",
+        lambda: op.drop_constraint(
+            "uq_credential_server_id_username", "credential", type_="unique"
+        ),
+    )
+    op.drop_constraint("uq_server_name", "server", type_="unique")
+
+
+def _drop_foreign_key_index(table: str, column: str, drop: callable) -> None:
+    """Drops the index serving a foreign key.
+
+    MySQL refuses to drop the only index of a foreign key, so the foreign key
+    is dropped first and created again, with its implicit index.
+    """
+    foreign_key = next(
+        foreign_key
+        for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys(table)
+        if foreign_key["constrained_columns"] == [column]
+    )
+    op.drop_constraint(foreign_key["name"], table, type_="foreignkey")
+    drop()
+    op.create_foreign_key(
+        foreign_key["name"],
+        table,
+        foreign_key["referred_table"],
+        [column],
+        foreign_key["referred_columns"],
+    )
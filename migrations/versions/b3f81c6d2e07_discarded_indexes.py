@@ -0,0 +1,30 @@
+"""Discarded indexes.
+
+Revision ID: b3f81c6d2e07
+Revises: 7c1d2e9a4b50
+Create Date: 2026-10-18 15:40:12.583106
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b3f81c6d2e07"
+down_revision = "7c1d2e9a4b50"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # MySQL has no partial indexes. The InnoDB secondary indexes end with the
+    # primary key, so these read `discarded = false` in the `id` order
+    # without touching the discarded rows.
+    op.create_index("ix_server_discarded", "server", ["discarded"])
+    op.create_index("ix_credential_discarded", "credential", ["discarded"])
+    op.create_index("ix_application_discarded", "application", ["discarded"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_application_discarded", table_name="application")
+    op.drop_index("ix_credential_discarded", table_name="credential")
+    op.drop_index("ix_server_discarded", table_name="server")
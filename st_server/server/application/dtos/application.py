@@ -27,6 +27,16 @@ class ApplicationReadDto(ApplicationBase):
             discarded=application.discarded,
         )
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "ApplicationReadDto":
+        return cls(
+            id=data.get("id"),
+            name=data.get("name"),
+            version=data.get("version"),
+            architect=data.get("architect"),
+            discarded=data.get("discarded"),
+        )
+
 
 @dataclass(frozen=True)
 class ApplicationUpdateDto(ApplicationBase):
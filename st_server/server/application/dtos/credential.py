@@ -37,6 +37,21 @@ class CredentialReadDto(CredentialBase):
             discarded=credential.discarded,
         )
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "CredentialReadDto":
+        return cls(
+            id=data.get("id"),
+            server_id=data.get("server_id"),
+            connection_type=data.get("connection_type"),
+            username=data.get("username"),
+            password=data.get("password"),
+            local_ip=data.get("local_ip"),
+            local_port=data.get("local_port"),
+            public_ip=data.get("public_ip"),
+            public_port=data.get("public_port"),
+            discarded=data.get("discarded"),
+        )
+
 
 @dataclass(frozen=True)
 class CredentialUpdateDto(CredentialBase):
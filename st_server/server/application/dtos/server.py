@@ -51,6 +51,28 @@ class ServerReadDto(ServerBase):
             discarded=server.discarded,
         )
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "ServerReadDto":
+        return cls(
+            id=data.get("id"),
+            name=data.get("name"),
+            cpu=data.get("cpu"),
+            ram=data.get("ram"),
+            hdd=data.get("hdd"),
+            environment=data.get("environment"),
+            operating_system=data.get("operating_system"),
+            credentials=[
+                CredentialReadDto.from_dict(credential)
+                for credential in data.get("credentials") or []
+            ],
+            applications=[
+                ServerApplicationReadDto.from_dict(server_application)
+                for server_application in data.get("applications") or []
+            ],
+            status=data.get("status"),
+            discarded=data.get("discarded"),
+        )
+
 
 @dataclass(frozen=True)
 class ServerUpdateDto(ServerBase):
@@ -31,6 +31,18 @@ class ServerApplicationReadDto(ServerApplicationBase):
             ),
         )
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "ServerApplicationReadDto":
+        return cls(
+            server_id=data.get("server_id"),
+            application_id=data.get("application_id"),
+            install_dir=data.get("install_dir"),
+            log_dir=data.get("log_dir"),
+            application=ApplicationReadDto.from_dict(data["application"])
+            if data.get("application")
+            else None,
+        )
+
 
 @dataclass(frozen=True)
 class ServerApplicationUpdateDto(ServerApplicationBase):
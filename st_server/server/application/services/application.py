@@ -1,6 +1,8 @@
 """Application service."""
 
 import math
+from collections.abc import Iterator
+from contextlib import nullcontext
 
 from st_server.server.application.dtos.application import ApplicationReadDto
 from st_server.server.domain.entities.application import Application
@@ -9,6 +11,7 @@ from st_server.server.domain.repositories.application_repository import (
 )
 from st_server.shared.application.exceptions import AlreadyExists, NotFound
 from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.domain.repositories.unit_of_work import UnitOfWork
 from st_server.shared.helper.filter import validate_filter
 from st_server.shared.helper.pagination import validate_pagination
 from st_server.shared.helper.sort import validate_sort
@@ -30,7 +33,8 @@ class ApplicationService:
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
@@ -46,6 +50,16 @@ class ApplicationService:
     In the `find_many` method, the `fields` parameter is a list of strings with the
     field names to be loaded.
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. When provided, the page
+    starts right after the row the cursor points to and the offset is ignored.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates:
+    - `exact`: counts the aggregates (default).
+    - `estimated`: uses the table statistics or a cached count per filters.
+    - `none`: skips the count, the total is `None`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
@@ -53,10 +67,15 @@ class ApplicationService:
     """
 
     def __init__(
-        self, repository: ApplicationRepository, message_bus: MessageBus
+        self,
+        repository: ApplicationRepository,
+        message_bus: MessageBus,
+        unit_of_work: UnitOfWork | None = None,
     ) -> None:
         self._repository = repository
         self._message_bus = message_bus
+        # Without a unit of work, each repository call commits on its own.
+        self._unit_of_work = unit_of_work or nullcontext()
 
     # @AuthService.access_token_required
     @validate_pagination
@@ -66,8 +85,10 @@ class ApplicationService:
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         access_token: str | None = None,
         **kwargs,
     ) -> ServicePageDto:
@@ -81,8 +102,14 @@ class ApplicationService:
             sort = []
         if kwargs is None:
             kwargs = {}
-        applications = self._repository.find_many(
-            limit=limit, offset=offset, sort=sort, fields=fields, **kwargs
+        applications = self._repository.read_many(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+            count=count,
+            **kwargs,
         )
         total = applications._total
         return ServicePageDto(
@@ -92,10 +119,17 @@ class ApplicationService:
             _prev_offset=((offset or 1) - 1) if (offset or 1) > 1 else None,
             _next_offset=((offset or 1) + 1)
             if (offset or 1) > 0
-            and (offset or 1) < math.ceil(float(total) / float(limit or total))
+            and (
+                (offset or 1)
+                < math.ceil(float(total) / float(limit or total or 1))
+                if total is not None
+                else len(applications._items) == limit
+            )
             else None,
+            _cursor=cursor,
+            _next_cursor=applications._next_cursor,
             _items=[
-                ApplicationReadDto.from_entity(application)
+                ApplicationReadDto.from_dict(application)
                 for application in applications._items
             ],
         )
@@ -109,76 +143,211 @@ class ApplicationService:
     ) -> Application:
         if fields is None:
             fields = []
-        application = self._repository.find_one(id=id, fields=fields)
+        application = self._repository.read_one(id=id, fields=fields)
         if application is None:
             raise NotFound(message=f"Application with id {id} not found.")
-        return ApplicationReadDto.from_entity(application)
+        return ApplicationReadDto.from_dict(application)
+
+    # @AuthService.access_token_required
+    @validate_sort
+    @validate_filter
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        access_token: str | None = None,
+        **kwargs,
+    ) -> Iterator[ApplicationReadDto]:
+        """Yields the applications matching the filters, without pagination.
+
+        The applications are streamed from the repository in chunks of
+        `chunk_size`, for the batch jobs and the exports.
+        """
+        for application in self._repository.read_iter(
+            sort=sort, fields=fields, chunk_size=chunk_size, **kwargs
+        ):
+            yield ApplicationReadDto.from_dict(application)
 
     # @AuthService.access_token_required
     def add_one(
         self, data: dict, access_token: str | None = None
     ) -> Application:
-        application = Application.create(
-            name=data.get("name"),
-            version=data.get("version"),
-            architect=data.get("architect"),
-        )
-        applications = self._repository.find_many(
-            name="eq:{}".format(application.name),
-            version="eq:{}".format(application.version),
-            architect="eq:{}".format(application.architect),
-        )
-        if applications._total:
-            raise AlreadyExists(
-                "Application with name: {name!r} version: {version!r} and architect: {architect!r} already exists".format(
-                    name=application.name,
-                    version=application.version,
-                    architect=application.architect,
-                )
-            )
-        self._repository.add_one(aggregate=application)
-        self._message_bus.publish(domain_events=application.domain_events)
-        application.clear_domain_events()
+        with self._unit_of_work:
+            application = self._create(data=data)
+            self._repository.add_one(aggregate=application)
+            self._message_bus.publish(domain_events=application.domain_events)
+            application.clear_domain_events()
         return ApplicationReadDto.from_entity(application)
 
     # @AuthService.access_token_required
     def update_one(
         self, id: str, data: dict, access_token: str | None = None
     ) -> Application:
-        application = self._repository.find_one(id=id)
-        if application is None:
-            raise NotFound(
-                "Application with id: {id!r} not found".format(id=id)
+        with self._unit_of_work:
+            application = self._repository.find_one(id=id)
+            if application is None:
+                raise NotFound(
+                    "Application with id: {id!r} not found".format(id=id)
+                )
+            application = self._update(application=application, data=data)
+            self._repository.update_one(aggregate=application)
+            self._message_bus.publish(domain_events=application.domain_events)
+            application.clear_domain_events()
+        return ApplicationReadDto.from_entity(application)
+
+    # @AuthService.access_token_required
+    def discard_one(self, id: str, access_token: str | None = None) -> None:
+        with self._unit_of_work:
+            application = self._repository.find_one(id=id)
+            if application is None:
+                raise NotFound(
+                    "Application with id: {id!r} not found".format(id=id)
+                )
+            application.discard()
+            self._repository.update_one(aggregate=application)
+            self._message_bus.publish(domain_events=application.domain_events)
+            application.clear_domain_events()
+
+    # @AuthService.access_token_required
+    def delete_one(self, id: str, access_token: str | None = None) -> None:
+        with self._unit_of_work:
+            if not self._repository.exists(
+                id="eq:{}".format(id), include_discarded=True
+            ):
+                raise NotFound(
+                    "Application with id: {id!r} not found".format(id=id)
+                )
+            self._repository.delete_one(id=id)
+
+    # @AuthService.access_token_required
+    def add_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ApplicationReadDto]:
+        with self._unit_of_work:
+            applications = [self._create(data=item) for item in data]
+            keys = [
+                (application.name, application.version, application.architect)
+                for application in applications
+            ]
+            duplicated = {key for key in keys if keys.count(key) > 1}
+            if duplicated:
+                raise AlreadyExists(
+                    "Applications with name, version and architect: {keys!r} already exist".format(
+                        keys=sorted(duplicated)
+                    )
+                )
+            self._repository.add_many(aggregates=applications)
+            self._publish(applications=applications)
+        return [
+            ApplicationReadDto.from_entity(application)
+            for application in applications
+        ]
+
+    # @AuthService.access_token_required
+    def upsert_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> None:
+        """Adds the applications, or updates the ones with the same name, version and architect.
+
+        Idempotent, for the inventory sync jobs. No domain events are
+        published, the added and the updated applications can't be told apart.
+        """
+        with self._unit_of_work:
+            self._repository.upsert_many(
+                aggregates=[self._create(data=item) for item in data]
             )
-        application = application.update(
+
+    # @AuthService.access_token_required
+    def update_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ApplicationReadDto]:
+        with self._unit_of_work:
+            applications = self._find_many_by_id(
+                ids=[item.get("id") for item in data]
+            )
+            applications = [
+                self._update(
+                    application=applications[item.get("id")], data=item
+                )
+                for item in data
+            ]
+            self._repository.update_many(aggregates=applications)
+            self._publish(applications=applications)
+        return [
+            ApplicationReadDto.from_entity(application)
+            for application in applications
+        ]
+
+    # @AuthService.access_token_required
+    def discard_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        with self._unit_of_work:
+            applications = list(self._find_many_by_id(ids=ids).values())
+            for application in applications:
+                application.discard()
+            self._repository.discard_many(ids=ids)
+            self._publish(applications=applications)
+
+    # @AuthService.access_token_required
+    def delete_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        with self._unit_of_work:
+            self._check_ids(ids=ids)
+            self._repository.delete_many(ids=ids)
+
+    def _create(self, data: dict) -> Application:
+        return Application.create(
             name=data.get("name"),
             version=data.get("version"),
             architect=data.get("architect"),
         )
-        self._repository.update_one(aggregate=application)
-        self._message_bus.publish(domain_events=application.domain_events)
-        application.clear_domain_events()
-        return ApplicationReadDto.from_entity(application)
 
-    # @AuthService.access_token_required
-    def discard_one(self, id: str, access_token: str | None = None) -> None:
-        application = self._repository.find_one(id=id)
-        if application is None:
+    def _update(self, application: Application, data: dict) -> Application:
+        return application.update(
+            name=data.get("name"),
+            version=data.get("version"),
+            architect=data.get("architect"),
+        )
+
+    def _find_many_by_id(self, ids: list[str]) -> dict[str, Application]:
+        applications = {
+            application.id.value: application
+            for application in self._repository.find_many(
+                count="none",
+                include_discarded=True,
+                id="in:{}".format(",".join(ids)),
+            )._items
+        }
+        missing = [id for id in ids if id not in applications]
+        if missing:
             raise NotFound(
-                "Application with id: {id!r} not found".format(id=id)
+                "Applications with ids: {ids!r} not found".format(ids=missing)
             )
-        application.discard()
-        self._repository.update_one(aggregate=application)
-        self._message_bus.publish(domain_events=application.domain_events)
-        application.clear_domain_events()
+        return applications
 
-    # @AuthService.access_token_required
-    def delete_one(self, id: str, access_token: str | None = None) -> None:
-        application = self._repository.find_one(id=id)
-        if application is None:
+    def _check_ids(self, ids: list[str]) -> None:
+        found = set(
+            self._repository.get_ids(
+                id="in:{}".format(",".join(ids)), include_discarded=True
+            )
+        )
+        missing = [id for id in ids if id not in found]
+        if missing:
             raise NotFound(
-                "Application with id: {id!r} not found".format(id=id)
+                "Applications with ids: {ids!r} not found".format(ids=missing)
             )
-        self._repository.delete_one(id=id)
-        self._message_bus.publish(domain_events=application.domain_events)
-        application.clear_domain_events()
+
+    def _publish(self, applications: list[Application]) -> None:
+        """Publishes the domain events of all the applications in one call."""
+        self._message_bus.publish(
+            domain_events=[
+                domain_event
+                for application in applications
+                for domain_event in application.domain_events
+            ]
+        )
+        for application in applications:
+            application.clear_domain_events()
@@ -0,0 +1,289 @@
+"""Async application service."""
+
+import asyncio
+import math
+from contextlib import nullcontext
+
+from st_server.server.application.dtos.application import ApplicationReadDto
+from st_server.server.application.services.application import (
+    ApplicationService,
+)
+from st_server.server.domain.entities.application import Application
+from st_server.server.domain.repositories.async_application_repository import (
+    AsyncApplicationRepository,
+)
+from st_server.shared.application.exceptions import AlreadyExists, NotFound
+from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.domain.repositories.unit_of_work import AsyncUnitOfWork
+from st_server.shared.helper.filter import validate_filter
+from st_server.shared.helper.pagination import validate_pagination
+from st_server.shared.helper.sort import validate_sort
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+
+class AsyncApplicationService:
+    """Async application service implementation.
+
+    Same behaviour as `ApplicationService`, with awaitable methods. The
+    message bus is blocking, so the domain events are published from a
+    thread.
+    """
+
+    def __init__(
+        self,
+        repository: AsyncApplicationRepository,
+        message_bus: MessageBus,
+        unit_of_work: AsyncUnitOfWork | None = None,
+    ) -> None:
+        self._repository = repository
+        self._message_bus = message_bus
+        # Without a unit of work, each repository call commits on its own.
+        self._unit_of_work = unit_of_work or nullcontext()
+
+    # The aggregates are built as in the sync service.
+    _create = ApplicationService._create
+    _update = ApplicationService._update
+
+    # @AuthService.access_token_required
+    @validate_pagination
+    @validate_sort
+    @validate_filter
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        access_token: str | None = None,
+        **kwargs,
+    ) -> ServicePageDto:
+        if fields is None:
+            fields = []
+        if limit is None:
+            limit = 0
+        if offset is None:
+            offset = 0
+        if sort is None:
+            sort = []
+        if kwargs is None:
+            kwargs = {}
+        applications = await self._repository.read_many(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+            count=count,
+            **kwargs,
+        )
+        total = applications._total
+        return ServicePageDto(
+            _total=total,
+            _limit=limit,
+            _offset=(offset or 1),
+            _prev_offset=((offset or 1) - 1) if (offset or 1) > 1 else None,
+            _next_offset=((offset or 1) + 1)
+            if (offset or 1) > 0
+            and (
+                (offset or 1)
+                < math.ceil(float(total) / float(limit or total or 1))
+                if total is not None
+                else len(applications._items) == limit
+            )
+            else None,
+            _cursor=cursor,
+            _next_cursor=applications._next_cursor,
+            _items=[
+                ApplicationReadDto.from_dict(application)
+                for application in applications._items
+            ],
+        )
+
+    # @AuthService.access_token_required
+    async def find_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+        access_token: str | None = None,
+    ) -> Application:
+        if fields is None:
+            fields = []
+        application = await self._repository.read_one(id=id, fields=fields)
+        if application is None:
+            raise NotFound(message=f"Application with id {id} not found.")
+        return ApplicationReadDto.from_dict(application)
+
+    # @AuthService.access_token_required
+    async def add_one(
+        self, data: dict, access_token: str | None = None
+    ) -> Application:
+        async with self._unit_of_work:
+            application = self._create(data=data)
+            await self._repository.add_one(aggregate=application)
+            await self._publish(applications=[application])
+        return ApplicationReadDto.from_entity(application)
+
+    # @AuthService.access_token_required
+    async def update_one(
+        self, id: str, data: dict, access_token: str | None = None
+    ) -> Application:
+        async with self._unit_of_work:
+            application = await self._repository.find_one(id=id)
+            if application is None:
+                raise NotFound(
+                    "Application with id: {id!r} not found".format(id=id)
+                )
+            application = self._update(application=application, data=data)
+            await self._repository.update_one(aggregate=application)
+            await self._publish(applications=[application])
+        return ApplicationReadDto.from_entity(application)
+
+    # @AuthService.access_token_required
+    async def discard_one(
+        self, id: str, access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            application = await self._repository.find_one(id=id)
+            if application is None:
+                raise NotFound(
+                    "Application with id: {id!r} not found".format(id=id)
+                )
+            application.discard()
+            await self._repository.update_one(aggregate=application)
+            await self._publish(applications=[application])
+
+    # @AuthService.access_token_required
+    async def delete_one(
+        self, id: str, access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            if not await self._repository.exists(
+                id="eq:{}".format(id), include_discarded=True
+            ):
+                raise NotFound(
+                    "Application with id: {id!r} not found".format(id=id)
+                )
+            await self._repository.delete_one(id=id)
+
+    # @AuthService.access_token_required
+    async def add_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ApplicationReadDto]:
+        async with self._unit_of_work:
+            applications = [self._create(data=item) for item in data]
+            keys = [
+                (application.name, application.version, application.architect)
+                for application in applications
+            ]
+            duplicated = {key for key in keys if keys.count(key) > 1}
+            if duplicated:
+                raise AlreadyExists(
+                    "Applications with name, version and architect: {keys!r} already exist".format(
+                        keys=sorted(duplicated)
+                    )
+                )
+            await self._repository.add_many(aggregates=applications)
+            await self._publish(applications=applications)
+        return [
+            ApplicationReadDto.from_entity(application)
+            for application in applications
+        ]
+
+    # @AuthService.access_token_required
+    async def upsert_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> None:
+        """Adds the applications, or updates the ones with the same name, version and architect.
+
+        Idempotent, for the inventory sync jobs. No domain events are
+        published, the added and the updated applications can't be told apart.
+        """
+        async with self._unit_of_work:
+            await self._repository.upsert_many(
+                aggregates=[self._create(data=item) for item in data]
+            )
+
+    # @AuthService.access_token_required
+    async def update_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ApplicationReadDto]:
+        async with self._unit_of_work:
+            applications = await self._find_many_by_id(
+                ids=[item.get("id") for item in data]
+            )
+            applications = [
+                self._update(
+                    application=applications[item.get("id")], data=item
+                )
+                for item in data
+            ]
+            await self._repository.update_many(aggregates=applications)
+            await self._publish(applications=applications)
+        return [
+            ApplicationReadDto.from_entity(application)
+            for application in applications
+        ]
+
+    # @AuthService.access_token_required
+    async def discard_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            applications = list(
+                (await self._find_many_by_id(ids=ids)).values()
+            )
+            for application in applications:
+                application.discard()
+            await self._repository.discard_many(ids=ids)
+            await self._publish(applications=applications)
+
+    # @AuthService.access_token_required
+    async def delete_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            await self._check_ids(ids=ids)
+            await self._repository.delete_many(ids=ids)
+
+    async def _find_many_by_id(self, ids: list[str]) -> dict[str, Application]:
+        page = await self._repository.find_many(
+            count="none",
+            include_discarded=True,
+            id="in:{}".format(",".join(ids)),
+        )
+        applications = {
+            application.id.value: application for application in page._items
+        }
+        missing = [id for id in ids if id not in applications]
+        if missing:
+            raise NotFound(
+                "Applications with ids: {ids!r} not found".format(ids=missing)
+            )
+        return applications
+
+    async def _check_ids(self, ids: list[str]) -> None:
+        found = set(
+            await self._repository.get_ids(
+                id="in:{}".format(",".join(ids)), include_discarded=True
+            )
+        )
+        missing = [id for id in ids if id not in found]
+        if missing:
+            raise NotFound(
+                "Applications with ids: {ids!r} not found".format(ids=missing)
+            )
+
+    async def _publish(self, applications: list[Application]) -> None:
+        """Publishes the domain events of all the applications in one call."""
+        await asyncio.to_thread(
+            self._message_bus.publish,
+            domain_events=[
+                domain_event
+                for application in applications
+                for domain_event in application.domain_events
+            ],
+        )
+        for application in applications:
+            application.clear_domain_events()
@@ -0,0 +1,265 @@
+"""Async credential service."""
+
+import math
+from contextlib import nullcontext
+
+from st_server.server.application.dtos.credential import CredentialReadDto
+from st_server.server.application.services.credential import (
+    CredentialService,
+)
+from st_server.server.domain.entities.credential import Credential
+from st_server.server.domain.repositories.async_credential_repository import (
+    AsyncCredentialRepository,
+)
+from st_server.shared.application.exceptions import AlreadyExists, NotFound
+from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.domain.repositories.unit_of_work import AsyncUnitOfWork
+from st_server.shared.helper.filter import validate_filter
+from st_server.shared.helper.pagination import validate_pagination
+from st_server.shared.helper.sort import validate_sort
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+
+class AsyncCredentialService:
+    """Async credential service implementation.
+
+    Same behaviour as `CredentialService`, with awaitable methods.
+    """
+
+    def __init__(
+        self,
+        repository: AsyncCredentialRepository,
+        message_bus: MessageBus,
+        unit_of_work: AsyncUnitOfWork | None = None,
+    ) -> None:
+        self._repository = repository
+        self._message_bus = message_bus
+        # Without a unit of work, each repository call commits on its own.
+        self._unit_of_work = unit_of_work or nullcontext()
+
+    # The entities are built as in the sync service.
+    _create = CredentialService._create
+    _update = CredentialService._update
+
+    # @AuthService.access_token_required
+    @validate_pagination
+    @validate_sort
+    @validate_filter
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        access_token: str | None = None,
+        **kwargs,
+    ) -> ServicePageDto:
+        if fields is None:
+            fields = []
+        if limit is None:
+            limit = 0
+        if offset is None:
+            offset = 0
+        if sort is None:
+            sort = []
+        if kwargs is None:
+            kwargs = {}
+        credentials = await self._repository.read_many(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+            count=count,
+            **kwargs,
+        )
+        total = credentials._total
+        return ServicePageDto(
+            _total=total,
+            _limit=limit,
+            _offset=(offset or 1),
+            _prev_offset=((offset or 1) - 1) if (offset or 1) > 1 else None,
+            _next_offset=((offset or 1) + 1)
+            if (offset or 1) > 0
+            and (
+                (offset or 1)
+                < math.ceil(float(total) / float(limit or total or 1))
+                if total is not None
+                else len(credentials._items) == limit
+            )
+            else None,
+            _cursor=cursor,
+            _next_cursor=credentials._next_cursor,
+            _items=[
+                CredentialReadDto.from_dict(credential)
+                for credential in credentials._items
+            ],
+        )
+
+    # @AuthService.access_token_required
+    async def find_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+        access_token: str | None = None,
+    ) -> Credential:
+        if fields is None:
+            fields = []
+        credential = await self._repository.read_one(id=id, fields=fields)
+        if credential is None:
+            raise NotFound(message=f"Credential with id {id} not found.")
+        return CredentialReadDto.from_dict(credential)
+
+    # @AuthService.access_token_required
+    async def add_one(
+        self, data: dict, access_token: str | None = None
+    ) -> Credential:
+        async with self._unit_of_work:
+            credential = self._create(data=data)
+            await self._repository.add_one(aggregate=credential)
+        return CredentialReadDto.from_entity(credential)
+
+    # @AuthService.access_token_required
+    async def update_one(
+        self, id: str, data: dict, access_token: str | None = None
+    ) -> Credential:
+        async with self._unit_of_work:
+            credential = await self._repository.find_one(id=id)
+            if credential is None:
+                raise NotFound(
+                    "Credential with id: {id!r} not found".format(id=id)
+                )
+            credential = self._update(credential=credential, data=data)
+            await self._repository.update_one(aggregate=credential)
+        return CredentialReadDto.from_entity(credential)
+
+    # @AuthService.access_token_required
+    async def discard_one(
+        self, id: str, access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            credential = await self._repository.find_one(id=id)
+            if credential is None:
+                raise NotFound(
+                    "Credential with id: {id!r} not found".format(id=id)
+                )
+            credential.discard()
+            await self._repository.update_one(aggregate=credential)
+
+    # @AuthService.access_token_required
+    async def delete_one(
+        self, id: str, access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            if not await self._repository.exists(
+                id="eq:{}".format(id), include_discarded=True
+            ):
+                raise NotFound(
+                    "Credential with id: {id!r} not found".format(id=id)
+                )
+            await self._repository.delete_one(id=id)
+
+    # @AuthService.access_token_required
+    async def add_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[CredentialReadDto]:
+        async with self._unit_of_work:
+            credentials = [self._create(data=item) for item in data]
+            keys = [
+                (credential.server_id, credential.username)
+                for credential in credentials
+            ]
+            duplicated = {key for key in keys if keys.count(key) > 1}
+            if duplicated:
+                raise AlreadyExists(
+                    "Credentials for server id and username: {keys!r} already exist".format(
+                        keys=sorted(
+                            (server_id.value, username)
+                            for server_id, username in duplicated
+                        )
+                    )
+                )
+            await self._repository.add_many(aggregates=credentials)
+        return [
+            CredentialReadDto.from_entity(credential)
+            for credential in credentials
+        ]
+
+    # @AuthService.access_token_required
+    async def upsert_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> None:
+        """Adds the credentials, or updates the ones with the same server id and username.
+
+        Idempotent, for the inventory sync jobs. No domain events are
+        published, the added and the updated credentials can't be told apart.
+        """
+        async with self._unit_of_work:
+            await self._repository.upsert_many(
+                aggregates=[self._create(data=item) for item in data]
+            )
+
+    # @AuthService.access_token_required
+    async def update_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[CredentialReadDto]:
+        async with self._unit_of_work:
+            credentials = await self._find_many_by_id(
+                ids=[item.get("id") for item in data]
+            )
+            credentials = [
+                self._update(credential=credentials[item.get("id")], data=item)
+                for item in data
+            ]
+            await self._repository.update_many(aggregates=credentials)
+        return [
+            CredentialReadDto.from_entity(credential)
+            for credential in credentials
+        ]
+
+    # @AuthService.access_token_required
+    async def discard_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            for credential in (await self._find_many_by_id(ids=ids)).values():
+                credential.discard()
+            await self._repository.discard_many(ids=ids)
+
+    # @AuthService.access_token_required
+    async def delete_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            await self._check_ids(ids=ids)
+            await self._repository.delete_many(ids=ids)
+
+    async def _find_many_by_id(self, ids: list[str]) -> dict[str, Credential]:
+        page = await self._repository.find_many(
+            count="none",
+            include_discarded=True,
+            id="in:{}".format(",".join(ids)),
+        )
+        credentials = {
+            credential.id.value: credential for credential in page._items
+        }
+        missing = [id for id in ids if id not in credentials]
+        if missing:
+            raise NotFound(
+                "Credentials with ids: {ids!r} not found".format(ids=missing)
+            )
+        return credentials
+
+    async def _check_ids(self, ids: list[str]) -> None:
+        found = set(
+            await self._repository.get_ids(
+                id="in:{}".format(",".join(ids)), include_discarded=True
+            )
+        )
+        missing = [id for id in ids if id not in found]
+        if missing:
+            raise NotFound(
+                "Credentials with ids: {ids!r} not found".format(ids=missing)
+            )
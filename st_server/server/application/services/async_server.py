@@ -0,0 +1,270 @@
+"""Async server service."""
+
+import asyncio
+import math
+from contextlib import nullcontext
+
+from st_server.server.application.dtos.server import ServerReadDto
+from st_server.server.application.services.server import ServerService
+from st_server.server.domain.entities.server import Server
+from st_server.server.domain.repositories.async_server_repository import (
+    AsyncServerRepository,
+)
+from st_server.shared.application.exceptions import AlreadyExists, NotFound
+from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.domain.repositories.unit_of_work import AsyncUnitOfWork
+from st_server.shared.helper.filter import validate_filter
+from st_server.shared.helper.pagination import validate_pagination
+from st_server.shared.helper.sort import validate_sort
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+
+class AsyncServerService:
+    """Async server service implementation.
+
+    Same behaviour as `ServerService`, with awaitable methods. The message
+    bus is blocking, so the domain events are published from a thread.
+    """
+
+    def __init__(
+        self,
+        repository: AsyncServerRepository,
+        message_bus: MessageBus,
+        unit_of_work: AsyncUnitOfWork | None = None,
+    ) -> None:
+        self._repository = repository
+        self._message_bus = message_bus
+        # Without a unit of work, each repository call commits on its own.
+        self._unit_of_work = unit_of_work or nullcontext()
+
+    # The aggregates are built as in the sync service.
+    _create = ServerService._create
+    _update = ServerService._update
+
+    # @AuthService.access_token_required
+    @validate_pagination
+    @validate_sort
+    @validate_filter
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        access_token: str | None = None,
+        **kwargs,
+    ) -> ServicePageDto:
+        if fields is None:
+            fields = []
+        if limit is None:
+            limit = 0
+        if offset is None:
+            offset = 0
+        if sort is None:
+            sort = []
+        if kwargs is None:
+            kwargs = {}
+        servers = await self._repository.read_many(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+            count=count,
+            **kwargs,
+        )
+        total = servers._total
+        return ServicePageDto(
+            _total=total,
+            _limit=limit,
+            _offset=(offset or 1),
+            _prev_offset=((offset or 1) - 1) if (offset or 1) > 1 else None,
+            _next_offset=((offset or 1) + 1)
+            if (offset or 1) > 0
+            and (
+                (offset or 1)
+                < math.ceil(float(total) / float(limit or total or 1))
+                if total is not None
+                else len(servers._items) == limit
+            )
+            else None,
+            _cursor=cursor,
+            _next_cursor=servers._next_cursor,
+            _items=[
+                ServerReadDto.from_dict(server) for server in servers._items
+            ],
+        )
+
+    # @AuthService.access_token_required
+    async def find_one(
+        self,
+        id: str,
+        fields: list[str] | None = None,
+        access_token: str | None = None,
+    ) -> ServerReadDto:
+        if fields is None:
+            fields = []
+        server = await self._repository.read_one(id=id, fields=fields)
+        if server is None:
+            raise NotFound(message=f"Server with id {id} not found.")
+        return ServerReadDto.from_dict(server)
+
+    # @AuthService.access_token_required
+    async def add_one(
+        self, data: dict, access_token: str | None = None
+    ) -> ServerReadDto:
+        async with self._unit_of_work:
+            server = self._create(data=data)
+            await self._repository.add_one(aggregate=server)
+            await self._publish(servers=[server])
+        return ServerReadDto.from_entity(server=server)
+
+    # @AuthService.access_token_required
+    async def update_one(
+        self, id: str, data: dict, access_token: str | None = None
+    ) -> ServerReadDto:
+        async with self._unit_of_work:
+            server = await self._repository.find_one(id=id)
+            if server is None:
+                raise NotFound(
+                    "Server with id: {id!r} not found".format(id=id)
+                )
+            server = self._update(server=server, data=data)
+            await self._repository.update_one(aggregate=server)
+            await self._publish(servers=[server])
+        return ServerReadDto.from_entity(server=server)
+
+    # @AuthService.access_token_required
+    async def discard_one(
+        self, id: str, access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            server = await self._repository.find_one(id=id)
+            if server is None:
+                raise NotFound(
+                    "Server with id: {id!r} not found".format(id=id)
+                )
+            server.discard()
+            await self._repository.update_one(aggregate=server)
+            await self._publish(servers=[server])
+
+    # @AuthService.access_token_required
+    async def delete_one(
+        self, id: str, access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            if not await self._repository.exists(
+                id="eq:{}".format(id), include_discarded=True
+            ):
+                raise NotFound(
+                    "Server with id: {id!r} not found".format(id=id)
+                )
+            await self._repository.delete_one(id=id)
+
+    # @AuthService.access_token_required
+    async def add_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ServerReadDto]:
+        async with self._unit_of_work:
+            servers = [self._create(data=item) for item in data]
+            names = [server.name for server in servers]
+            duplicated = {name for name in names if names.count(name) > 1}
+            if duplicated:
+                raise AlreadyExists(
+                    "Servers with names: {names!r} already exist".format(
+                        names=sorted(duplicated)
+                    )
+                )
+            await self._repository.add_many(aggregates=servers)
+            await self._publish(servers=servers)
+        return [ServerReadDto.from_entity(server=server) for server in servers]
+
+    # @AuthService.access_token_required
+    async def upsert_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> None:
+        """Adds the servers, or updates the ones with the same name.
+
+        Idempotent, for the inventory sync jobs. No domain events are
+        published, the added and the updated servers can't be told apart.
+        """
+        async with self._unit_of_work:
+            await self._repository.upsert_many(
+                aggregates=[self._create(data=item) for item in data]
+            )
+
+    # @AuthService.access_token_required
+    async def update_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ServerReadDto]:
+        async with self._unit_of_work:
+            servers = await self._find_many_by_id(
+                ids=[item.get("id") for item in data]
+            )
+            servers = [
+                self._update(server=servers[item.get("id")], data=item)
+                for item in data
+            ]
+            await self._repository.update_many(aggregates=servers)
+            await self._publish(servers=servers)
+        return [ServerReadDto.from_entity(server=server) for server in servers]
+
+    # @AuthService.access_token_required
+    async def discard_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            servers = list((await self._find_many_by_id(ids=ids)).values())
+            for server in servers:
+                server.discard()
+            await self._repository.discard_many(ids=ids)
+            await self._publish(servers=servers)
+
+    # @AuthService.access_token_required
+    async def delete_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        async with self._unit_of_work:
+            await self._check_ids(ids=ids)
+            await self._repository.delete_many(ids=ids)
+
+    async def _find_many_by_id(self, ids: list[str]) -> dict[str, Server]:
+        page = await self._repository.find_many(
+            count="none",
+            include_discarded=True,
+            id="in:{}".format(",".join(ids)),
+        )
+        servers = {server.id.value: server for server in page._items}
+        missing = [id for id in ids if id not in servers]
+        if missing:
+            raise NotFound(
+                "Servers with ids: {ids!r} not found".format(ids=missing)
+            )
+        return servers
+
+    async def _check_ids(self, ids: list[str]) -> None:
+        found = set(
+            await self._repository.get_ids(
+                id="in:{}".format(",".join(ids)), include_discarded=True
+            )
+        )
+        missing = [id for id in ids if id not in found]
+        if missing:
+            raise NotFound(
+                "Servers with ids: {ids!r} not found".format(ids=missing)
+            )
+
+    async def _publish(self, servers: list[Server]) -> None:
+        """Publishes the domain events of all the servers in one call."""
+        await asyncio.to_thread(
+            self._message_bus.publish,
+            domain_events=[
+                domain_event
+                for server in servers
+                for domain_event in server.domain_events
+            ],
+        )
+        for server in servers:
+            server.clear_domain_events()
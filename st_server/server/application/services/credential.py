@@ -1,6 +1,8 @@
 """Credential service."""
 
 import math
+from collections.abc import Iterator
+from contextlib import nullcontext
 
 from st_server.server.application.dtos.credential import CredentialReadDto
 from st_server.server.domain.entities.credential import Credential
@@ -12,6 +14,7 @@ from st_server.server.domain.value_objects.connection_type import (
 )
 from st_server.shared.application.exceptions import AlreadyExists, NotFound
 from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.domain.repositories.unit_of_work import UnitOfWork
 from st_server.shared.domain.value_objects.entity_id import EntityId
 from st_server.shared.helper.filter import validate_filter
 from st_server.shared.helper.pagination import validate_pagination
@@ -34,7 +37,8 @@ class CredentialService:
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
@@ -50,6 +54,16 @@ class CredentialService:
     In the `find_many` method, the `fields` parameter is a list of strings with the
     field names to be loaded.
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. When provided, the page
+    starts right after the row the cursor points to and the offset is ignored.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates:
+    - `exact`: counts the aggregates (default).
+    - `estimated`: uses the table statistics or a cached count per filters.
+    - `none`: skips the count, the total is `None`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
@@ -57,10 +71,15 @@ class CredentialService:
     """
 
     def __init__(
-        self, repository: CredentialRepository, message_bus: MessageBus
+        self,
+        repository: CredentialRepository,
+        message_bus: MessageBus,
+        unit_of_work: UnitOfWork | None = None,
     ) -> None:
         self._repository = repository
         self._message_bus = message_bus
+        # Without a unit of work, each repository call commits on its own.
+        self._unit_of_work = unit_of_work or nullcontext()
 
     # @AuthService.access_token_required
     @validate_pagination
@@ -70,8 +89,10 @@ class CredentialService:
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         access_token: str | None = None,
         **kwargs,
     ) -> ServicePageDto:
@@ -85,8 +106,14 @@ class CredentialService:
             sort = []
         if kwargs is None:
             kwargs = {}
-        credentials = self._repository.find_many(
-            limit=limit, offset=offset, sort=sort, fields=fields, **kwargs
+        credentials = self._repository.read_many(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+            count=count,
+            **kwargs,
         )
         total = credentials._total
         return ServicePageDto(
@@ -96,10 +123,17 @@ class CredentialService:
             _prev_offset=((offset or 1) - 1) if (offset or 1) > 1 else None,
             _next_offset=((offset or 1) + 1)
             if (offset or 1) > 0
-            and (offset or 1) < math.ceil(float(total) / float(limit or total))
+            and (
+                (offset or 1)
+                < math.ceil(float(total) / float(limit or total or 1))
+                if total is not None
+                else len(credentials._items) == limit
+            )
             else None,
+            _cursor=cursor,
+            _next_cursor=credentials._next_cursor,
             _items=[
-                CredentialReadDto.from_entity(credential)
+                CredentialReadDto.from_dict(credential)
                 for credential in credentials._items
             ],
         )
@@ -113,16 +147,154 @@ class CredentialService:
     ) -> Credential:
         if fields is None:
             fields = []
-        credential = self._repository.find_one(id=id, fields=fields)
+        credential = self._repository.read_one(id=id, fields=fields)
         if credential is None:
             raise NotFound(message=f"Credential with id {id} not found.")
-        return CredentialReadDto.from_entity(credential)
+        return CredentialReadDto.from_dict(credential)
+
+    # @AuthService.access_token_required
+    @validate_sort
+    @validate_filter
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        access_token: str | None = None,
+        **kwargs,
+    ) -> Iterator[CredentialReadDto]:
+        """Yields the credentials matching the filters, without pagination.
+
+        The credentials are streamed from the repository in chunks of
+        `chunk_size`, for the batch jobs and the exports.
+        """
+        for credential in self._repository.read_iter(
+            sort=sort, fields=fields, chunk_size=chunk_size, **kwargs
+        ):
+            yield CredentialReadDto.from_dict(credential)
 
     # @AuthService.access_token_required
     def add_one(
         self, data: dict, access_token: str | None = None
     ) -> Credential:
-        credential = Credential.create(
+        with self._unit_of_work:
+            credential = self._create(data=data)
+            self._repository.add_one(aggregate=credential)
+        return CredentialReadDto.from_entity(credential)
+
+    # @AuthService.access_token_required
+    def update_one(
+        self, id: str, data: dict, access_token: str | None = None
+    ) -> Credential:
+        with self._unit_of_work:
+            credential = self._repository.find_one(id=id)
+            if credential is None:
+                raise NotFound(
+                    "Credential with id: {id!r} not found".format(id=id)
+                )
+            credential = self._update(credential=credential, data=data)
+            self._repository.update_one(aggregate=credential)
+        return CredentialReadDto.from_entity(credential)
+
+    # @AuthService.access_token_required
+    def discard_one(self, id: str, access_token: str | None = None) -> None:
+        with self._unit_of_work:
+            credential = self._repository.find_one(id=id)
+            if credential is None:
+                raise NotFound(
+                    "Credential with id: {id!r} not found".format(id=id)
+                )
+            credential.discard()
+            self._repository.update_one(aggregate=credential)
+
+    # @AuthService.access_token_required
+    def delete_one(self, id: str, access_token: str | None = None) -> None:
+        with self._unit_of_work:
+            if not self._repository.exists(
+                id="eq:{}".format(id), include_discarded=True
+            ):
+                raise NotFound(
+                    "Credential with id: {id!r} not found".format(id=id)
+                )
+            self._repository.delete_one(id=id)
+
+    # @AuthService.access_token_required
+    def add_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[CredentialReadDto]:
+        with self._unit_of_work:
+            credentials = [self._create(data=item) for item in data]
+            keys = [
+                (credential.server_id, credential.username)
+                for credential in credentials
+            ]
+            duplicated = {key for key in keys if keys.count(key) > 1}
+            if duplicated:
+                raise AlreadyExists(
+                    "Credentials for server id and username: {keys!r} already exist".format(
+                        keys=sorted(
+                            (server_id.value, username)
+                            for server_id, username in duplicated
+                        )
+                    )
+                )
+            self._repository.add_many(aggregates=credentials)
+        return [
+            CredentialReadDto.from_entity(credential)
+            for credential in credentials
+        ]
+
+    # @AuthService.access_token_required
+    def upsert_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> None:
+        """Adds the credentials, or updates the ones with the same server id and username.
+
+        Idempotent, for the inventory sync jobs. No domain events are
+        published, the added and the updated credentials can't be told apart.
+        """
+        with self._unit_of_work:
+            self._repository.upsert_many(
+                aggregates=[self._create(data=item) for item in data]
+            )
+
+    # @AuthService.access_token_required
+    def update_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[CredentialReadDto]:
+        with self._unit_of_work:
+            credentials = self._find_many_by_id(
+                ids=[item.get("id") for item in data]
+            )
+            credentials = [
+                self._update(credential=credentials[item.get("id")], data=item)
+                for item in data
+            ]
+            self._repository.update_many(aggregates=credentials)
+        return [
+            CredentialReadDto.from_entity(credential)
+            for credential in credentials
+        ]
+
+    # @AuthService.access_token_required
+    def discard_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        with self._unit_of_work:
+            for credential in self._find_many_by_id(ids=ids).values():
+                credential.discard()
+            self._repository.discard_many(ids=ids)
+
+    # @AuthService.access_token_required
+    def delete_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        with self._unit_of_work:
+            self._check_ids(ids=ids)
+            self._repository.delete_many(ids=ids)
+
+    def _create(self, data: dict) -> Credential:
+        return Credential.create(
             server_id=EntityId.from_string(value=data.get("server_id")),
             connection_type=ConnectionType.from_string(
                 value=data.get("connection_type")
@@ -134,30 +306,9 @@ class CredentialService:
             public_ip=data.get("public_ip"),
             public_port=data.get("public_port"),
         )
-        credentials = self._repository.find_many(
-            server_id="eq:{}".format(credential.server_id),
-            username="eq:{}".format(credential.username),
-        )
-        if credentials._total:
-            raise AlreadyExists(
-                "Credential for server id: {server_id!r} with username: {username!r} already exists".format(
-                    server_id=credential.server_id,
-                    username=credential.username,
-                )
-            )
-        self._repository.add_one(aggregate=credential)
-        return CredentialReadDto.from_entity(credential)
 
-    # @AuthService.access_token_required
-    def update_one(
-        self, id: str, data: dict, access_token: str | None = None
-    ) -> Credential:
-        credential = self._repository.find_one(id=id)
-        if credential is None:
-            raise NotFound(
-                "Credential with id: {id!r} not found".format(id=id)
-            )
-        credential = credential.update(
+    def _update(self, credential: Credential, data: dict) -> Credential:
+        return credential.update(
             server_id=EntityId.from_string(value=data.get("server_id"))
             if data.get("server_id")
             else credential.server_id,
@@ -173,24 +324,31 @@ class CredentialService:
             public_ip=data.get("public_ip"),
             public_port=data.get("public_port"),
         )
-        self._repository.update_one(aggregate=credential)
-        return CredentialReadDto.from_entity(credential)
 
-    # @AuthService.access_token_required
-    def discard_one(self, id: str, access_token: str | None = None) -> None:
-        credential = self._repository.find_one(id=id)
-        if credential is None:
+    def _find_many_by_id(self, ids: list[str]) -> dict[str, Credential]:
+        credentials = {
+            credential.id.value: credential
+            for credential in self._repository.find_many(
+                count="none",
+                include_discarded=True,
+                id="in:{}".format(",".join(ids)),
+            )._items
+        }
+        missing = [id for id in ids if id not in credentials]
+        if missing:
             raise NotFound(
-                "Credential with id: {id!r} not found".format(id=id)
+                "Credentials with ids: {ids!r} not found".format(ids=missing)
             )
-        credential.discard()
-        self._repository.update_one(aggregate=credential)
+        return credentials
 
-    # @AuthService.access_token_required
-    def delete_one(self, id: str, access_token: str | None = None) -> None:
-        credential = self._repository.find_one(id=id)
-        if credential is None:
+    def _check_ids(self, ids: list[str]) -> None:
+        found = set(
+            self._repository.get_ids(
+                id="in:{}".format(",".join(ids)), include_discarded=True
+            )
+        )
+        missing = [id for id in ids if id not in found]
+        if missing:
             raise NotFound(
-                "Credential with id: {id!r} not found".format(id=id)
+                "Credentials with ids: {ids!r} not found".format(ids=missing)
             )
-        self._repository.delete_one(id=id)
@@ -1,6 +1,8 @@
 """Server service."""
 
 import math
+from collections.abc import Iterator
+from contextlib import nullcontext
 
 from st_server.server.application.dtos.server import ServerReadDto
 from st_server.server.domain.entities.server import Server
@@ -14,6 +16,7 @@ from st_server.server.domain.value_objects.operating_system import (
 from st_server.server.domain.value_objects.server_status import ServerStatus
 from st_server.shared.application.exceptions import AlreadyExists, NotFound
 from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.domain.repositories.unit_of_work import UnitOfWork
 from st_server.shared.helper.filter import validate_filter
 from st_server.shared.helper.pagination import validate_pagination
 from st_server.shared.helper.sort import validate_sort
@@ -35,7 +38,8 @@ class ServerService:
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
@@ -51,6 +55,16 @@ class ServerService:
     In the `find_many` method, the `fields` parameter is a list of strings with the
     field names to be loaded.
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. When provided, the page
+    starts right after the row the cursor points to and the offset is ignored.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates:
+    - `exact`: counts the aggregates (default).
+    - `estimated`: uses the table statistics or a cached count per filters.
+    - `none`: skips the count, the total is `None`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
@@ -58,10 +72,15 @@ class ServerService:
     """
 
     def __init__(
-        self, repository: ServerRepository, message_bus: MessageBus
+        self,
+        repository: ServerRepository,
+        message_bus: MessageBus,
+        unit_of_work: UnitOfWork | None = None,
     ) -> None:
         self._repository = repository
         self._message_bus = message_bus
+        # Without a unit of work, each repository call commits on its own.
+        self._unit_of_work = unit_of_work or nullcontext()
 
     # @AuthService.access_token_required
     @validate_pagination
@@ -71,8 +90,10 @@ class ServerService:
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         access_token: str | None = None,
         **kwargs,
     ) -> ServicePageDto:
@@ -86,8 +107,14 @@ class ServerService:
             sort = []
         if kwargs is None:
             kwargs = {}
-        servers = self._repository.find_many(
-            limit=limit, offset=offset, sort=sort, fields=fields, **kwargs
+        servers = self._repository.read_many(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            sort=sort,
+            fields=fields,
+            count=count,
+            **kwargs,
         )
         total = servers._total
         return ServicePageDto(
@@ -97,11 +124,17 @@ class ServerService:
             _prev_offset=((offset or 1) - 1) if (offset or 1) > 1 else None,
             _next_offset=((offset or 1) + 1)
             if (offset or 1) > 0
-            and (offset or 1) < math.ceil(float(total) / float(limit or total))
+            and (
+                (offset or 1)
+                < math.ceil(float(total) / float(limit or total or 1))
+                if total is not None
+                else len(servers._items) == limit
+            )
             else None,
+            _cursor=cursor,
+            _next_cursor=servers._next_cursor,
             _items=[
-                ServerReadDto.from_entity(server=server)
-                for server in servers._items
+                ServerReadDto.from_dict(server) for server in servers._items
             ],
         )
 
@@ -114,16 +147,152 @@ class ServerService:
     ) -> ServerReadDto:
         if fields is None:
             fields = []
-        server = self._repository.find_one(id=id, fields=fields)
+        server = self._repository.read_one(id=id, fields=fields)
         if server is None:
             raise NotFound(message=f"Server with id {id} not found.")
-        return ServerReadDto.from_entity(server=server)
+        return ServerReadDto.from_dict(server)
+
+    # @AuthService.access_token_required
+    @validate_sort
+    @validate_filter
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        access_token: str | None = None,
+        **kwargs,
+    ) -> Iterator[ServerReadDto]:
+        """Yields the servers matching the filters, without pagination.
+
+        The servers are streamed from the repository in chunks of
+        `chunk_size`, for the batch jobs and the exports.
+        """
+        for server in self._repository.read_iter(
+            sort=sort, fields=fields, chunk_size=chunk_size, **kwargs
+        ):
+            yield ServerReadDto.from_dict(server)
 
     # @AuthService.access_token_required
     def add_one(
         self, data: dict, access_token: str | None = None
     ) -> ServerReadDto:
-        server = Server.create(
+        with self._unit_of_work:
+            server = self._create(data=data)
+            self._repository.add_one(aggregate=server)
+            self._message_bus.publish(domain_events=server.domain_events)
+            server.clear_domain_events()
+        return ServerReadDto.from_entity(server=server)
+
+    # @AuthService.access_token_required
+    def update_one(
+        self, id: str, data: dict, access_token: str | None = None
+    ) -> ServerReadDto:
+        with self._unit_of_work:
+            server = self._repository.find_one(id=id)
+            if server is None:
+                raise NotFound(
+                    "Server with id: {id!r} not found".format(id=id)
+                )
+            server = self._update(server=server, data=data)
+            self._repository.update_one(aggregate=server)
+            self._message_bus.publish(domain_events=server.domain_events)
+            server.clear_domain_events()
+        return ServerReadDto.from_entity(server=server)
+
+    # @AuthService.access_token_required
+    def discard_one(self, id: str, access_token: str | None = None) -> None:
+        with self._unit_of_work:
+            server = self._repository.find_one(id=id)
+            if server is None:
+                raise NotFound(
+                    "Server with id: {id!r} not found".format(id=id)
+                )
+            server.discard()
+            self._repository.update_one(aggregate=server)
+            self._message_bus.publish(domain_events=server.domain_events)
+            server.clear_domain_events()
+
+    # @AuthService.access_token_required
+    def delete_one(self, id: str, access_token: str | None = None) -> None:
+        with self._unit_of_work:
+            if not self._repository.exists(
+                id="eq:{}".format(id), include_discarded=True
+            ):
+                raise NotFound(
+                    "Server with id: {id!r} not found".format(id=id)
+                )
+            self._repository.delete_one(id=id)
+
+    # @AuthService.access_token_required
+    def add_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ServerReadDto]:
+        with self._unit_of_work:
+            servers = [self._create(data=item) for item in data]
+            names = [server.name for server in servers]
+            duplicated = {name for name in names if names.count(name) > 1}
+            if duplicated:
+                raise AlreadyExists(
+                    "Servers with names: {names!r} already exist".format(
+                        names=sorted(duplicated)
+                    )
+                )
+            self._repository.add_many(aggregates=servers)
+            self._publish(servers=servers)
+        return [ServerReadDto.from_entity(server=server) for server in servers]
+
+    # @AuthService.access_token_required
+    def upsert_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> None:
+        """Adds the servers, or updates the ones with the same name.
+
+        Idempotent, for the inventory sync jobs. No domain events are
+        published, the added and the updated servers can't be told apart.
+        """
+        with self._unit_of_work:
+            self._repository.upsert_many(
+                aggregates=[self._create(data=item) for item in data]
+            )
+
+    # @AuthService.access_token_required
+    def update_many(
+        self, data: list[dict], access_token: str | None = None
+    ) -> list[ServerReadDto]:
+        with self._unit_of_work:
+            servers = self._find_many_by_id(
+                ids=[item.get("id") for item in data]
+            )
+            servers = [
+                self._update(server=servers[item.get("id")], data=item)
+                for item in data
+            ]
+            self._repository.update_many(aggregates=servers)
+            self._publish(servers=servers)
+        return [ServerReadDto.from_entity(server=server) for server in servers]
+
+    # @AuthService.access_token_required
+    def discard_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        with self._unit_of_work:
+            servers = list(self._find_many_by_id(ids=ids).values())
+            for server in servers:
+                server.discard()
+            self._repository.discard_many(ids=ids)
+            self._publish(servers=servers)
+
+    # @AuthService.access_token_required
+    def delete_many(
+        self, ids: list[str], access_token: str | None = None
+    ) -> None:
+        with self._unit_of_work:
+            self._check_ids(ids=ids)
+            self._repository.delete_many(ids=ids)
+
+    def _create(self, data: dict) -> Server:
+        return Server.create(
             name=data.get("name"),
             cpu=data.get("cpu"),
             ram=data.get("ram"),
@@ -139,26 +308,9 @@ class ServerService:
             credentials=data.get("credentials"),
             applications=data.get("applications"),
         )
-        servers = self._repository.find_many(name="eq:{}".format(server.name))
-        if servers._total > 0:
-            raise AlreadyExists(
-                "Server with name: {name!r} already exists".format(
-                    name=server.name
-                )
-            )
-        self._repository.add_one(aggregate=server)
-        self._message_bus.publish(domain_events=server.domain_events)
-        server.clear_domain_events()
-        return ServerReadDto.from_entity(server=server)
 
-    # @AuthService.access_token_required
-    def update_one(
-        self, id: str, data: dict, access_token: str | None = None
-    ) -> ServerReadDto:
-        server = self._repository.find_one(id=id)
-        if server is None:
-            raise NotFound("Server with id: {id!r} not found".format(id=id))
-        server = server.update(
+    def _update(self, server: Server, data: dict) -> Server:
+        return server.update(
             name=data.get("name"),
             cpu=data.get("cpu"),
             ram=data.get("ram"),
@@ -177,26 +329,43 @@ class ServerService:
             if data.get("status")
             else None,
         )
-        self._repository.update_one(aggregate=server)
-        self._message_bus.publish(domain_events=server.domain_events)
-        server.clear_domain_events()
-        return ServerReadDto.from_entity(server=server)
 
-    # @AuthService.access_token_required
-    def discard_one(self, id: str, access_token: str | None = None) -> None:
-        server = self._repository.find_one(id=id)
-        if server is None:
-            raise NotFound("Server with id: {id!r} not found".format(id=id))
-        server.discard()
-        self._repository.update_one(aggregate=server)
-        self._message_bus.publish(domain_events=server.domain_events)
-        server.clear_domain_events()
+    def _find_many_by_id(self, ids: list[str]) -> dict[str, Server]:
+        servers = {
+            server.id.value: server
+            for server in self._repository.find_many(
+                count="none",
+                include_discarded=True,
+                id="in:{}".format(",".join(ids)),
+            )._items
+        }
+        missing = [id for id in ids if id not in servers]
+        if missing:
+            raise NotFound(
+                "Servers with ids: {ids!r} not found".format(ids=missing)
+            )
+        return servers
 
-    # @AuthService.access_token_required
-    def delete_one(self, id: str, access_token: str | None = None) -> None:
-        server = self._repository.find_one(id=id)
-        if server is None:
-            raise NotFound("Server with id: {id!r} not found".format(id=id))
-        self._repository.delete_one(id=id)
-        self._message_bus.publish(domain_events=server.domain_events)
-        server.clear_domain_events()
+    def _check_ids(self, ids: list[str]) -> None:
+        found = set(
+            self._repository.get_ids(
+                id="in:{}".format(",".join(ids)), include_discarded=True
+            )
+        )
+        missing = [id for id in ids if id not in found]
+        if missing:
+            raise NotFound(
+                "Servers with ids: {ids!r} not found".format(ids=missing)
+            )
+
+    def _publish(self, servers: list[Server]) -> None:
+        """Publishes the domain events of all the servers in one call."""
+        self._message_bus.publish(
+            domain_events=[
+                domain_event
+                for server in servers
+                for domain_event in server.domain_events
+            ]
+        )
+        for server in servers:
+            server.clear_domain_events()
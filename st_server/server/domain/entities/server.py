@@ -179,11 +179,12 @@ class Server(AggregateRoot):
 
     @credentials.setter
     def credentials(self, credentials: list[Credential]) -> None:
+        changes = _changes(old=self._credentials, new=credentials, key="id")
+        if not any(changes.values()):
+            return
         self._check_not_discarded()
         domain_event = Server.CredentialChanged(
-            aggregate_id=self._id.value,
-            old_value=self._credentials,
-            new_value=credentials,
+            aggregate_id=self._id.value, **changes
         )
         self._credentials = credentials
         self.register_domain_event(domain_event=domain_event)
@@ -194,11 +195,14 @@ class Server(AggregateRoot):
 
     @applications.setter
     def applications(self, applications: list[ServerApplication]) -> None:
+        changes = _changes(
+            old=self._applications, new=applications, key="application_id"
+        )
+        if not any(changes.values()):
+            return
         self._check_not_discarded()
         domain_event = Server.ApplicationChanged(
-            aggregate_id=self._id.value,
-            old_value=self._applications,
-            new_value=applications,
+            aggregate_id=self._id.value, **changes
         )
         self._applications = applications
         self.register_domain_event(domain_event=domain_event)
@@ -283,8 +287,18 @@ class Server(AggregateRoot):
             )
             if data.get("operating_system")
             else None,
-            credentials=data.get("credentials"),
-            applications=data.get("applications"),
+            credentials=[
+                Credential.from_dict(data=credential)
+                for credential in data.get("credentials")
+            ]
+            if data.get("credentials") is not None
+            else None,
+            applications=[
+                ServerApplication.from_dict(data=application)
+                for application in data.get("applications")
+            ]
+            if data.get("applications") is not None
+            else None,
             status=ServerStatus.from_string(value=data.get("status"))
             if data.get("status")
             else None,
@@ -359,9 +373,10 @@ class Server(AggregateRoot):
             and not operating_system == self._operating_system
         ):
             self.operating_system = operating_system
-        if credentials is not None and not credentials == self._credentials:
+        # The collections register a domain event only when they change.
+        if credentials is not None:
             self.credentials = credentials
-        if applications is not None and not applications == self._applications:
+        if applications is not None:
             self.applications = applications
         if status is not None and not status == self._status:
             self.status = status
@@ -377,3 +392,39 @@ class Server(AggregateRoot):
         domain_event = Server.Discarded(aggregate_id=self._id.value)
         self._discarded = True
         self.register_domain_event(domain_event=domain_event)
+
+
+def _changes(old: list, new: list, key: str) -> dict:
+    """Returns the members added, removed and modified from old to new.
+
+    The members are matched by `key`. The added members are given whole, the
+    removed ones by key and the modified ones by key and changed fields.
+    """
+    old_members = {member[key]: member for member in _to_dicts(old)}
+    new_members = {member[key]: member for member in _to_dicts(new)}
+    return {
+        "added": [
+            member
+            for value, member in new_members.items()
+            if value not in old_members
+        ],
+        "removed": [
+            value for value in old_members if value not in new_members
+        ],
+        "modified": [
+            {
+                key: value,
+                **{
+                    field: item
+                    for field, item in member.items()
+                    if old_members[value].get(field) != item
+                },
+            }
+            for value, member in new_members.items()
+            if value in old_members and member != old_members[value]
+        ],
+    }
+
+
+def _to_dicts(members: list) -> list[dict]:
+    return [member.to_dict() for member in members]
@@ -0,0 +1,111 @@
+"""Async Application Repository interface."""
+
+from abc import ABCMeta, abstractmethod
+
+from st_server.server.domain.entities.application import Application
+from st_server.shared.domain.repositories.repository_page_dto import (
+    RepositoryPageDto,
+)
+
+
+class AsyncApplicationRepository(metaclass=ABCMeta):
+    """Async Application Repository interface.
+
+    Same contract as `ApplicationRepository`, with awaitable methods.
+    """
+
+    @abstractmethod
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Applications."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> Application | None:
+        """Returns an Application."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Applications as dicts, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> dict | None:
+        """Returns a Application as a dict, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def exists(self, **kwargs) -> bool:
+        """Returns whether a Application matches the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_ids(self, **kwargs) -> list[str]:
+        """Returns the ids of the Applications matching the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_one(self, aggregate: Application) -> None:
+        """Adds an Application, raises `AlreadyExists` on a duplicate."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_one(self, aggregate: Application) -> None:
+        """Updates an Application."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_one(self, id: int) -> None:
+        """Deletes an Application."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_many(self, aggregates: list[Application]) -> None:
+        """Adds many Applications."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert_many(self, aggregates: list[Application]) -> None:
+        """Adds many Applications, or updates the ones already stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_many(self, aggregates: list[Application]) -> None:
+        """Updates many Applications."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def discard_many(self, ids: list[str]) -> None:
+        """Discards many Applications."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_many(self, ids: list[str]) -> None:
+        """Deletes many Applications."""
+        raise NotImplementedError
@@ -0,0 +1,111 @@
+"""Async Credential Repository interface."""
+
+from abc import ABCMeta, abstractmethod
+
+from st_server.server.domain.entities.credential import Credential
+from st_server.shared.domain.repositories.repository_page_dto import (
+    RepositoryPageDto,
+)
+
+
+class AsyncCredentialRepository(metaclass=ABCMeta):
+    """Async Credential Repository interface.
+
+    Same contract as `CredentialRepository`, with awaitable methods.
+    """
+
+    @abstractmethod
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> Credential | None:
+        """Returns a Credential."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Credentials as dicts, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> dict | None:
+        """Returns a Credential as a dict, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def exists(self, **kwargs) -> bool:
+        """Returns whether a Credential matches the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_ids(self, **kwargs) -> list[str]:
+        """Returns the ids of the Credentials matching the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_one(self, aggregate: Credential) -> None:
+        """Adds an Credential, raises `AlreadyExists` on a duplicate."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_one(self, aggregate: Credential) -> None:
+        """Updates a Credential."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_one(self, id: int) -> None:
+        """Deletes a Credential."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_many(self, aggregates: list[Credential]) -> None:
+        """Adds many Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert_many(self, aggregates: list[Credential]) -> None:
+        """Adds many Credentials, or updates the ones already stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_many(self, aggregates: list[Credential]) -> None:
+        """Updates many Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def discard_many(self, ids: list[str]) -> None:
+        """Discards many Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_many(self, ids: list[str]) -> None:
+        """Deletes many Credentials."""
+        raise NotImplementedError
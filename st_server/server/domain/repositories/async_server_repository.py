@@ -0,0 +1,111 @@
+"""Async Server Repository interface."""
+
+from abc import ABCMeta, abstractmethod
+
+from st_server.server.domain.entities.server import Server
+from st_server.shared.domain.repositories.repository_page_dto import (
+    RepositoryPageDto,
+)
+
+
+class AsyncServerRepository(metaclass=ABCMeta):
+    """Async Server Repository interface.
+
+    Same contract as `ServerRepository`, with awaitable methods.
+    """
+
+    @abstractmethod
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Servers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> Server | None:
+        """Returns a Server."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Servers as dicts, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> dict | None:
+        """Returns a Server as a dict, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def exists(self, **kwargs) -> bool:
+        """Returns whether a Server matches the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_ids(self, **kwargs) -> list[str]:
+        """Returns the ids of the Servers matching the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_one(self, aggregate: Server) -> None:
+        """Adds a Server, raises `AlreadyExists` on a duplicate."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_one(self, aggregate: Server) -> None:
+        """Updates a Server."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_one(self, id: int) -> None:
+        """Deletes a Server."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_many(self, aggregates: list[Server]) -> None:
+        """Adds many Servers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert_many(self, aggregates: list[Server]) -> None:
+        """Adds many Servers, or updates the ones already stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_many(self, aggregates: list[Server]) -> None:
+        """Updates many Servers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def discard_many(self, ids: list[str]) -> None:
+        """Discards many Servers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_many(self, ids: list[str]) -> None:
+        """Deletes many Servers."""
+        raise NotImplementedError
@@ -1,23 +1,13 @@
 """Credential Repository interface."""
 
 from abc import ABCMeta, abstractmethod
+from collections.abc import Iterator
 
 from st_server.server.domain.entities.credential import Credential
 from st_server.shared.domain.repositories.repository_page_dto import (
     RepositoryPageDto,
 )
 
-FILTER_OPERATOR_MAPPER = {
-    "eq": lambda m, k, v: getattr(m, k) == v,
-    "gt": lambda m, k, v: getattr(m, k) > v,
-    "ge": lambda m, k, v: getattr(m, k) >= v,
-    "lt": lambda m, k, v: getattr(m, k) < v,
-    "le": lambda m, k, v: getattr(m, k) <= v,
-    "in": lambda m, k, v: getattr(m, k).in_(v.split(",")),
-    "btw": lambda m, k, v: getattr(m, k).between(*v.split(",")),
-    "lk": lambda m, k, v: getattr(m, k).ilike(f"%{v}%"),
-}
-
 
 class CredentialRepository(metaclass=ABCMeta):
     """Credential Repository interface.
@@ -36,7 +26,8 @@ class CredentialRepository(metaclass=ABCMeta):
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
@@ -49,6 +40,13 @@ class CredentialRepository(metaclass=ABCMeta):
 
         Example: `["name:asc", "age:desc"]`
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. When provided, the page
+    starts right after the row the cursor points to and the offset is ignored.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates: `exact`, `estimated` or `none`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
@@ -60,8 +58,10 @@ class CredentialRepository(metaclass=ABCMeta):
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         **kwargs,
     ) -> RepositoryPageDto:
         """Returns a list of Credentials."""
@@ -76,9 +76,64 @@ class CredentialRepository(metaclass=ABCMeta):
         """Returns an Credential."""
         raise NotImplementedError
 
+    @abstractmethod
+    def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        """Returns a list of Credentials as dicts, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_one(
+        self,
+        id: int,
+        fields: list[str] | None = None,
+    ) -> dict | None:
+        """Returns a Credential as a dict, for the read-only queries."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, **kwargs) -> bool:
+        """Returns whether a Credential matches the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_ids(self, **kwargs) -> list[str]:
+        """Returns the ids of the Credentials matching the filters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[Credential]:
+        """Yields all the Credentials, fetched in chunks."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_iter(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """Yields all the Credentials as dicts, for the read-only queries."""
+        raise NotImplementedError
+
     @abstractmethod
     def add_one(self, aggregate: Credential) -> None:
-        """Adds an Credential."""
+        """Adds an Credential, raises `AlreadyExists` on a duplicate."""
         raise NotImplementedError
 
     @abstractmethod
@@ -90,3 +145,28 @@ class CredentialRepository(metaclass=ABCMeta):
     def delete_one(self, id: int) -> None:
         """Deletes an Credential."""
         raise NotImplementedError
+
+    @abstractmethod
+    def add_many(self, aggregates: list[Credential]) -> None:
+        """Adds many Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_many(self, aggregates: list[Credential]) -> None:
+        """Adds many Credentials, or updates the ones already stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_many(self, aggregates: list[Credential]) -> None:
+        """Updates many Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def discard_many(self, ids: list[str]) -> None:
+        """Discards many Credentials."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_many(self, ids: list[str]) -> None:
+        """Deletes many Credentials."""
+        raise NotImplementedError
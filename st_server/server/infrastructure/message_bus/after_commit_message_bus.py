@@ -0,0 +1,35 @@
+"""After commit message bus implementation."""
+
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+    UnitOfWorkImpl,
+)
+from st_server.shared.domain.value_objects.domain_event import DomainEvent
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+
+class AfterCommitMessageBus(MessageBus):
+    """After commit message bus implementation.
+
+    The domain events are published to `message_bus` once the unit of work
+    commits the transaction of their aggregates. The domain events of a
+    rolled back unit of work are never published.
+
+    The domain events are published within a `with` block of the unit of
+    work.
+    """
+
+    def __init__(
+        self,
+        message_bus: MessageBus,
+        unit_of_work: UnitOfWorkImpl | AsyncUnitOfWorkImpl,
+    ) -> None:
+        self._message_bus = message_bus
+        self._unit_of_work = unit_of_work
+
+    def publish(self, domain_events: list[DomainEvent]) -> None:
+        # The aggregates clear their list of domain events once published.
+        domain_events = list(domain_events)
+        self._unit_of_work.after_commit(
+            lambda: self._message_bus.publish(domain_events=domain_events)
+        )
@@ -0,0 +1,207 @@
+"""Background message bus implementation."""
+
+import json
+import logging
+import os
+import queue
+import threading
+
+from st_server.server.infrastructure.message_bus import config
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    RabbitMQMessageBus,
+    message,
+)
+from st_server.shared.domain.value_objects.domain_event import DomainEvent
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "spill")
+
+
+class BackgroundMessageBus(MessageBus):
+    """Background message bus implementation.
+
+    The domain events are encoded and put in a bounded queue, a worker
+    thread publishes them to the broker in batches. Publishing only waits on
+    the broker when the queue is full and the policy is `block`:
+
+        block: waits for room in the queue.
+        drop_oldest: drops the oldest message of the queue.
+        spill: appends the message to the `spill_path` file, the worker
+            publishes the spilled messages once the queue is drained.
+
+    The batches failing to publish are spilled with `spill`, dropped
+    otherwise. The order of the messages is kept, except for the spilled
+    ones. `close` publishes what is left before returning.
+
+    The domain events are published whether or not the transaction of
+    their aggregates commits, wrap the bus in an `AfterCommitMessageBus` to
+    only publish the committed ones. Unlike the outbox, the queued messages
+    are lost if the process dies.
+    """
+
+    def __init__(
+        self,
+        message_bus: RabbitMQMessageBus,
+        maxsize: int = 10000,
+        policy: str = "block",
+        spill_path: str | None = None,
+        batch_size: int = 100,
+    ) -> None:
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(
+                "Backpressure policy must be one of: {}".format(
+                    ", ".join(BACKPRESSURE_POLICIES)
+                )
+            )
+        if policy == "spill" and not spill_path:
+            raise ValueError("The spill policy needs a spill path")
+        self._message_bus = message_bus
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._policy = policy
+        self._spill_path = spill_path
+        self._spill_lock = threading.Lock()
+        # Set while the spill file may hold messages, the file of a previous
+        # process included, so an idle worker doesn't open it.
+        self._spilled = threading.Event()
+        if spill_path and os.path.exists(spill_path):
+            self._spilled.set()
+        self._batch_size = batch_size
+        self._closed = threading.Event()
+        # Updated from the publishing threads and the worker.
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0
+        self._worker = threading.Thread(
+            target=self._run, name="message-bus", daemon=True
+        )
+        self._worker.start()
+
+    def publish(self, domain_events: list[DomainEvent]) -> None:
+        if self._closed.is_set():
+            raise RuntimeError("The message bus is closed")
+        for domain_event in domain_events:
+            self._put(message(domain_event))
+
+    def close(self, timeout: float | None = None) -> None:
+        """Publishes the queued messages and stops the worker."""
+        self._closed.set()
+        self._worker.join(timeout)
+
+    def _put(self, item: tuple[str, str, dict]) -> None:
+        if self._policy == "block":
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self._policy == "spill":
+                self._spill([item])
+                return
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self._drop(1)
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    continue
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._send(batch)
+            if not self._queue.empty():
+                continue
+            closed = self._closed.is_set()
+            self._send(self._unspill())
+            if closed:
+                # What can't be published is left in the spill file, for
+                # the next process.
+                return
+
+    def _send(self, batch: list[tuple[str, str, dict]]) -> None:
+        if not batch:
+            return
+        try:
+            self._message_bus.publish_messages(messages=batch)
+        except Exception:
+            if self._policy == "spill":
+                logger.exception("Spilling %d messages", len(batch))
+                self._spill(batch)
+                # Retried once the queue is drained, after a pause.
+                self._closed.wait(1.0)
+            else:
+                logger.exception("Dropping %d messages", len(batch))
+                self._drop(len(batch))
+
+    def _drop(self, count: int) -> None:
+        with self._dropped_lock:
+            self.dropped += count
+
+    def _spill(self, messages: list[tuple[str, str, dict]]) -> None:
+        with self._spill_lock:
+            with open(self._spill_path, "a") as file:
+                for item in messages:
+                    file.write(json.dumps(item))
+                    file.write("\n")
+            self._spilled.set()
+
+    def _unspill(self) -> list[tuple[str, str, dict]]:
+        if not self._spilled.is_set():
+            return []
+        with self._spill_lock:
+            self._spilled.clear()
+            try:
+                with open(self._spill_path) as file:
+                    messages = [tuple(json.loads(line)) for line in file]
+            except FileNotFoundError:
+                return []
+            os.remove(self._spill_path)
+        return messages
+
+
+_background_message_bus = None
+_background_message_bus_lock = threading.Lock()
+
+
+def background_message_bus() -> BackgroundMessageBus:
+    """Returns the background message bus of the process."""
+    global _background_message_bus
+    with _background_message_bus_lock:
+        if _background_message_bus is None:
+            _background_message_bus = BackgroundMessageBus(
+                message_bus=RabbitMQMessageBus(
+                    host=config.broker_host,
+                    port=config.broker_port,
+                    username=config.broker_username,
+                    password=config.broker_password,
+                    batch_size=config.message_bus_batch_size,
+                    content_type=config.message_bus_content_type,
+                ),
+                maxsize=config.message_bus_queue_size,
+                policy=config.message_bus_backpressure,
+                spill_path=config.message_bus_spill_path,
+                batch_size=config.message_bus_batch_size,
+            )
+        return _background_message_bus
+
+
+def close_background_message_bus() -> None:
+    """Flushes and closes the background message bus, if it was started."""
+    global _background_message_bus
+    with _background_message_bus_lock:
+        if _background_message_bus is not None:
+            _background_message_bus.close()
+            _background_message_bus = None
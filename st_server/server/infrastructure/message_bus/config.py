@@ -0,0 +1,29 @@
+"""Message bus configuration."""
+
+import configparser
+
+config = configparser.ConfigParser()
+config.read("st_server/config.ini")
+
+broker_host = config.get("message_bus", "host")
+broker_port = config.getint("message_bus", "port")
+broker_username = config.get("message_bus", "username")
+broker_password = config.get("message_bus", "password")
+# The relay reads the outbox in batches of `batch_size` messages, confirmed
+# by the broker at once, a batch is relayed every `flush_interval` seconds
+# when the outbox is drained.
+message_bus_batch_size = config.getint("message_bus", "batch_size")
+message_bus_flush_interval = config.getfloat("message_bus", "flush_interval")
+# The relay deletes the messages sent more than `outbox_retention_days` ago.
+message_bus_outbox_retention_days = config.getfloat(
+    "message_bus", "outbox_retention_days"
+)
+# `application/json` or `application/msgpack`.
+message_bus_content_type = config.get("message_bus", "content_type")
+# `outbox` writes the domain events in the transaction of their aggregates,
+# `background` publishes them from a worker thread of the API process, once
+# their transaction commits.
+message_bus_publisher = config.get("message_bus", "publisher")
+message_bus_queue_size = config.getint("message_bus", "queue_size")
+message_bus_backpressure = config.get("message_bus", "backpressure")
+message_bus_spill_path = config.get("message_bus", "spill_path")
@@ -0,0 +1,72 @@
+"""Encodes the domain events as broker messages."""
+
+import functools
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CONTENT_TYPES = (JSON, MSGPACK)
+# Version of the message body, sent in the `version` header. Bump it when
+# the body of the domain events changes.
+MESSAGE_VERSION = 2
+
+
+@functools.cache
+def routing(event_class: type) -> tuple[str, str]:
+    """Returns the exchange and the routing key of the domain event class.
+
+    Computed once per class.
+    """
+    aggregate, event = event_class.__qualname__.split(".")
+    event = event.lower()
+    if event.endswith("changed"):
+        return aggregate.lower(), "{}.changed".format(event[:-7])
+    return aggregate.lower(), event
+
+
+def primitive(value: object) -> object:
+    """Returns the value as JSON types, the nested entities as dicts."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {key: primitive(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [primitive(item) for item in value]
+    if hasattr(value, "to_dict"):
+        return primitive(value.to_dict())
+    # The value objects expose their fields through a `__dict__` property.
+    if isinstance(getattr(value, "__dict__", None), dict):
+        return primitive(value.__dict__)
+    return str(value)
+
+
+def check_content_type(content_type: str) -> None:
+    """Raises if the content type can't be encoded."""
+    if content_type not in CONTENT_TYPES:
+        raise ValueError(
+            "Content type must be one of: {}".format(", ".join(CONTENT_TYPES))
+        )
+    if content_type == MSGPACK and msgpack is None:
+        raise ValueError(
+            "The {} content type needs the msgpack package".format(MSGPACK)
+        )
+
+
+def encode(body: dict | str, content_type: str) -> str | bytes:
+    """Returns the body of a message in the content type.
+
+    The body is the primitive dict of a domain event, or its JSON text when
+    read back from the outbox.
+    """
+    if content_type == MSGPACK:
+        if isinstance(body, str):
+            body = json.loads(body)
+        return msgpack.packb(body)
+    if isinstance(body, str):
+        return body
+    return json.dumps(body)
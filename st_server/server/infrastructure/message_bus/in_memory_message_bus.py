@@ -1,31 +1,208 @@
 """In memory message bus implementation."""
 
+import asyncio
+import inspect
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
 from st_server.shared.domain.value_objects.domain_event import DomainEvent
 from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
 
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("inline", "thread", "asyncio")
+
+
+@dataclass
+class HandlerStats:
+    """Calls, errors and seconds spent in a handler."""
+
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
 
 class InMemoryMessageBus(MessageBus):
     """In memory message bus implementation.
 
-    The in memory message bus is a singleton.
-    """
+    A handler subscribes to a domain event class and gets the domain events
+    of its subclasses too, to all the domain events of an aggregate with
+    `"<aggregate>.*"`, e.g. `"server.*"`, or to all of them with `"*"`. The
+    handlers of a domain event class are looked up once, on the first
+    publish after a subscription.
+
+    The handlers run on the `executor`:
 
-    _instance = None
+        inline: on the publishing thread, the errors are raised.
+        thread: on `workers` threads, the domain events of an aggregate
+            always on the same one.
+        asyncio: as tasks of `loop`, the coroutine handlers are awaited.
+
+    Either way, the domain events of an aggregate are handled in the order
+    they were published, one at a time. Out of the publishing thread, the
+    errors of the handlers are logged.
+    """
 
-    def __new__(cls) -> "InMemoryMessageBus":
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._handlers = {}
-        return cls._instance
+    def __init__(
+        self,
+        executor: str = "inline",
+        workers: int = 4,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(
+                "Executor must be one of: {}".format(", ".join(EXECUTORS))
+            )
+        if executor == "asyncio" and loop is None:
+            raise ValueError("The asyncio executor needs a loop")
+        self._executor = executor
+        self._handlers = {}
+        self._dispatch = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._workers = (
+            [
+                ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="message-bus"
+                )
+                for _ in range(workers)
+            ]
+            if executor == "thread"
+            else []
+        )
+        self._loop = loop
+        # The last task of each aggregate, only used from the loop.
+        self._tails = {}
 
-    def subscribe(self, domain_event: DomainEvent, handler: callable) -> None:
-        if domain_event not in self._handlers:
-            self._handlers[domain_event] = []
-        self._handlers[domain_event].append(handler)
+    def subscribe(
+        self, domain_event: type[DomainEvent] | str, handler: callable
+    ) -> None:
+        with self._lock:
+            self._handlers.setdefault(domain_event, []).append(handler)
+            self._stats.setdefault(handler, HandlerStats())
+            self._dispatch = {}
 
     def publish(self, domain_events: list[DomainEvent]) -> None:
         for domain_event in domain_events:
-            handlers = self._handlers.get(type(domain_event))
-            if handlers:
-                for handler in handlers:
-                    handler(domain_event)
+            handlers = self._handlers_of(type(domain_event))
+            if not handlers:
+                continue
+            if self._executor == "inline":
+                self._handle(domain_event, handlers, raise_errors=True)
+            elif self._executor == "thread":
+                self._worker(domain_event).submit(
+                    self._handle, domain_event, handlers
+                )
+            else:
+                self._loop.call_soon_threadsafe(
+                    self._schedule, domain_event, handlers
+                )
+
+    def stats(self) -> dict[callable, HandlerStats]:
+        """Returns the stats of each handler."""
+        with self._lock:
+            return {
+                handler: replace(stats)
+                for handler, stats in self._stats.items()
+            }
+
+    def close(self) -> None:
+        """Waits for the handlers running on threads."""
+        for worker in self._workers:
+            worker.shutdown(wait=True)
+
+    async def aclose(self) -> None:
+        """Waits for the handlers running as tasks, from the loop."""
+        # Lets the domain events published so far be scheduled.
+        await asyncio.sleep(0)
+        while self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+    def _handlers_of(self, event_class: type) -> tuple:
+        handlers = self._dispatch.get(event_class)
+        if handlers is None:
+            with self._lock:
+                aggregate = event_class.__qualname__.rpartition(".")[0]
+                keys = [
+                    cls
+                    for cls in event_class.__mro__
+                    if issubclass(cls, DomainEvent)
+                ]
+                keys += ["{}.*".format(aggregate.lower()), "*"]
+                handlers = tuple(
+                    dict.fromkeys(
+                        handler
+                        for key in keys
+                        for handler in self._handlers.get(key, ())
+                    )
+                )
+                self._dispatch[event_class] = handlers
+        return handlers
+
+    def _worker(self, domain_event: DomainEvent) -> ThreadPoolExecutor:
+        key = str(getattr(domain_event, "aggregate_id", None)).encode()
+        return self._workers[zlib.crc32(key) % len(self._workers)]
+
+    def _handle(
+        self,
+        domain_event: DomainEvent,
+        handlers: tuple,
+        raise_errors: bool = False,
+    ) -> None:
+        for handler in handlers:
+            start = time.perf_counter()
+            try:
+                handler(domain_event)
+            except Exception:
+                self._record(handler, start, error=True)
+                if raise_errors:
+                    raise
+                logger.exception("Handler %r failed", handler)
+            else:
+                self._record(handler, start)
+
+    def _schedule(self, domain_event: DomainEvent, handlers: tuple) -> None:
+        key = getattr(domain_event, "aggregate_id", None)
+        task = self._loop.create_task(
+            self._ahandle(domain_event, handlers, self._tails.get(key))
+        )
+        self._tails[key] = task
+        task.add_done_callback(
+            lambda task: self._tails.get(key) is task and self._tails.pop(key)
+        )
+
+    async def _ahandle(
+        self,
+        domain_event: DomainEvent,
+        handlers: tuple,
+        previous: asyncio.Task | None,
+    ) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        for handler in handlers:
+            start = time.perf_counter()
+            try:
+                result = handler(domain_event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                self._record(handler, start, error=True)
+                logger.exception("Handler %r failed", handler)
+            else:
+                self._record(handler, start)
+
+    def _record(
+        self, handler: callable, start: float, error: bool = False
+    ) -> None:
+        seconds = time.perf_counter() - start
+        with self._lock:
+            stats = self._stats[handler]
+            stats.calls += 1
+            stats.errors += error
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
@@ -0,0 +1,27 @@
+"""Outbox message bus implementation."""
+
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+    UnitOfWorkImpl,
+)
+from st_server.shared.domain.value_objects.domain_event import DomainEvent
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+
+class OutboxMessageBus(MessageBus):
+    """Outbox message bus implementation.
+
+    The domain events are written to the `outbox` table by the unit of work,
+    in the transaction of their aggregates, and the outbox relay publishes
+    them to the broker. Publishing never waits on the broker and the events
+    of a committed transaction aren't lost when the broker is down.
+
+    The domain events are published within a `with` block of the unit of
+    work.
+    """
+
+    def __init__(self, unit_of_work: UnitOfWorkImpl | AsyncUnitOfWorkImpl):
+        self._unit_of_work = unit_of_work
+
+    def publish(self, domain_events: list[DomainEvent]) -> None:
+        self._unit_of_work.add_events(domain_events)
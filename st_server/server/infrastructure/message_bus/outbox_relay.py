@@ -0,0 +1,134 @@
+"""Relays the messages of the outbox to the broker."""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    RabbitMQMessageBus,
+)
+from st_server.server.infrastructure.mysql.models.outbox import OutboxDbModel
+from st_server.shared.helper.time import now
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two prunes of the sent messages.
+PRUNE_INTERVAL = 60.0
+
+
+class OutboxRelay:
+    """Publishes the messages of the outbox to the broker, in batches.
+
+    Each batch reads the oldest messages not sent yet, publishes them in the
+    order they were written and marks them as sent, in one transaction. The
+    rows are locked with `SKIP LOCKED`, so several relays can run side by
+    side without publishing a message twice.
+
+    The delivery is at least once: a message published right before the
+    relay fails is published again by the next batch.
+
+    With `retention`, the messages sent longer ago are deleted.
+    """
+
+    def __init__(
+        self,
+        session_factory: callable,
+        message_bus: RabbitMQMessageBus,
+        batch_size: int = 100,
+        interval: float = 1.0,
+        max_backoff: float = 60.0,
+        retention: timedelta | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._message_bus = message_bus
+        self._batch_size = batch_size
+        self._interval = interval
+        self._max_backoff = max_backoff
+        self._retention = retention
+
+    def relay(self) -> int:
+        """Relays one batch and returns the number of messages sent."""
+        with self._session_factory() as session:
+            messages = self._unsent(session)
+            if not messages:
+                return 0
+            self._message_bus.publish_messages(
+                messages=[
+                    (message.exchange, message.routing_key, message.body)
+                    for message in messages
+                ]
+            )
+            session.execute(
+                update(OutboxDbModel)
+                .where(OutboxDbModel.id.in_([m.id for m in messages]))
+                .values(sent_on=now())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return len(messages)
+
+    def prune(self) -> int:
+        """Deletes the messages sent before the retention, returns how many."""
+        if self._retention is None:
+            return 0
+        with self._session_factory() as session:
+            result = session.execute(
+                delete(OutboxDbModel)
+                .where(OutboxDbModel.sent_on < now() - self._retention)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Relays the batches until `stop` is set.
+
+        The full batches are relayed back to back, the relay waits
+        `interval` seconds once the outbox is drained, and prunes it at most
+        every `PRUNE_INTERVAL` seconds. A failing batch is logged and
+        relayed again after a backoff, doubled on each failure in a row up
+        to `max_backoff` seconds.
+        """
+        stop = stop or threading.Event()
+        failures = 0
+        pruned_on = None
+        while not stop.is_set():
+            try:
+                drained = self.relay() < self._batch_size
+                if drained and (
+                    pruned_on is None
+                    or time.monotonic() - pruned_on >= PRUNE_INTERVAL
+                ):
+                    self.prune()
+                    pruned_on = time.monotonic()
+            except Exception:
+                failures += 1
+                backoff = min(
+                    self._interval * 2**failures, self._max_backoff
+                )
+                logger.exception(
+                    "Relaying the outbox failed, retrying in %.1f seconds",
+                    backoff,
+                )
+                stop.wait(backoff)
+                continue
+            failures = 0
+            if drained:
+                stop.wait(self._interval)
+
+    def _unsent(self, session: Session) -> list[OutboxDbModel]:
+        return (
+            session.execute(
+                select(OutboxDbModel)
+                .where(OutboxDbModel.sent_on.is_(None))
+                .order_by(OutboxDbModel.id)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
@@ -0,0 +1,144 @@
+"""Pool of RabbitMQ connections shared by the process."""
+
+import queue
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pika
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
+
+# Errors after which a connection is dropped and opened again.
+CONNECTION_ERRORS = (AMQPConnectionError, AMQPChannelError)
+
+
+class RabbitMQConnectionPool:
+    """Pool of RabbitMQ connections, each with its channel.
+
+    A blocking connection can't be used by two threads at once, so each
+    thread acquires a connection of its own and gives it back afterwards.
+    At most `size` connections are opened, the threads wait for one when
+    they are all in use.
+
+    The connections are opened on first use. The heartbeats of an idle
+    connection are processed when it is acquired again, and a connection
+    closed by the broker, or whose use raised a connection error, is
+    opened again.
+
+    With `transactional`, the channels are in transaction mode: what is
+    published on them is only routed once `tx_commit` returns. When the use
+    of a channel raises, what it published is rolled back before the
+    connection goes back to the pool.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        virtual_host: str = "support",
+        size: int = 4,
+        heartbeat: int = 60,
+        transactional: bool = False,
+    ) -> None:
+        self._parameters = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            credentials=pika.PlainCredentials(username, password),
+            virtual_host=virtual_host,
+            heartbeat=heartbeat,
+        )
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._transactional = transactional
+
+    @contextmanager
+    def channel(self) -> Iterator[BlockingChannel]:
+        """Yields the channel of a pooled connection."""
+        with self._slots:
+            connection, channel = self._acquire()
+            broken = True
+            try:
+                yield channel
+                broken = False
+            except CONNECTION_ERRORS:
+                raise
+            except Exception:
+                broken = not self._reset(channel)
+                raise
+            finally:
+                if broken:
+                    _close(connection)
+                else:
+                    self._idle.put((connection, channel))
+
+    def close(self) -> None:
+        """Closes the idle connections."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close(connection)
+
+    def _acquire(self) -> tuple:
+        try:
+            connection, channel = self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+        try:
+            connection.process_data_events(time_limit=0)
+        except CONNECTION_ERRORS:
+            _close(connection)
+            return self._open()
+        if connection.is_closed or not channel.is_open:
+            _close(connection)
+            return self._open()
+        return connection, channel
+
+    def _reset(self, channel: BlockingChannel) -> bool:
+        """Returns whether the channel can be used again after an error."""
+        if not channel.is_open:
+            return False
+        if self._transactional:
+            try:
+                channel.tx_rollback()
+            except CONNECTION_ERRORS:
+                return False
+        return True
+
+    def _open(self) -> tuple:
+        connection = pika.BlockingConnection(self._parameters)
+        channel = connection.channel()
+        if self._transactional:
+            channel.tx_select()
+        return connection, channel
+
+
+@lru_cache(maxsize=None)
+def connection_pool(
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    transactional: bool = False,
+) -> RabbitMQConnectionPool:
+    """Returns the connection pool of the process for the broker."""
+    return RabbitMQConnectionPool(
+        host=host,
+        port=port,
+        username=username,
+        password=password,
+        transactional=transactional,
+    )
+
+
+def _close(connection) -> None:
+    try:
+        if not connection.is_closed:
+            connection.close()
+    except CONNECTION_ERRORS:
+        pass
@@ -1,9 +1,19 @@
 """RabbitMQ message bus implementation."""
 
-import json
-
 import pika
 
+from st_server.server.infrastructure.message_bus.encoding import (
+    JSON,
+    MESSAGE_VERSION,
+    check_content_type,
+    encode,
+    primitive,
+    routing,
+)
+from st_server.server.infrastructure.message_bus.rabbitmq_connection_pool import (
+    CONNECTION_ERRORS,
+    connection_pool,
+)
 from st_server.shared.domain.value_objects.domain_event import DomainEvent
 from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
 
@@ -29,32 +39,86 @@ class RabbitMQMessageBus(MessageBus):
             "old_value": "John",
             "new_value": "Johny"
         }
+
+    The connections are taken from the pool of the process and only when
+    publishing.
+
+    Without `batch_size`, the messages are sent without any confirmation.
+    With it, the messages of a call are pipelined in batches of `batch_size`
+    and the broker confirms each batch once: the batch is published in a
+    transaction, `tx_commit` returns when the broker routed all of it. A
+    batch interrupted by a connection error is published again on a new
+    connection, so its messages can be delivered twice.
+
+    The bodies are kept as primitive dicts, or JSON text, and sent in the
+    `content_type`, JSON or msgpack, with the version of the body in the
+    `version` header.
     """
 
     def __init__(
-        self, host: str, port: int, username: str, password: str
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        batch_size: int | None = None,
+        content_type: str = JSON,
     ) -> None:
-        self._connection = pika.BlockingConnection(
-            pika.ConnectionParameters(
-                host=host,
-                port=port,
-                credentials=pika.PlainCredentials(username, password),
-                virtual_host="support",
-            )
+        check_content_type(content_type)
+        self._pool = connection_pool(
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            transactional=batch_size is not None,
+        )
+        self._batch_size = batch_size
+        self._content_type = content_type
+        self._properties = pika.BasicProperties(
+            content_type=content_type, headers={"version": MESSAGE_VERSION}
         )
-        self._channel = self._connection.channel()
 
     def publish(self, domain_events: list[DomainEvent]) -> None:
-        for domain_event in domain_events:
-            aggregate, event = domain_event.__class__.__qualname__.split(".")
-            routing_key = (
-                ".".join([event.lower()[:-7], event.lower()[-7:]])
-                if "Changed" in event
-                else event.lower()
-            )
-            self._channel.basic_publish(
-                exchange=aggregate.lower(),
-                routing_key=routing_key,
-                body=json.dumps(domain_event.__dict__, default=str),
-            )
-        self._connection.close()
+        self.publish_messages(
+            messages=[message(domain_event) for domain_event in domain_events]
+        )
+
+    def publish_messages(
+        self, messages: list[tuple[str, str, dict | str]]
+    ) -> None:
+        """Publishes the (exchange, routing key, body) messages."""
+        if not messages:
+            return
+        size = self._batch_size or len(messages)
+        for start in range(0, len(messages), size):
+            batch = messages[start : start + size]
+            try:
+                self._publish(batch)
+            except CONNECTION_ERRORS:
+                self._publish(batch)
+
+    def declare_exchanges(self, exchanges: list[str]) -> None:
+        """Declares the durable topic exchanges, once at startup."""
+        with self._pool.channel() as channel:
+            for exchange in exchanges:
+                channel.exchange_declare(
+                    exchange=exchange, exchange_type="topic", durable=True
+                )
+
+    def _publish(self, messages: list[tuple[str, str, dict | str]]) -> None:
+        with self._pool.channel() as channel:
+            for exchange, routing_key, body in messages:
+                channel.basic_publish(
+                    exchange=exchange,
+                    routing_key=routing_key,
+                    body=encode(body, content_type=self._content_type),
+                    properties=self._properties,
+                )
+            if self._batch_size:
+                channel.tx_commit()
+
+
+def message(domain_event: DomainEvent) -> tuple[str, str, dict]:
+    """Returns the exchange, routing key and body of the domain event."""
+    exchange, routing_key = routing(type(domain_event))
+    return exchange, routing_key, primitive(domain_event.__dict__)
@@ -3,8 +3,14 @@
 import configparser
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from st_server.server.infrastructure.mysql.replica import (
+    ReplicaRouter,
+    RoutingSession,
+)
+
 config = configparser.ConfigParser()
 config.read("st_server/config.ini")
 
@@ -17,6 +23,16 @@ db_pool_size = config.getint("database", "pool_size")
 db_pool_pre_ping = config.getboolean("database", "pool_pre_ping")
 db_auto_commit = config.getboolean("database", "autocommit")
 db_verbose = config.getboolean("database", "verbose")
+db_batch_size = config.getint("database", "batch_size")
+db_async = config.getboolean("database", "async")
+# Comma separated `host:port` of the read replicas.
+db_replicas = [
+    replica.strip().split(":")
+    for replica in config.get("database", "replicas").split(",")
+    if replica.strip()
+]
+db_replica_max_lag = config.getfloat("database", "replica_max_lag")
+db_read_your_writes = config.getfloat("database", "read_your_writes")
 
 Base = declarative_base()
 
@@ -31,4 +47,67 @@ engine = create_engine(
     echo=db_verbose,
 )
 
-SessionLocal = sessionmaker(bind=engine, autocommit=db_auto_commit)
+replica_engines = [
+    create_engine(
+        "mysql+pymysql://{0}:{1}@{2}:{3}/{4}".format(
+            db_user, db_pass, host, port, db_name
+        ),
+        pool_size=db_pool_size,
+        pool_pre_ping=db_pool_pre_ping,
+        echo=db_verbose,
+    )
+    for host, port in db_replicas
+]
+
+SessionLocal = sessionmaker(
+    bind=engine,
+    autocommit=db_auto_commit,
+    class_=RoutingSession,
+    router=ReplicaRouter(
+        replicas=replica_engines,
+        max_lag=db_replica_max_lag,
+        read_your_writes=db_read_your_writes,
+    ),
+)
+
+# The async engine is only created when enabled, so the async driver is
+# only required by the deployments using it.
+async_database_uri = "mysql+aiomysql://{0}:{1}@{2}:{3}/{4}".format(
+    db_user, db_pass, db_host, db_port, db_name
+)
+
+async_engine = (
+    create_async_engine(
+        async_database_uri,
+        pool_size=db_pool_size,
+        pool_pre_ping=db_pool_pre_ping,
+        echo=db_verbose,
+    )
+    if db_async
+    else None
+)
+
+async_replica_engines = [
+    create_async_engine(
+        "mysql+aiomysql://{0}:{1}@{2}:{3}/{4}".format(
+            db_user, db_pass, host, port, db_name
+        ),
+        pool_size=db_pool_size,
+        pool_pre_ping=db_pool_pre_ping,
+        echo=db_verbose,
+    )
+    for host, port in (db_replicas if db_async else [])
+]
+
+# The routing session runs inside the async session, so it routes to the
+# sync facade of the async engines.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    router=ReplicaRouter(
+        replicas=[replica.sync_engine for replica in async_replica_engines],
+        max_lag=db_replica_max_lag,
+        read_your_writes=db_read_your_writes,
+    ),
+)
@@ -10,6 +10,16 @@ class ApplicationDbModel(db.Base):
 
     __tablename__ = "application"
 
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "name",
+            "version",
+            "architect",
+            name="uq_application_name_version_architect",
+        ),
+        sa.Index("ix_application_discarded", "discarded"),
+    )
+
     id = sa.Column(
         sa.String(32), primary_key=True, unique=True, nullable=False
     )
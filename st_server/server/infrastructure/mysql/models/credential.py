@@ -10,6 +10,16 @@ class CredentialDbModel(db.Base):
 
     __tablename__ = "credential"
 
+    # The unique index leads with `server_id`, so it also serves the foreign
+    # key and the lookups of the credentials of a server. The index on
+    # `discarded` serves the live rows in the default `id` order.
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "server_id", "username", name="uq_credential_server_id_username"
+        ),
+        sa.Index("ix_credential_discarded", "discarded"),
+    )
+
     id = sa.Column(sa.String(32), primary_key=True)
     server_id = sa.Column(sa.ForeignKey("server.id"), nullable=False)
     connection_type = sa.Column(sa.String(255), nullable=False)
@@ -0,0 +1,42 @@
+"""Outbox database model."""
+
+import sqlalchemy as sa
+
+from st_server.server.infrastructure.mysql import db
+
+
+class OutboxDbModel(db.Base):
+    """Outbox database model.
+
+    A message of a domain event, written in the transaction of its aggregate
+    and published to the broker by the outbox relay. The auto incremented
+    id keeps the order the events were written in.
+    """
+
+    __tablename__ = "outbox"
+
+    # The relay reads the messages not sent yet, in the order of the id.
+    __table_args__ = (sa.Index("ix_outbox_sent_on_id", "sent_on", "id"),)
+
+    id = sa.Column(
+        sa.BigInteger().with_variant(sa.Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    exchange = sa.Column(sa.String(255), nullable=False)
+    routing_key = sa.Column(sa.String(255), nullable=False)
+    body = sa.Column(sa.Text, nullable=False)
+    occurred_on = sa.Column(sa.DateTime, nullable=False)
+    sent_on = sa.Column(sa.DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            "{c}(id={id!r}, exchange={exchange!r}, "
+            "routing_key={routing_key!r}, sent_on={sent_on!r})"
+        ).format(
+            c=self.__class__.__name__,
+            id=self.id,
+            exchange=self.exchange,
+            routing_key=self.routing_key,
+            sent_on=self.sent_on,
+        )
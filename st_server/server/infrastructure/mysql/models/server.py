@@ -4,6 +4,12 @@ import sqlalchemy as sa
 from sqlalchemy.orm import relationship
 
 from st_server.server.infrastructure.mysql import db
+from st_server.server.infrastructure.mysql.models.credential import (
+    CredentialDbModel,
+)
+from st_server.server.infrastructure.mysql.models.server_application import (
+    ServerApplicationDbModel,
+)
 
 
 class ServerDbModel(db.Base):
@@ -11,6 +17,13 @@ class ServerDbModel(db.Base):
 
     __tablename__ = "server"
 
+    # The index on `discarded` ends with the primary key, as every InnoDB
+    # secondary index, so it serves the live rows in the default `id` order.
+    __table_args__ = (
+        sa.UniqueConstraint("name", name="uq_server_name"),
+        sa.Index("ix_server_discarded", "discarded"),
+    )
+
     id = sa.Column(sa.String(32), primary_key=True)
     name = sa.Column(sa.String(255), nullable=False)
     cpu = sa.Column(sa.String(255), nullable=True)
@@ -83,8 +96,14 @@ class ServerDbModel(db.Base):
             hdd=data.get("hdd"),
             environment=data.get("environment"),
             operating_system=data.get("operating_system"),
-            credentials=data.get("credentials") or [],
-            applications=data.get("applications") or [],
+            credentials=[
+                CredentialDbModel.from_dict(data=credential)
+                for credential in data.get("credentials") or []
+            ],
+            applications=[
+                ServerApplicationDbModel.from_dict(data=application)
+                for application in data.get("applications") or []
+            ],
             status=data.get("status"),
             discarded=data.get("discarded"),
         )
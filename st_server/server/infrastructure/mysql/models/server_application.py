@@ -11,6 +11,12 @@ class ServerApplicationDbModel(db.Base):
 
     __tablename__ = "server_application"
 
+    # The primary key leads with `server_id`, the applications of a server
+    # use it. The servers of an application need their own index.
+    __table_args__ = (
+        sa.Index("ix_server_application_application_id", "application_id"),
+    )
+
     server_id = sa.Column(
         sa.ForeignKey("server.id"), primary_key=True, nullable=False
     )
@@ -0,0 +1,899 @@
+"""Query building helpers shared by the MySQL repositories."""
+
+import csv
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+
+from sqlalchemy import (
+    Engine,
+    QueuePool,
+    Select,
+    UniqueConstraint,
+    and_,
+    bindparam,
+    delete,
+    false,
+    func,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import (
+    ColumnProperty,
+    InstrumentedAttribute,
+    RelationshipProperty,
+    Session,
+    joinedload,
+    load_only,
+    selectinload,
+)
+
+from st_server.shared.application.exceptions import (
+    AlreadyExists,
+    FilterError,
+)
+from st_server.shared.domain.repositories.repository_page_dto import (
+    RepositoryPageDto,
+)
+from st_server.shared.helper.cursor import decode_cursor, encode_cursor
+
+KEYSET_TIE_BREAKER = "id"
+INNODB_TABLE_ROWS = text(
+    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+)
+
+# Soft deletion flag, the discarded rows are excluded by default.
+DISCARDED = "discarded"
+
+# Error code of MySQL for a duplicate entry in a unique index.
+MYSQL_DUPLICATE_ENTRY = 1062
+
+LIKE_ESCAPE = "\\"
+FILTER_OPERATORS = {
+    "eq": lambda c, n: c == bindparam(n),
+    "gt": lambda c, n: c > bindparam(n),
+    "ge": lambda c, n: c >= bindparam(n),
+    "lt": lambda c, n: c < bindparam(n),
+    "le": lambda c, n: c <= bindparam(n),
+    "in": lambda c, n: c.in_(bindparam(n, expanding=True)),
+    "btw": lambda c, n: c.between(
+        bindparam(n + "_from"), bindparam(n + "_to")
+    ),
+    "lk": lambda c, n: c.ilike(bindparam(n), escape=LIKE_ESCAPE),
+    "sw": lambda c, n: c.like(bindparam(n), escape=LIKE_ESCAPE),
+    "prefix": lambda c, n: c.like(bindparam(n), escape=LIKE_ESCAPE),
+}
+
+
+def sort_criteria(sort: list[str]) -> tuple[tuple[str, str], ...]:
+    """Returns the sort criteria as (attribute, direction) pairs.
+
+    The `id` is appended as a tie-breaker so the order is total and every
+    row has a stable position for keyset pagination.
+    """
+    criteria = [tuple(criteria.split(":")) for criteria in sort]
+    if KEYSET_TIE_BREAKER not in [attr for attr, _ in criteria]:
+        criteria.append((KEYSET_TIE_BREAKER, "asc"))
+    return tuple(criteria)
+
+
+def keyset_values(instance: object, criteria: tuple) -> list:
+    """Returns the values of the sort attributes of a row."""
+    return [getattr(instance, attr) for attr, _ in criteria]
+
+
+def keyset_predicate(model: type, criteria: tuple, nulls: tuple[bool, ...]):
+    """Returns the predicate selecting the rows after the cursor values.
+
+    For the criteria `a:asc, b:desc` this renders
+    `a > :cursor_0 OR (a = :cursor_0 AND b < :cursor_1)`, which lets the
+    database seek the index instead of scanning and discarding the previous
+    rows.
+
+    NULL values sort first in ascending order, as both MySQL and SQLite do.
+    They can't be bound, so `nulls` tells which cursor values are NULL.
+    """
+    clauses = []
+    equalities = []
+    for i, ((attr, direction), null) in enumerate(zip(criteria, nulls)):
+        column = getattr(model, attr)
+        if null:
+            after = column.is_not(None) if direction == "asc" else false()
+            equal = column.is_(None)
+        else:
+            value = bindparam("cursor_{}".format(i))
+            after = (
+                column > value
+                if direction == "asc"
+                else or_(column < value, column.is_(None))
+            )
+            equal = column == value
+        clauses.append(and_(*equalities, after))
+        equalities.append(equal)
+    return or_(*clauses)
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Yields the items in lists of at most `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def column_values(model: type, rows: list[dict]) -> list[dict]:
+    """Returns the values of the columns of the model for each row.
+
+    The relationships are left out, bulk statements only accept columns.
+    """
+    columns = inspect(model).column_attrs.keys()
+    return [{key: row.get(key) for key in columns} for row in rows]
+
+
+def changed_values(
+    data: dict, domain_events: list, columns: dict[type, str]
+) -> dict:
+    """Returns the values of the columns changed by the domain events.
+
+    `columns` maps each domain event type to the column it changes.
+    """
+    keys = {
+        columns[type(domain_event)]
+        for domain_event in domain_events
+        if type(domain_event) in columns
+    }
+    return {key: data[key] for key in keys}
+
+
+def write_changes(
+    session: Session,
+    model: type,
+    key: str,
+    added: list[dict],
+    removed: list,
+    modified: list[dict],
+    where: tuple = (),
+) -> None:
+    """Writes the changes of a collection, as carried by its domain event.
+
+    The removed rows are deleted by `key`, the added rows inserted and the
+    modified rows updated by primary key with their changed columns only, in
+    one statement each.
+    """
+    columns = inspect(model).column_attrs.keys()
+    primary_key = {column.key for column in inspect(model).primary_key}
+    modified = [
+        {column: row[column] for column in columns if column in row}
+        for row in modified
+    ]
+    modified = [row for row in modified if row.keys() - primary_key]
+    if removed:
+        session.execute(
+            delete(model)
+            .where(*where, getattr(model, key).in_(removed))
+            .execution_options(synchronize_session=False)
+        )
+    if added:
+        session.execute(insert(model), column_values(model, added))
+    if modified:
+        session.execute(update(model), modified)
+
+
+def is_duplicate(error: IntegrityError) -> bool:
+    """Returns whether the error is the violation of a unique index."""
+    args = getattr(error.orig, "args", ())
+    return (args and args[0] == MYSQL_DUPLICATE_ENTRY) or (
+        "UNIQUE constraint failed" in str(error.orig)
+    )
+
+
+@contextmanager
+def already_exists(message: str) -> Iterator[None]:
+    """Raises `AlreadyExists` when a write violates a unique index.
+
+    The inserts rely on the unique indexes instead of looking the rows up
+    first, which takes no extra round trip and can't race.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        if not is_duplicate(error):
+            raise
+        raise AlreadyExists(message) from error
+
+
+def parse_filters(model: type, kwargs: dict) -> dict[str, tuple[str, str]]:
+    """Returns the filters on the columns of the model as (operator, value).
+
+    Values that aren't strings, like a `bool`, are compared for equality.
+
+    The discarded rows are excluded, unless the `discarded` column is
+    filtered or `include_discarded` is true.
+
+    Example: `{"name": "lk:John"}` ->
+    `{"name": ("lk", "John"), "discarded": ("eq", False)}`
+    """
+    columns = inspect(model).column_attrs.keys()
+    filters = {
+        key: tuple(value.split(":", 1))
+        if isinstance(value, str)
+        else ("eq", value)
+        for key, value in kwargs.items()
+        if key in columns
+    }
+    if (
+        DISCARDED in columns
+        and DISCARDED not in filters
+        and not kwargs.get("include_discarded")
+    ):
+        filters[DISCARDED] = ("eq", False)
+    return filters
+
+
+@lru_cache(maxsize=None)
+def compile_filter(model: type, attr: str, op: str):
+    """Returns the predicate of a filter, bound by `filter_{attr}`.
+
+    The predicate only depends on the column and the operator, so it is
+    compiled once and reused by every plan filtering on them.
+
+    `sw` and `prefix` render `LIKE 'value%'`, which can seek an index on the
+    column. `lk` renders `ILIKE '%value%'`, which always scans.
+    """
+    return FILTER_OPERATORS[op](getattr(model, attr), "filter_{}".format(attr))
+
+
+@lru_cache(maxsize=None)
+def _python_type(model: type, attr: str) -> type | None:
+    try:
+        return getattr(model, attr).type.python_type
+    except NotImplementedError:
+        return None
+
+
+def coerce_value(model: type, attr: str, value):
+    """Returns the value converted to the Python type of the column.
+
+    Raises `FilterError` when the value isn't valid for the column.
+    """
+    python_type = _python_type(model, attr)
+    if python_type is None or isinstance(value, python_type):
+        return value
+    try:
+        if python_type is bool:
+            return {"true": True, "1": True, "false": False, "0": False}[
+                str(value).lower()
+            ]
+        if python_type in (date, datetime):
+            return python_type.fromisoformat(value)
+        if python_type in (dict, list):
+            return value
+        return python_type(value)
+    except (KeyError, TypeError, ValueError):
+        raise FilterError(
+            "Filter value {value!r} is not valid for {attr!r}".format(
+                value=value, attr=attr
+            )
+        )
+
+
+def split_values(value: str) -> list[str]:
+    """Splits the comma separated values of an `in` or `btw` filter.
+
+    Values containing a comma can be quoted: `in:"a,b",c` -> `["a,b", "c"]`.
+    """
+    return next(csv.reader([value]), [])
+
+
+def escape_like(value: str) -> str:
+    """Escapes the wildcards of a `LIKE` pattern."""
+    return (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+def query_parameters(
+    model: type,
+    filters: dict[str, tuple[str, str]],
+    values: list | None = None,
+    limit: int | None = None,
+    offset: int | None = None,
+) -> dict:
+    """Returns the values bound to the statements of a query plan.
+
+    The filter values are coerced to the type of their column.
+    """
+    parameters = {}
+    for key, (op, value) in filters.items():
+        name = "filter_{}".format(key)
+        if op == "in":
+            parameters[name] = [
+                coerce_value(model, key, item) for item in split_values(value)
+            ]
+        elif op == "btw":
+            items = split_values(value)
+            if len(items) != 2:
+                raise FilterError(
+                    "Filter {key!r} expects two values".format(key=key)
+                )
+            parameters[name + "_from"], parameters[name + "_to"] = [
+                coerce_value(model, key, item) for item in items
+            ]
+        elif op == "lk":
+            parameters[name] = "%{}%".format(escape_like(value))
+        elif op in ("sw", "prefix"):
+            parameters[name] = "{}%".format(escape_like(value))
+        else:
+            parameters[name] = coerce_value(model, key, value)
+    for i, value in enumerate(values or []):
+        parameters["cursor_{}".format(i)] = value
+    parameters["limit"] = limit
+    parameters["offset"] = offset
+    return parameters
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Statements built once per query shape.
+
+    Only the bound values change between calls, see `query_parameters`.
+    """
+
+    statement: Select
+    count_statement: Select | None = None
+    criteria: tuple = ()
+    exclude: tuple[str, ...] = ()
+    relationships: tuple[str, ...] = ()
+
+
+class PlanCache:
+    """Least recently used cache of query plans with hit and miss counters."""
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self._maxsize = maxsize
+        self._plans: OrderedDict[tuple, QueryPlan] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get_or_build(self, key: tuple, build: callable) -> QueryPlan:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        plan = build()
+        with self._lock:
+            self._plans[key] = plan
+            if len(self._plans) > self._maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+plan_cache = PlanCache()
+
+
+def upsert_statement(session: Session, model: type) -> QueryPlan:
+    """Returns the plan of an insert updating the row with the same key.
+
+    The key is the unique constraint of the model, other than the primary
+    key. MySQL uses `ON DUPLICATE KEY UPDATE`, SQLite and PostgreSQL `ON
+    CONFLICT DO UPDATE`. A row already stored keeps its id and key, its
+    other columns are updated.
+    """
+    dialect = session.get_bind(mapper=inspect(model)).dialect.name
+    key = ("upsert", model, dialect)
+
+    def build() -> QueryPlan:
+        table = model.__table__
+        (constraint,) = (
+            constraint
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+            and not all(column.primary_key for column in constraint.columns)
+        )
+        columns = [
+            column.key
+            for column in table.columns
+            if not column.primary_key and column.key not in constraint.columns
+        ]
+        if dialect == "mysql":
+            statement = mysql.insert(model)
+            return QueryPlan(
+                statement=statement.on_duplicate_key_update(
+                    {column: statement.inserted[column] for column in columns}
+                )
+            )
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        if dialect not in dialects:
+            raise NotImplementedError(
+                "Upserts aren't supported on {}".format(dialect)
+            )
+        statement = dialects[dialect].insert(model)
+        return QueryPlan(
+            statement=statement.on_conflict_do_update(
+                index_elements=list(constraint.columns),
+                set_={
+                    column: statement.excluded[column] for column in columns
+                },
+            )
+        )
+
+    return plan_cache.get_or_build(key, build)
+
+
+def find_many_plan(
+    model: type,
+    fields: list[str],
+    filters: dict[str, tuple[str, str]],
+    sort: list[str],
+    values: list | None = None,
+    limit: int | None = None,
+    offset: int | None = None,
+    rows: bool = False,
+) -> QueryPlan:
+    """Returns the plan of a `find_many` query.
+
+    The plan depends on the fields, the filtered attributes and operators,
+    the sort criteria, which cursor values are NULL and whether the query is
+    limited or offset, but not on the bound values.
+
+    With `rows`, the statement selects the columns instead of the model, see
+    `read_rows`.
+    """
+    nulls = tuple(value is None for value in values) if values else None
+    key = (
+        "find_many",
+        model,
+        tuple(fields),
+        tuple((attr, op) for attr, (op, _) in sorted(filters.items())),
+        tuple(sort),
+        nulls,
+        bool(limit),
+        bool(offset),
+        rows,
+    )
+
+    def build() -> QueryPlan:
+        criteria = sort_criteria(sort)
+        if rows:
+            statement, relationships = _row_statement(model, fields, criteria)
+            exclude = ()
+        else:
+            options, exclude = _load_options(model, fields, criteria)
+            statement = select(model).options(*options)
+            relationships = ()
+        clauses = _filter_clauses(model, filters)
+        statement = statement.where(*clauses)
+        for attr, direction in criteria:
+            statement = statement.order_by(
+                getattr(getattr(model, attr), direction)()
+            )
+        if nulls is not None:
+            statement = statement.where(
+                keyset_predicate(model, criteria, nulls)
+            )
+        elif offset:
+            statement = statement.offset(bindparam("offset"))
+        if limit:
+            statement = statement.limit(bindparam("limit"))
+        return QueryPlan(
+            statement=statement,
+            count_statement=select(func.count())
+            .select_from(model)
+            .where(*clauses),
+            criteria=criteria,
+            exclude=exclude,
+            relationships=relationships,
+        )
+
+    return plan_cache.get_or_build(key, build)
+
+
+def find_one_plan(
+    model: type, fields: list[str], rows: bool = False
+) -> QueryPlan:
+    """Returns the plan of a `find_one` query, bound by `id`."""
+    key = ("find_one", model, tuple(fields), rows)
+
+    def build() -> QueryPlan:
+        if rows:
+            statement, relationships = _row_statement(model, fields)
+            return QueryPlan(
+                statement=statement.where(model.id == bindparam("id")),
+                relationships=relationships,
+            )
+        options, exclude = _load_options(model, fields)
+        return QueryPlan(
+            statement=select(model)
+            .options(*options)
+            .where(model.id == bindparam("id")),
+            exclude=exclude,
+        )
+
+    return plan_cache.get_or_build(key, build)
+
+
+def exists_plan(model: type, filters: dict[str, tuple[str, str]]) -> QueryPlan:
+    """Returns the plan of a `SELECT 1 ... LIMIT 1` query on the filters."""
+    key = (
+        "exists",
+        model,
+        tuple((attr, op) for attr, (op, _) in sorted(filters.items())),
+    )
+
+    def build() -> QueryPlan:
+        return QueryPlan(
+            statement=select(literal(1))
+            .select_from(model)
+            .where(*_filter_clauses(model, filters))
+            .limit(1)
+        )
+
+    return plan_cache.get_or_build(key, build)
+
+
+def ids_plan(model: type, filters: dict[str, tuple[str, str]]) -> QueryPlan:
+    """Returns the plan of a query selecting only the ids on the filters."""
+    key = (
+        "ids",
+        model,
+        tuple((attr, op) for attr, (op, _) in sorted(filters.items())),
+    )
+
+    def build() -> QueryPlan:
+        return QueryPlan(
+            statement=select(model.id).where(*_filter_clauses(model, filters))
+        )
+
+    return plan_cache.get_or_build(key, build)
+
+
+def find_page(
+    session: Session,
+    model: type,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    sort: list[str],
+    fields: list[str],
+    count: str | None,
+    kwargs: dict,
+    rows: bool = False,
+) -> tuple[QueryPlan, RepositoryPageDto]:
+    """Returns the plan and the page of a `find_many` query.
+
+    The items are the loaded models, or the rows as dicts with `rows`.
+    """
+    filters = parse_filters(model, kwargs)
+    values = decode_cursor(cursor, sort) if cursor else None
+    plan = find_many_plan(
+        model,
+        fields=fields,
+        filters=filters,
+        sort=sort,
+        values=values,
+        limit=limit,
+        offset=offset,
+        rows=rows,
+    )
+    parameters = query_parameters(
+        model, filters, values=values, limit=limit, offset=offset
+    )
+    total = count_total(
+        session,
+        model,
+        plan.count_statement,
+        parameters,
+        strategy=count,
+        key=filters,
+    )
+    if rows:
+        items = read_rows(session, model, plan, parameters)
+        last = items[-1] if items else None
+        last_values = last and [last[attr] for attr, _ in plan.criteria]
+    else:
+        items = (
+            session.execute(plan.statement, parameters)
+            .unique()
+            .scalars()
+            .all()
+        )
+        last_values = items and keyset_values(items[-1], plan.criteria)
+    next_cursor = (
+        encode_cursor(sort, last_values)
+        if limit and len(items) == limit
+        else None
+    )
+    return plan, RepositoryPageDto(
+        _total=total.result(), _next_cursor=next_cursor, _items=items
+    )
+
+
+def iter_rows(
+    session: Session,
+    model: type,
+    plan: QueryPlan,
+    parameters: dict,
+    chunk_size: int,
+) -> Iterator[list[dict]]:
+    """Yields the rows of a `rows` plan as dicts, in chunks.
+
+    The rows are streamed from a server-side cursor, `chunk_size` at a time,
+    on a connection of their own: the MySQL drivers can't run another
+    statement on a connection while it streams. The relationships of each
+    chunk are read through the session, one `IN` query each, so the memory
+    stays flat whatever the number of rows.
+    """
+    with session.get_bind(clause=plan.statement).connect() as connection:
+        result = connection.execution_options(yield_per=chunk_size).execute(
+            plan.statement, parameters
+        )
+        for rows in result.mappings().partitions():
+            rows = [dict(row) for row in rows]
+            read_relationships(session, model, rows, plan.relationships)
+            yield rows
+
+
+def read_rows(
+    session: Session, model: type, plan: QueryPlan, parameters: dict
+) -> list[dict]:
+    """Returns the rows of a `rows` plan as dicts, with their relationships.
+
+    No model nor aggregate is built, the read-only queries map the dicts
+    straight to their read DTOs.
+    """
+    rows = [
+        dict(row)
+        for row in session.execute(plan.statement, parameters).mappings()
+    ]
+    read_relationships(session, model, rows, plan.relationships)
+    return rows
+
+
+def read_relationships(
+    session: Session, model: type, rows: list[dict], keys: Iterable[str]
+) -> None:
+    """Adds the related rows to the rows of the model, as dicts.
+
+    Each relationship is read with one `IN` query over the rows, as the
+    `selectin` loader does. The eager relationships of the related models
+    are read the same way.
+    """
+    for key in keys:
+        relationship = inspect(model).relationships[key]
+        ((local, remote),) = relationship.local_remote_pairs
+        target = relationship.mapper.class_
+        values = {row[local.key] for row in rows}
+        related = (
+            [
+                dict(row)
+                for row in session.execute(
+                    select(target.__table__).where(remote.in_(values))
+                ).mappings()
+            ]
+            if values
+            else []
+        )
+        read_relationships(session, target, related, _eager_keys(target))
+        grouped = {}
+        for row in related:
+            grouped.setdefault(row[remote.key], []).append(row)
+        for row in rows:
+            found = grouped.get(row[local.key], [])
+            if relationship.uselist:
+                row[key] = found
+            else:
+                row[key] = found[0] if found else None
+
+
+def _filter_clauses(model: type, filters: dict[str, tuple[str, str]]) -> list:
+    return [
+        compile_filter(model, attr, op)
+        for attr, (op, _) in sorted(filters.items())
+    ]
+
+
+def _row_statement(
+    model: type, fields: list[str], criteria: tuple = ()
+) -> tuple[Select, tuple[str, ...]]:
+    mapper = inspect(model)
+    keys = {attr for attr, _ in criteria}
+    columns = [
+        getattr(model, attr.key)
+        for attr in mapper.column_attrs
+        # The primary key is always read, the relationships are read by it.
+        if not fields
+        or attr.key in fields
+        or attr.key in keys
+        or attr.columns[0].primary_key
+    ]
+    relationships = tuple(
+        attr.key
+        for attr in mapper.relationships
+        if not fields or attr.key in fields
+    )
+    return select(*columns), relationships
+
+
+def _eager_keys(model: type) -> tuple[str, ...]:
+    return tuple(
+        attr.key
+        for attr in inspect(model).relationships
+        if attr.lazy in ("joined", "selectin", "subquery")
+    )
+
+
+def _load_options(
+    model: type, fields: list[str], criteria: tuple = ()
+) -> tuple[list, tuple[str, ...]]:
+    columns = []
+    options = []
+    exclude = []
+    for attr in inspect(model).attrs:
+        # If no fields are provided or the attribute is in the fields, load it.
+        if not fields or attr.key in fields:
+            if isinstance(attr, ColumnProperty):
+                columns.append(getattr(model, attr.key))
+            if isinstance(attr, RelationshipProperty):
+                options.append(relationship_loader(getattr(model, attr.key)))
+        # Else exclude it.
+        else:
+            exclude.append(attr.key)
+    if not fields:
+        return options, ()
+    # The sort attributes are loaded too, the cursor is built from them.
+    columns.extend(
+        getattr(model, attr) for attr, _ in criteria if attr not in fields
+    )
+    if columns:
+        options.insert(0, load_only(*columns))
+    return options, tuple(exclude)
+
+
+def relationship_loader(relationship: InstrumentedAttribute):
+    """Returns the loader option of a relationship.
+
+    To-many collections are loaded with a second `SELECT ... WHERE fk IN
+    (...)` per collection and batch of parents. Joining them would multiply
+    the parent rows by the size of each collection, so a server with 20
+    credentials and 30 applications would come back as 600 rows, and the
+    `LIMIT` would apply to a subquery wrapped around the join. To-one
+    relationships are still joined.
+    """
+    if relationship.property.uselist:
+        return selectinload(relationship)
+    return joinedload(relationship)
+
+
+class CountCache:
+    """Caches the total count of rows per table and filters.
+
+    Entries expire after `ttl` seconds, so estimated totals drift at most
+    that long behind the table.
+    """
+
+    def __init__(self, ttl: float = 60.0) -> None:
+        self._ttl = ttl
+        self._entries: dict[tuple, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> int | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: tuple, total: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, total)
+
+
+count_cache = CountCache()
+count_executor = ThreadPoolExecutor(thread_name_prefix="count")
+
+
+def count_total(
+    session: Session,
+    model: type,
+    statement: Select,
+    parameters: dict,
+    strategy: str,
+    key: dict,
+) -> Future:
+    """Returns the total count of rows matching the filters.
+
+    The available count strategies are:
+    - `exact`: counts the rows. When the engine has a connection pool, the
+        count runs on a second pooled connection, concurrently with the page
+        query. On an async driver it runs inline, the event loop serves other
+        requests meanwhile.
+    - `estimated`: returns the InnoDB table statistics when there are no
+        filters but the default exclusion of the discarded rows, or a cached
+        count per filters.
+    - `none`: skips the count and returns `None`.
+
+    The count never joins the relationships, so it doesn't fan out over the
+    to-many collections.
+    """
+    total = Future()
+    if strategy == "none":
+        total.set_result(None)
+    elif strategy == "estimated":
+        total.set_result(
+            _estimated_count(session, model, statement, parameters, key)
+        )
+    else:
+        # Resolved once, the count and the page read from the same database.
+        bind = session.get_bind(clause=statement)
+        if isinstance(bind.pool, QueuePool) and not bind.dialect.is_async:
+            return count_executor.submit(
+                _pooled_count, bind, statement, parameters
+            )
+        total.set_result(session.execute(statement, parameters).scalar_one())
+    return total
+
+
+def _pooled_count(engine: Engine, statement: Select, parameters: dict) -> int:
+    with engine.connect() as connection:
+        return connection.execute(statement, parameters).scalar_one()
+
+
+def _estimated_count(
+    session: Session,
+    model: type,
+    statement: Select,
+    parameters: dict,
+    key: dict,
+) -> int:
+    # The implicit exclusion of the discarded rows doesn't count as a filter,
+    # the table statistics are an estimate anyway.
+    filtered = {
+        attr: value
+        for attr, value in key.items()
+        if (attr, value) != (DISCARDED, ("eq", False))
+    }
+    if not filtered and session.get_bind().dialect.name == "mysql":
+        total = session.execute(
+            INNODB_TABLE_ROWS, {"table": model.__tablename__}
+        ).scalar()
+        if total is not None:
+            return total
+    cache_key = (model.__tablename__, repr(sorted(key.items())))
+    total = count_cache.get(cache_key)
+    if total is None:
+        total = session.execute(statement, parameters).scalar_one()
+        count_cache.set(cache_key, total)
+    return total
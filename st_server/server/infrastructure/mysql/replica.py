@@ -0,0 +1,177 @@
+"""Routes the reads to the replicas and the writes to the primary."""
+
+import itertools
+import threading
+import time
+
+from sqlalchemy import Delete, Engine, Insert, Select, Update, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+REPLICA_STATUS = text("SHOW REPLICA STATUS")
+
+
+def replica_lag(engine: Engine) -> float | None:
+    """Returns the seconds the replica is behind the primary.
+
+    Returns `None` when the replication isn't running or the status can't
+    be read.
+    """
+    try:
+        with engine.connect() as connection:
+            status = connection.execute(REPLICA_STATUS).mappings().first()
+    except DBAPIError:
+        return None
+    if status is None:
+        return None
+    return status.get("Seconds_Behind_Source")
+
+
+class ReplicaRouter:
+    """Chooses the replica serving the reads.
+
+    The replicas are used in turns. A replica whose lag exceeds `max_lag`
+    seconds, or whose replication isn't running, is skipped until a later
+    check finds it caught up. The lag of each replica is checked at most
+    every `lag_interval` seconds. When no replica is usable, the reads fail
+    over to the primary.
+
+    When `read_your_writes` is greater than zero, the reads of a client go
+    to the primary for that many seconds after the client wrote, so it
+    always sees its own changes. At most `max_clients` windows are kept,
+    the oldest ones are dropped beyond.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Engine],
+        max_lag: float = 5.0,
+        read_your_writes: float = 0.0,
+        lag_interval: float = 1.0,
+        lag: callable = replica_lag,
+        max_clients: int = 10000,
+    ) -> None:
+        self._replicas = replicas
+        self._max_lag = max_lag
+        self._read_your_writes = read_your_writes
+        self._lag_interval = lag_interval
+        self._lag = lag
+        self._max_clients = max_clients
+        self._turns = itertools.count()
+        self._lags: dict[Engine, tuple[float, float | None]] = {}
+        self._writes: dict[str, float] = {}
+        self._swept = time.monotonic()
+        self._lock = threading.Lock()
+
+    def replica(self, client: str | None = None) -> Engine | None:
+        """Returns the replica serving the next read of the client.
+
+        Returns `None` when the read must go to the primary.
+        """
+        if not self._replicas or self._wrote_recently(client):
+            return None
+        turn = next(self._turns)
+        for i in range(len(self._replicas)):
+            replica = self._replicas[(turn + i) % len(self._replicas)]
+            if self._caught_up(replica):
+                return replica
+        return None
+
+    def record_write(self, client: str | None = None) -> None:
+        """Records a write of the client for the read-your-writes window."""
+        if client is None or not self._read_your_writes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # Moved to the end, the windows are kept in the order they end.
+            self._writes.pop(client, None)
+            self._writes[client] = now + self._read_your_writes
+            # The expired windows are dropped once per window.
+            if now - self._swept >= self._read_your_writes:
+                self._writes = {
+                    key: until
+                    for key, until in self._writes.items()
+                    if until >= now
+                }
+                self._swept = now
+            while len(self._writes) > self._max_clients:
+                del self._writes[next(iter(self._writes))]
+
+    def _wrote_recently(self, client: str | None) -> bool:
+        if client is None or not self._read_your_writes:
+            return False
+        with self._lock:
+            until = self._writes.get(client)
+            if until is not None and until < time.monotonic():
+                del self._writes[client]
+                until = None
+        return until is not None
+
+    def _caught_up(self, replica: Engine) -> bool:
+        now = time.monotonic()
+        checked, lag = self._lags.get(replica, (None, None))
+        if checked is None or now - checked >= self._lag_interval:
+            lag = self._lag(replica)
+            self._lags[replica] = (now, lag)
+        return lag is not None and lag <= self._max_lag
+
+
+class RoutingSession(Session):
+    """Session sending the reads to a replica and the writes to the primary.
+
+    Plain `SELECT` statements are read from the replica chosen by the
+    router, the same one for all the reads of the session. Flushes,
+    `INSERT`, `UPDATE`, `DELETE` and `SELECT ... FOR UPDATE` are writes and
+    go to the bound primary, as does raw SQL. Once the session wrote, or
+    was pinned with `pin_primary`, its reads stay on the primary too.
+
+    The client whose writes are tracked for the read-your-writes window is
+    taken from `info["client"]`.
+    """
+
+    def __init__(
+        self, *args, router: ReplicaRouter | None = None, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self._router = router
+        self._primary = False
+        self._replica = None
+
+    def pin_primary(self) -> None:
+        """Sends all the following statements to the primary.
+
+        For the reads of a read-modify-write, a lagging replica would
+        return a stale row.
+        """
+        self._primary = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._router is not None:
+            if self._flushing or _is_write(clause):
+                self._primary = True
+                self._router.record_write(self.info.get("client"))
+            elif _is_read(clause) and not self._primary:
+                if self._replica is None:
+                    # The primary when no replica can serve the reads.
+                    self._replica = self._router.replica(
+                        self.info.get("client")
+                    ) or super().get_bind(mapper=mapper, clause=clause)
+                return self._replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def pin_primary(session: Session) -> None:
+    """Pins the session to the primary, when it routes to replicas."""
+    pin = getattr(session, "pin_primary", None)
+    if pin is not None:
+        pin()
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def _is_write(clause) -> bool:
+    return isinstance(clause, (Insert, Update, Delete)) or (
+        isinstance(clause, Select) and clause._for_update_arg is not None
+    )
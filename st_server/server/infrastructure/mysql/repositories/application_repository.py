@@ -1,26 +1,48 @@
 """Application repository implementation."""
 
-from sqlalchemy import inspect
-from sqlalchemy.orm import (
-    ColumnProperty,
-    RelationshipProperty,
-    Session,
-    joinedload,
-    load_only,
-)
+from collections.abc import Iterator
+from dataclasses import replace
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
 
 from st_server.server.domain.entities.application import Application
 from st_server.server.domain.repositories.application_repository import (
-    FILTER_OPERATOR_MAPPER,
     ApplicationRepository,
 )
+from st_server.server.infrastructure.mysql import db
 from st_server.server.infrastructure.mysql.models.application import (
     ApplicationDbModel,
 )
+from st_server.server.infrastructure.mysql.query import (
+    already_exists,
+    batched,
+    changed_values,
+    column_values,
+    exists_plan,
+    find_many_plan,
+    find_one_plan,
+    find_page,
+    ids_plan,
+    iter_rows,
+    parse_filters,
+    query_parameters,
+    read_rows,
+    upsert_statement,
+)
+from st_server.server.infrastructure.mysql.replica import pin_primary
 from st_server.shared.domain.repositories.repository_page_dto import (
     RepositoryPageDto,
 )
 
+# The column changed by each domain event of an application.
+CHANGED_COLUMNS = {
+    Application.NameChanged: "name",
+    Application.VersionChanged: "version",
+    Application.ArchitectChanged: "architect",
+    Application.Discarded: "discarded",
+}
+
 
 class ApplicationRepositoryImpl(ApplicationRepository):
     """Application repository implementation.
@@ -39,10 +61,15 @@ class ApplicationRepositoryImpl(ApplicationRepository):
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
+    The discarded rows are excluded unless the `discarded` column is filtered
+    or `include_discarded=True` is given. Getting a row by its id includes
+    them.
+
     In the `find_many` method, the `sort` parameter is a list of strings with the
     field name and the sort criteria separated by a colon.
 
@@ -55,21 +82,61 @@ class ApplicationRepositoryImpl(ApplicationRepository):
     In the `find_many` method, the `fields` parameter is a list of strings with the
     field names to be loaded.
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. The page starts right
+    after the row the cursor points to and the offset is ignored. The rows
+    are always sorted by `id` after the given sort criteria, so every row
+    has a stable position.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates:
+    - `exact`: counts the aggregates, concurrently with the page query when
+        the engine has a connection pool.
+    - `estimated`: uses the table statistics or a cached count per filters.
+    - `none`: skips the count, the total is `None`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
     If a `None` value is provided to kwargs, all aggregates will be returned.
+
+    The `*_many` methods write the aggregates in batches of `batch_size`,
+    with one executemany statement per table and one commit per batch.
+
+    The `read_many` and `read_one` methods take the parameters of
+    `find_many` and `find_one` and return the rows as dicts, the related
+    rows as lists of dicts. They serve the read-only queries, no aggregate
+    is built.
+
+    The `iter_many` method takes the filters, `sort` and `fields` of
+    `find_many` and yields all the matching aggregates, streamed from a
+    server-side cursor in chunks of `chunk_size`, the `batch_size` by
+    default. The memory stays flat whatever the number of rows. The
+    `read_iter` method streams the rows as dicts, like `read_many`.
+
+    The `exists` and `get_ids` methods take the filters of `find_many` and
+    only select `1` or the ids, for the checks that don't need the
+    aggregates.
+
+    The `add_*` methods rely on the unique indexes and raise `AlreadyExists` on
+    a duplicate. The `upsert_many` method inserts the applications, or updates
+    the ones with the same name, version and architect, which keep their id.
     """
 
-    def __init__(self, session: Session) -> None:
+    def __init__(
+        self, session: Session, batch_size: int | None = None
+    ) -> None:
         self._session = session
+        self._batch_size = batch_size or db.db_batch_size
 
     def find_many(
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         **kwargs,
     ) -> RepositoryPageDto:
         if limit is None:
@@ -83,45 +150,26 @@ class ApplicationRepositoryImpl(ApplicationRepository):
         if kwargs is None:
             kwargs = {}
         with self._session as session:
-            query = session.query(ApplicationDbModel)
-            exclude = []
-            for attr in inspect(ApplicationDbModel).attrs:
-                # If no fields are provided, load all.
-                if not fields:
-                    query = query.options(joinedload("*"))
-                # Else if the attribute is in the fields, load it.
-                elif attr.key in fields:
-                    if isinstance(attr, ColumnProperty):
-                        query = query.options(
-                            load_only(getattr(ApplicationDbModel, attr.key))
-                        )
-                    if isinstance(attr, RelationshipProperty):
-                        query = query.options(joinedload(attr))
-                # Else if the attribute is not in the fields, exclude it.
-                else:
-                    exclude.append(attr.key)
-                # If the attribute is in the kwargs, filter by it.
-                if attr.key in kwargs:
-                    op, val = kwargs[attr.key].split(":")
-                    query = query.filter(
-                        FILTER_OPERATOR_MAPPER[op](
-                            ApplicationDbModel, attr.key, val
-                        )
-                    )
-            # If the attribute is in the sort criteria, sort by it.
-            for criteria in sort:
-                attr, direction = criteria.split(":")
-                sorting = getattr(getattr(ApplicationDbModel, attr), direction)
-                query = query.order_by(sorting())
-            total = query.count()
-            query = query.limit(limit=limit or total)
-            query = query.offset(offset=offset)
-            applications = query.all()
-            return RepositoryPageDto(
-                _total=total,
+            # Aggregates are loaded to be changed, from the primary.
+            pin_primary(session)
+            plan, page = find_page(
+                session,
+                ApplicationDbModel,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                sort=sort,
+                fields=fields,
+                count=count,
+                kwargs=kwargs,
+            )
+            return replace(
+                page,
                 _items=[
-                    Application.from_dict(application.to_dict(exclude=exclude))
-                    for application in applications
+                    Application.from_dict(
+                        application.to_dict(exclude=plan.exclude)
+                    )
+                    for application in page._items
                 ],
             )
 
@@ -131,42 +179,144 @@ class ApplicationRepositoryImpl(ApplicationRepository):
         if fields is None:
             fields = []
         with self._session as session:
-            query = session.query(ApplicationDbModel).filter(
-                ApplicationDbModel.id == id
+            pin_primary(session)
+            plan = find_one_plan(ApplicationDbModel, fields=fields)
+            application = (
+                session.execute(plan.statement, {"id": id})
+                .unique()
+                .scalar_one_or_none()
             )
-            exclude = []
-            for attr in inspect(ApplicationDbModel).attrs:
-                # If no fields are provided, load all.
-                if not fields:
-                    query = query.options(joinedload("*"))
-                # If the attribute is in the fields, load it.
-                elif attr.key in fields:
-                    if isinstance(attr, ColumnProperty):
-                        query = query.options(
-                            load_only(getattr(ApplicationDbModel, attr.key))
-                        )
-                    if isinstance(attr, RelationshipProperty):
-                        query = query.options(joinedload(attr))
-                # If the attribute is not in the fields, exclude it.
-                else:
-                    exclude.append(attr.key)
-            application = query.one_or_none()
             return (
-                Application.from_dict(application.to_dict(exclude=exclude))
+                Application.from_dict(
+                    application.to_dict(exclude=plan.exclude)
+                )
                 if application
                 else None
             )
 
-    def add_one(self, aggregate: Application) -> None:
+    def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        with self._session as session:
+            _, page = find_page(
+                session,
+                ApplicationDbModel,
+                limit=limit or 0,
+                offset=offset or 0,
+                cursor=cursor,
+                sort=sort or [],
+                fields=fields or [],
+                count=count,
+                kwargs=kwargs,
+                rows=True,
+            )
+            return page
+
+    def read_one(
+        self, id: int, fields: list[str] | None = None
+    ) -> dict | None:
+        with self._session as session:
+            plan = find_one_plan(
+                ApplicationDbModel, fields=fields or [], rows=True
+            )
+            applications = read_rows(
+                session, ApplicationDbModel, plan, {"id": id}
+            )
+            return applications[0] if applications else None
+
+    def exists(self, **kwargs) -> bool:
+        with self._session as session:
+            pin_primary(session)
+            filters = parse_filters(ApplicationDbModel, kwargs)
+            plan = exists_plan(ApplicationDbModel, filters)
+            return (
+                session.execute(
+                    plan.statement,
+                    query_parameters(ApplicationDbModel, filters),
+                ).first()
+                is not None
+            )
+
+    def get_ids(self, **kwargs) -> list[str]:
         with self._session as session:
+            pin_primary(session)
+            filters = parse_filters(ApplicationDbModel, kwargs)
+            plan = ids_plan(ApplicationDbModel, filters)
+            return (
+                session.execute(
+                    plan.statement,
+                    query_parameters(ApplicationDbModel, filters),
+                )
+                .scalars()
+                .all()
+            )
+
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[Application]:
+        for applications in self._iter_rows(sort, fields, chunk_size, kwargs):
+            yield from [
+                Application.from_dict(application)
+                for application in applications
+            ]
+
+    def read_iter(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        for applications in self._iter_rows(sort, fields, chunk_size, kwargs):
+            yield from applications
+
+    def add_one(self, aggregate: Application) -> None:
+        with self._session as session, already_exists(
+            "Application with name: {name!r} version: {version!r} and architect: {architect!r} already exists".format(
+                name=aggregate.name,
+                version=aggregate.version,
+                architect=aggregate.architect,
+            )
+        ):
             model = ApplicationDbModel.from_dict(aggregate.to_dict())
             session.add(model)
             session.commit()
 
     def update_one(self, aggregate: Application) -> None:
-        with self._session as session:
-            model = ApplicationDbModel.from_dict(aggregate.to_dict())
-            session.merge(model)
+        """Writes the columns changed by the domain events of the application.
+
+        Only the changed columns are updated, in a single `UPDATE`. Nothing
+        is read back from the database.
+        """
+        values = changed_values(
+            aggregate.to_dict(), aggregate.domain_events, CHANGED_COLUMNS
+        )
+        if not values:
+            return
+        with self._session as session, already_exists(
+            "Application with name: {name!r} version: {version!r} and architect: {architect!r} already exists".format(
+                name=aggregate.name,
+                version=aggregate.version,
+                architect=aggregate.architect,
+            )
+        ):
+            session.execute(
+                update(ApplicationDbModel)
+                .where(ApplicationDbModel.id == aggregate.id.value)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
             session.commit()
 
     def delete_one(self, id: int) -> None:
@@ -174,3 +324,89 @@ class ApplicationRepositoryImpl(ApplicationRepository):
             model = session.get(entity=ApplicationDbModel, ident=id)
             session.delete(model)
             session.commit()
+
+    def add_many(self, aggregates: list[Application]) -> None:
+        with self._session as session, already_exists(
+            "Applications already exist"
+        ):
+            for batch in batched(aggregates, self._batch_size):
+                session.execute(
+                    insert(ApplicationDbModel),
+                    column_values(
+                        ApplicationDbModel,
+                        [aggregate.to_dict() for aggregate in batch],
+                    ),
+                )
+                session.commit()
+
+    def upsert_many(self, aggregates: list[Application]) -> None:
+        with self._session as session:
+            plan = upsert_statement(session, ApplicationDbModel)
+            for batch in batched(aggregates, self._batch_size):
+                session.execute(
+                    plan.statement,
+                    column_values(
+                        ApplicationDbModel,
+                        [aggregate.to_dict() for aggregate in batch],
+                    ),
+                )
+                session.commit()
+
+    def update_many(self, aggregates: list[Application]) -> None:
+        with self._session as session, already_exists(
+            "Applications already exist"
+        ):
+            for batch in batched(aggregates, self._batch_size):
+                session.execute(
+                    update(ApplicationDbModel),
+                    column_values(
+                        ApplicationDbModel,
+                        [aggregate.to_dict() for aggregate in batch],
+                    ),
+                )
+                session.commit()
+
+    def discard_many(self, ids: list[str]) -> None:
+        with self._session as session:
+            for batch in batched(ids, self._batch_size):
+                session.execute(
+                    update(ApplicationDbModel)
+                    .where(ApplicationDbModel.id.in_(batch))
+                    .values(discarded=True)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+    def delete_many(self, ids: list[str]) -> None:
+        with self._session as session:
+            for batch in batched(ids, self._batch_size):
+                session.execute(
+                    delete(ApplicationDbModel)
+                    .where(ApplicationDbModel.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+    def _iter_rows(
+        self,
+        sort: list[str] | None,
+        fields: list[str] | None,
+        chunk_size: int | None,
+        kwargs: dict,
+    ) -> Iterator[list[dict]]:
+        with self._session as session:
+            filters = parse_filters(ApplicationDbModel, kwargs)
+            plan = find_many_plan(
+                ApplicationDbModel,
+                fields=fields or [],
+                filters=filters,
+                sort=sort or [],
+                rows=True,
+            )
+            yield from iter_rows(
+                session,
+                ApplicationDbModel,
+                plan,
+                query_parameters(ApplicationDbModel, filters),
+                chunk_size=chunk_size or self._batch_size,
+            )
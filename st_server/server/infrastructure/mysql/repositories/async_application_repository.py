@@ -0,0 +1,139 @@
+"""Async Application repository implementation."""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from st_server.server.domain.entities.application import Application
+from st_server.server.domain.repositories.async_application_repository import (
+    AsyncApplicationRepository,
+)
+from st_server.server.infrastructure.mysql.repositories.application_repository import (
+    ApplicationRepositoryImpl,
+)
+from st_server.shared.domain.repositories.repository_page_dto import (
+    RepositoryPageDto,
+)
+
+
+class AsyncApplicationRepositoryImpl(AsyncApplicationRepository):
+    """Async Application repository implementation.
+
+    The statements are the ones of `ApplicationRepositoryImpl`, run through
+    `AsyncSession.run_sync`. The ORM code runs in a greenlet and every round
+    trip to the database awaits the async driver, so the event loop is never
+    blocked and the query plans are shared with the sync repository.
+    """
+
+    def __init__(
+        self, session: AsyncSession, batch_size: int | None = None
+    ) -> None:
+        self._session = session
+        self._batch_size = batch_size
+
+    async def find_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        return await self._run(
+            lambda repository: repository.find_many(
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                sort=sort,
+                fields=fields,
+                count=count,
+                **kwargs,
+            )
+        )
+
+    async def find_one(
+        self, id: int, fields: list[str] | None = None
+    ) -> Application | None:
+        return await self._run(
+            lambda repository: repository.find_one(id=id, fields=fields)
+        )
+
+    async def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        return await self._run(
+            lambda repository: repository.read_many(
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                sort=sort,
+                fields=fields,
+                count=count,
+                **kwargs,
+            )
+        )
+
+    async def read_one(
+        self, id: int, fields: list[str] | None = None
+    ) -> dict | None:
+        return await self._run(
+            lambda repository: repository.read_one(id=id, fields=fields)
+        )
+
+    async def exists(self, **kwargs) -> bool:
+        return await self._run(lambda repository: repository.exists(**kwargs))
+
+    async def get_ids(self, **kwargs) -> list[str]:
+        return await self._run(lambda repository: repository.get_ids(**kwargs))
+
+    async def add_one(self, aggregate: Application) -> None:
+        await self._run(
+            lambda repository: repository.add_one(aggregate=aggregate)
+        )
+
+    async def update_one(self, aggregate: Application) -> None:
+        await self._run(
+            lambda repository: repository.update_one(aggregate=aggregate)
+        )
+
+    async def delete_one(self, id: int) -> None:
+        await self._run(lambda repository: repository.delete_one(id=id))
+
+    async def add_many(self, aggregates: list[Application]) -> None:
+        await self._run(
+            lambda repository: repository.add_many(aggregates=aggregates)
+        )
+
+    async def upsert_many(self, aggregates: list[Application]) -> None:
+        await self._run(
+            lambda repository: repository.upsert_many(aggregates=aggregates)
+        )
+
+    async def update_many(self, aggregates: list[Application]) -> None:
+        await self._run(
+            lambda repository: repository.update_many(aggregates=aggregates)
+        )
+
+    async def discard_many(self, ids: list[str]) -> None:
+        await self._run(lambda repository: repository.discard_many(ids=ids))
+
+    async def delete_many(self, ids: list[str]) -> None:
+        await self._run(lambda repository: repository.delete_many(ids=ids))
+
+    async def _run(self, call: callable):
+        def run(session: Session):
+            return call(
+                ApplicationRepositoryImpl(
+                    session=session, batch_size=self._batch_size
+                )
+            )
+
+        return await self._session.run_sync(run)
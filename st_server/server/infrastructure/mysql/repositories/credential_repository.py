@@ -1,22 +1,35 @@
 """Credential repository implementation."""
 
-from sqlalchemy import inspect
-from sqlalchemy.orm import (
-    ColumnProperty,
-    RelationshipProperty,
-    Session,
-    joinedload,
-    load_only,
-)
+from collections.abc import Iterator
+from dataclasses import replace
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
 
 from st_server.server.domain.entities.credential import Credential
 from st_server.server.domain.repositories.credential_repository import (
-    FILTER_OPERATOR_MAPPER,
     CredentialRepository,
 )
+from st_server.server.infrastructure.mysql import db
 from st_server.server.infrastructure.mysql.models.credential import (
     CredentialDbModel,
 )
+from st_server.server.infrastructure.mysql.query import (
+    already_exists,
+    batched,
+    column_values,
+    exists_plan,
+    find_many_plan,
+    find_one_plan,
+    find_page,
+    ids_plan,
+    iter_rows,
+    parse_filters,
+    query_parameters,
+    read_rows,
+    upsert_statement,
+)
+from st_server.server.infrastructure.mysql.replica import pin_primary
 from st_server.shared.domain.repositories.repository_page_dto import (
     RepositoryPageDto,
 )
@@ -39,10 +52,15 @@ class CredentialRepositoryImpl(CredentialRepository):
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
+    The discarded rows are excluded unless the `discarded` column is filtered
+    or `include_discarded=True` is given. Getting a row by its id includes
+    them.
+
     In the `find_many` method, the `sort` parameter is a list of strings with the
     field name and the sort criteria separated by a colon.
 
@@ -55,21 +73,61 @@ class CredentialRepositoryImpl(CredentialRepository):
     In the `find_many` method, the `fields` parameter is a list of strings with the
     field names to be loaded.
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. The page starts right
+    after the row the cursor points to and the offset is ignored. The rows
+    are always sorted by `id` after the given sort criteria, so every row
+    has a stable position.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates:
+    - `exact`: counts the aggregates, concurrently with the page query when
+        the engine has a connection pool.
+    - `estimated`: uses the table statistics or a cached count per filters.
+    - `none`: skips the count, the total is `None`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
     If a `None` value is provided to kwargs, all aggregates will be returned.
+
+    The `*_many` methods write the aggregates in batches of `batch_size`,
+    with one executemany statement per table and one commit per batch.
+
+    The `read_many` and `read_one` methods take the parameters of
+    `find_many` and `find_one` and return the rows as dicts, the related
+    rows as lists of dicts. They serve the read-only queries, no aggregate
+    is built.
+
+    The `iter_many` method takes the filters, `sort` and `fields` of
+    `find_many` and yields all the matching aggregates, streamed from a
+    server-side cursor in chunks of `chunk_size`, the `batch_size` by
+    default. The memory stays flat whatever the number of rows. The
+    `read_iter` method streams the rows as dicts, like `read_many`.
+
+    The `exists` and `get_ids` methods take the filters of `find_many` and
+    only select `1` or the ids, for the checks that don't need the
+    aggregates.
+
+    The `add_*` methods rely on the unique indexes and raise `AlreadyExists` on
+    a duplicate. The `upsert_many` method inserts the credentials, or updates
+    the ones with the same server id and username, which keep their id.
     """
 
-    def __init__(self, session: Session) -> None:
+    def __init__(
+        self, session: Session, batch_size: int | None = None
+    ) -> None:
         self._session = session
+        self._batch_size = batch_size or db.db_batch_size
 
     def find_many(
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         **kwargs,
     ) -> RepositoryPageDto:
         if limit is None:
@@ -83,45 +141,26 @@ class CredentialRepositoryImpl(CredentialRepository):
         if kwargs is None:
             kwargs = {}
         with self._session as session:
-            query = session.query(CredentialDbModel)
-            exclude = []
-            for attr in inspect(CredentialDbModel).attrs:
-                # If no fields are provided, load all.
-                if not fields:
-                    query = query.options(joinedload("*"))
-                # Else if the attribute is in the fields, load it.
-                elif attr.key in fields:
-                    if isinstance(attr, ColumnProperty):
-                        query = query.options(
-                            load_only(getattr(CredentialDbModel, attr.key))
-                        )
-                    if isinstance(attr, RelationshipProperty):
-                        query = query.options(joinedload(attr))
-                # Else if the attribute is not in the fields, exclude it.
-                else:
-                    exclude.append(attr.key)
-                # If the attribute is in the kwargs, filter by it.
-                if attr.key in kwargs:
-                    op, val = kwargs[attr.key].split(":")
-                    query = query.filter(
-                        FILTER_OPERATOR_MAPPER[op](
-                            CredentialDbModel, attr.key, val
-                        )
-                    )
-            # If the attribute is in the sort criteria, sort by it.
-            for criteria in sort:
-                attr, direction = criteria.split(":")
-                sorting = getattr(getattr(CredentialDbModel, attr), direction)
-                query = query.order_by(sorting())
-            total = query.count()
-            query = query.limit(limit=limit or total)
-            query = query.offset(offset=offset)
-            credentials = query.all()
-            return RepositoryPageDto(
-                _total=total,
+            # Aggregates are loaded to be changed, from the primary.
+            pin_primary(session)
+            plan, page = find_page(
+                session,
+                CredentialDbModel,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                sort=sort,
+                fields=fields,
+                count=count,
+                kwargs=kwargs,
+            )
+            return replace(
+                page,
                 _items=[
-                    Credential.from_dict(credential.to_dict(exclude=exclude))
-                    for credential in credentials
+                    Credential.from_dict(
+                        credential.to_dict(exclude=plan.exclude)
+                    )
+                    for credential in page._items
                 ],
             )
 
@@ -131,42 +170,135 @@ class CredentialRepositoryImpl(CredentialRepository):
         if fields is None:
             fields = []
         with self._session as session:
-            query = session.query(CredentialDbModel).filter(
-                CredentialDbModel.id == id
+            pin_primary(session)
+            plan = find_one_plan(CredentialDbModel, fields=fields)
+            credential = (
+                session.execute(plan.statement, {"id": id})
+                .unique()
+                .scalar_one_or_none()
             )
-            exclude = []
-            for attr in inspect(CredentialDbModel).attrs:
-                # If no fields are provided, load all.
-                if not fields:
-                    query = query.options(joinedload("*"))
-                # If the attribute is in the fields, load it.
-                elif attr.key in fields:
-                    if isinstance(attr, ColumnProperty):
-                        query = query.options(
-                            load_only(getattr(CredentialDbModel, attr.key))
-                        )
-                    if isinstance(attr, RelationshipProperty):
-                        query = query.options(joinedload(attr))
-                # If the attribute is not in the fields, exclude it.
-                else:
-                    exclude.append(attr.key)
-            credential = query.one_or_none()
             return (
-                Credential.from_dict(credential.to_dict(exclude=exclude))
+                Credential.from_dict(credential.to_dict(exclude=plan.exclude))
                 if credential
                 else None
             )
 
-    def add_one(self, aggregate: Credential) -> None:
+    def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        with self._session as session:
+            _, page = find_page(
+                session,
+                CredentialDbModel,
+                limit=limit or 0,
+                offset=offset or 0,
+                cursor=cursor,
+                sort=sort or [],
+                fields=fields or [],
+                count=count,
+                kwargs=kwargs,
+                rows=True,
+            )
+            return page
+
+    def read_one(
+        self, id: int, fields: list[str] | None = None
+    ) -> dict | None:
+        with self._session as session:
+            plan = find_one_plan(
+                CredentialDbModel, fields=fields or [], rows=True
+            )
+            credentials = read_rows(
+                session, CredentialDbModel, plan, {"id": id}
+            )
+            return credentials[0] if credentials else None
+
+    def exists(self, **kwargs) -> bool:
+        with self._session as session:
+            pin_primary(session)
+            filters = parse_filters(CredentialDbModel, kwargs)
+            plan = exists_plan(CredentialDbModel, filters)
+            return (
+                session.execute(
+                    plan.statement,
+                    query_parameters(CredentialDbModel, filters),
+                ).first()
+                is not None
+            )
+
+    def get_ids(self, **kwargs) -> list[str]:
         with self._session as session:
+            pin_primary(session)
+            filters = parse_filters(CredentialDbModel, kwargs)
+            plan = ids_plan(CredentialDbModel, filters)
+            return (
+                session.execute(
+                    plan.statement,
+                    query_parameters(CredentialDbModel, filters),
+                )
+                .scalars()
+                .all()
+            )
+
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[Credential]:
+        for credentials in self._iter_rows(sort, fields, chunk_size, kwargs):
+            yield from [
+                Credential.from_dict(credential) for credential in credentials
+            ]
+
+    def read_iter(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        for credentials in self._iter_rows(sort, fields, chunk_size, kwargs):
+            yield from credentials
+
+    def add_one(self, aggregate: Credential) -> None:
+        with self._session as session, already_exists(
+            "Credential for server id: {server_id!r} with username: {username!r} already exists".format(
+                server_id=aggregate.server_id.value,
+                username=aggregate.username,
+            )
+        ):
             model = CredentialDbModel.from_dict(aggregate.to_dict())
             session.add(model)
             session.commit()
 
     def update_one(self, aggregate: Credential) -> None:
-        with self._session as session:
-            model = CredentialDbModel.from_dict(aggregate.to_dict())
-            session.merge(model)
+        """Writes the credential in a single `UPDATE`.
+
+        Credentials don't record their changes, so all the columns are
+        written, but nothing is read back from the database.
+        """
+        values = column_values(CredentialDbModel, [aggregate.to_dict()])[0]
+        with self._session as session, already_exists(
+            "Credential for server id: {server_id!r} with username: {username!r} already exists".format(
+                server_id=aggregate.server_id.value,
+                username=aggregate.username,
+            )
+        ):
+            session.execute(
+                update(CredentialDbModel)
+                .where(CredentialDbModel.id == values.pop("id"))
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
             session.commit()
 
     def delete_one(self, id: int) -> None:
@@ -174,3 +306,89 @@ class CredentialRepositoryImpl(CredentialRepository):
             model = session.get(entity=CredentialDbModel, ident=id)
             session.delete(model)
             session.commit()
+
+    def add_many(self, aggregates: list[Credential]) -> None:
+        with self._session as session, already_exists(
+            "Credentials already exist"
+        ):
+            for batch in batched(aggregates, self._batch_size):
+                session.execute(
+                    insert(CredentialDbModel),
+                    column_values(
+                        CredentialDbModel,
+                        [aggregate.to_dict() for aggregate in batch],
+                    ),
+                )
+                session.commit()
+
+    def upsert_many(self, aggregates: list[Credential]) -> None:
+        with self._session as session:
+            plan = upsert_statement(session, CredentialDbModel)
+            for batch in batched(aggregates, self._batch_size):
+                session.execute(
+                    plan.statement,
+                    column_values(
+                        CredentialDbModel,
+                        [aggregate.to_dict() for aggregate in batch],
+                    ),
+                )
+                session.commit()
+
+    def update_many(self, aggregates: list[Credential]) -> None:
+        with self._session as session, already_exists(
+            "Credentials already exist"
+        ):
+            for batch in batched(aggregates, self._batch_size):
+                session.execute(
+                    update(CredentialDbModel),
+                    column_values(
+                        CredentialDbModel,
+                        [aggregate.to_dict() for aggregate in batch],
+                    ),
+                )
+                session.commit()
+
+    def discard_many(self, ids: list[str]) -> None:
+        with self._session as session:
+            for batch in batched(ids, self._batch_size):
+                session.execute(
+                    update(CredentialDbModel)
+                    .where(CredentialDbModel.id.in_(batch))
+                    .values(discarded=True)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+    def delete_many(self, ids: list[str]) -> None:
+        with self._session as session:
+            for batch in batched(ids, self._batch_size):
+                session.execute(
+                    delete(CredentialDbModel)
+                    .where(CredentialDbModel.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+    def _iter_rows(
+        self,
+        sort: list[str] | None,
+        fields: list[str] | None,
+        chunk_size: int | None,
+        kwargs: dict,
+    ) -> Iterator[list[dict]]:
+        with self._session as session:
+            filters = parse_filters(CredentialDbModel, kwargs)
+            plan = find_many_plan(
+                CredentialDbModel,
+                fields=fields or [],
+                filters=filters,
+                sort=sort or [],
+                rows=True,
+            )
+            yield from iter_rows(
+                session,
+                CredentialDbModel,
+                plan,
+                query_parameters(CredentialDbModel, filters),
+                chunk_size=chunk_size or self._batch_size,
+            )
@@ -1,24 +1,57 @@
 """Server repository implementation."""
 
-from sqlalchemy import inspect
-from sqlalchemy.orm import (
-    ColumnProperty,
-    RelationshipProperty,
-    Session,
-    joinedload,
-    load_only,
-)
+from collections.abc import Iterator
+from dataclasses import replace
+
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.orm import Session
 
 from st_server.server.domain.entities.server import Server
 from st_server.server.domain.repositories.server_repository import (
-    FILTER_OPERATOR_MAPPER,
     ServerRepository,
 )
+from st_server.server.infrastructure.mysql import db
+from st_server.server.infrastructure.mysql.models.credential import (
+    CredentialDbModel,
+)
 from st_server.server.infrastructure.mysql.models.server import ServerDbModel
+from st_server.server.infrastructure.mysql.models.server_application import (
+    ServerApplicationDbModel,
+)
+from st_server.server.infrastructure.mysql.query import (
+    already_exists,
+    batched,
+    changed_values,
+    column_values,
+    exists_plan,
+    find_many_plan,
+    find_one_plan,
+    find_page,
+    ids_plan,
+    iter_rows,
+    parse_filters,
+    query_parameters,
+    read_rows,
+    upsert_statement,
+    write_changes,
+)
+from st_server.server.infrastructure.mysql.replica import pin_primary
 from st_server.shared.domain.repositories.repository_page_dto import (
     RepositoryPageDto,
 )
 
+# The column changed by each domain event of a server.
+CHANGED_COLUMNS = {
+    Server.NameChanged: "name",
+    Server.CpuChanged: "cpu",
+    Server.RamChanged: "ram",
+    Server.HddChanged: "hdd",
+    Server.EnvironmentChanged: "environment",
+    Server.OperatingSystemChanged: "operating_system",
+    Server.StatusChanged: "status",
+    Server.Discarded: "discarded",
+}
+
 
 class ServerRepositoryImpl(ServerRepository):
     """Server repository implementation.
@@ -37,10 +70,15 @@ class ServerRepositoryImpl(ServerRepository):
     - `le`: less than or equal
     - `in`: in
     - `btw`: between
-    - `lk`: like
+    - `lk`: like, matches the value anywhere
+    - `sw` or `prefix`: starts with, can use an index
 
         Example: `{"name": "lk:John"}`
 
+    The discarded rows are excluded unless the `discarded` column is filtered
+    or `include_discarded=True` is given. Getting a row by its id includes
+    them.
+
     In the `find_many` method, the `sort` parameter is a list of strings with the
     field name and the sort criteria separated by a colon.
 
@@ -53,21 +91,63 @@ class ServerRepositoryImpl(ServerRepository):
     In the `find_many` method, the `fields` parameter is a list of strings with the
     field names to be loaded.
 
+    In the `find_many` method, the `cursor` parameter is the opaque
+    `_next_cursor` returned with the previous page. The page starts right
+    after the row the cursor points to and the offset is ignored. The rows
+    are always sorted by `id` after the given sort criteria, so every row
+    has a stable position.
+
+    In the `find_many` method, the `count` parameter is the strategy used to
+    count the total of aggregates:
+    - `exact`: counts the aggregates, concurrently with the page query when
+        the engine has a connection pool.
+    - `estimated`: uses the table statistics or a cached count per filters.
+    - `none`: skips the count, the total is `None`.
+
     If a `None` value is provided to limit, there will be no pagination.
     If a `Zero` value is provided to limit, no aggregates will be returned.
     If a `None` value is provided to offset, the first offset will be returned.
     If a `None` value is provided to kwargs, all aggregates will be returned.
+
+    The `*_many` methods write the aggregates in batches of `batch_size`,
+    with one executemany statement per table and one commit per batch.
+
+    The `read_many` and `read_one` methods take the parameters of
+    `find_many` and `find_one` and return the rows as dicts, the related
+    rows as lists of dicts. They serve the read-only queries, no aggregate
+    is built.
+
+    The `iter_many` method takes the filters, `sort` and `fields` of
+    `find_many` and yields all the matching aggregates, streamed from a
+    server-side cursor in chunks of `chunk_size`, the `batch_size` by
+    default. The memory stays flat whatever the number of rows. The
+    `read_iter` method streams the rows as dicts, like `read_many`.
+
+    The `exists` and `get_ids` methods take the filters of `find_many` and
+    only select `1` or the ids, for the checks that don't need the
+    aggregates.
+
+    The `add_*` methods rely on the unique indexes and raise `AlreadyExists` on
+    a duplicate. The `upsert_many` method inserts the servers, or updates the
+    ones with the same name, which keep their id. The credentials and
+    applications of the servers are replaced with the given ones, the
+    credentials keep their id by server and username.
     """
 
-    def __init__(self, session: Session) -> None:
+    def __init__(
+        self, session: Session, batch_size: int | None = None
+    ) -> None:
         self._session = session
+        self._batch_size = batch_size or db.db_batch_size
 
     def find_many(
         self,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         sort: list[str] | None = None,
         fields: list[str] | None = None,
+        count: str | None = None,
         **kwargs,
     ) -> RepositoryPageDto:
         if limit is None:
@@ -81,45 +161,24 @@ class ServerRepositoryImpl(ServerRepository):
         if kwargs is None:
             kwargs = {}
         with self._session as session:
-            query = session.query(ServerDbModel)
-            exclude = []
-            for attr in inspect(ServerDbModel).attrs:
-                # If no fields are provided, load all.
-                if not fields:
-                    query = query.options(joinedload("*"))
-                # Else if the attribute is in the fields, load it.
-                elif attr.key in fields:
-                    if isinstance(attr, ColumnProperty):
-                        query = query.options(
-                            load_only(getattr(ServerDbModel, attr.key))
-                        )
-                    if isinstance(attr, RelationshipProperty):
-                        query = query.options(joinedload(attr))
-                # Else if the attribute is not in the fields, exclude it.
-                else:
-                    exclude.append(attr.key)
-                # If the attribute is in the kwargs, filter by it.
-                if attr.key in kwargs:
-                    op, val = kwargs[attr.key].split(":")
-                    query = query.filter(
-                        FILTER_OPERATOR_MAPPER[op](
-                            ServerDbModel, attr.key, val
-                        )
-                    )
-            # If the attribute is in the sort criteria, sort by it.
-            for criteria in sort:
-                attr, direction = criteria.split(":")
-                sorting = getattr(getattr(ServerDbModel, attr), direction)
-                query = query.order_by(sorting())
-            total = query.count()
-            query = query.limit(limit=limit or total)
-            query = query.offset(offset=offset)
-            servers = query.all()
-            return RepositoryPageDto(
-                _total=total,
+            # Aggregates are loaded to be changed, from the primary.
+            pin_primary(session)
+            plan, page = find_page(
+                session,
+                ServerDbModel,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                sort=sort,
+                fields=fields,
+                count=count,
+                kwargs=kwargs,
+            )
+            return replace(
+                page,
                 _items=[
-                    Server.from_dict(server.to_dict(exclude=exclude))
-                    for server in servers
+                    Server.from_dict(server.to_dict(exclude=plan.exclude))
+                    for server in page._items
                 ],
             )
 
@@ -129,44 +188,347 @@ class ServerRepositoryImpl(ServerRepository):
         if fields is None:
             fields = []
         with self._session as session:
-            query = session.query(ServerDbModel).filter(ServerDbModel.id == id)
-            exclude = []
-            for attr in inspect(ServerDbModel).attrs:
-                # If no fields are provided, load all.
-                if not fields:
-                    query = query.options(joinedload("*"))
-                # If the attribute is in the fields, load it.
-                elif attr.key in fields:
-                    if isinstance(attr, ColumnProperty):
-                        query = query.options(
-                            load_only(getattr(ServerDbModel, attr.key))
-                        )
-                    if isinstance(attr, RelationshipProperty):
-                        query = query.options(joinedload(attr))
-                # If the attribute is not in the fields, exclude it.
-                else:
-                    exclude.append(attr.key)
-            server = query.one_or_none()
+            pin_primary(session)
+            plan = find_one_plan(ServerDbModel, fields=fields)
+            server = (
+                session.execute(plan.statement, {"id": id})
+                .unique()
+                .scalar_one_or_none()
+            )
             return (
-                Server.from_dict(server.to_dict(exclude=exclude))
+                Server.from_dict(server.to_dict(exclude=plan.exclude))
                 if server
                 else None
             )
 
-    def add_one(self, aggregate: Server) -> None:
+    def read_many(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        count: str | None = None,
+        **kwargs,
+    ) -> RepositoryPageDto:
+        with self._session as session:
+            _, page = find_page(
+                session,
+                ServerDbModel,
+                limit=limit or 0,
+                offset=offset or 0,
+                cursor=cursor,
+                sort=sort or [],
+                fields=fields or [],
+                count=count,
+                kwargs=kwargs,
+                rows=True,
+            )
+            return page
+
+    def read_one(
+        self, id: int, fields: list[str] | None = None
+    ) -> dict | None:
+        with self._session as session:
+            plan = find_one_plan(ServerDbModel, fields=fields or [], rows=True)
+            servers = read_rows(session, ServerDbModel, plan, {"id": id})
+            return servers[0] if servers else None
+
+    def exists(self, **kwargs) -> bool:
+        with self._session as session:
+            pin_primary(session)
+            filters = parse_filters(ServerDbModel, kwargs)
+            plan = exists_plan(ServerDbModel, filters)
+            return (
+                session.execute(
+                    plan.statement, query_parameters(ServerDbModel, filters)
+                ).first()
+                is not None
+            )
+
+    def get_ids(self, **kwargs) -> list[str]:
         with self._session as session:
+            pin_primary(session)
+            filters = parse_filters(ServerDbModel, kwargs)
+            plan = ids_plan(ServerDbModel, filters)
+            return (
+                session.execute(
+                    plan.statement, query_parameters(ServerDbModel, filters)
+                )
+                .scalars()
+                .all()
+            )
+
+    def iter_many(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[Server]:
+        for servers in self._iter_rows(sort, fields, chunk_size, kwargs):
+            yield from [Server.from_dict(server) for server in servers]
+
+    def read_iter(
+        self,
+        sort: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        for servers in self._iter_rows(sort, fields, chunk_size, kwargs):
+            yield from servers
+
+    def add_one(self, aggregate: Server) -> None:
+        with self._session as session, already_exists(
+            "Server with name: {name!r} already exists".format(
+                name=aggregate.name
+            )
+        ):
             model = ServerDbModel.from_dict(aggregate.to_dict())
             session.add(model)
             session.commit()
 
     def update_one(self, aggregate: Server) -> None:
-        with self._session as session:
-            model = ServerDbModel.from_dict(aggregate.to_dict())
-            session.merge(model)
+        """Writes the changes recorded by the domain events of the server.
+
+        Only the changed columns are updated, in a single `UPDATE`, and only
+        the changed credentials and applications are written. Nothing is
+        read back from the database.
+        """
+        values = changed_values(
+            aggregate.to_dict(), aggregate.domain_events, CHANGED_COLUMNS
+        )
+        with self._session as session, already_exists(
+            "Server with name: {name!r} already exists".format(
+                name=aggregate.name
+            )
+        ):
+            if values:
+                session.execute(
+                    update(ServerDbModel)
+                    .where(ServerDbModel.id == aggregate.id.value)
+                    .values(values)
+                    .execution_options(synchronize_session=False)
+                )
+            self._write_children(session, aggregate)
             session.commit()
 
     def delete_one(self, id: int) -> None:
+        # The children are deleted the same way as in `delete_many`.
+        self.delete_many(ids=[id])
+
+    def add_many(self, aggregates: list[Server]) -> None:
+        with self._session as session, already_exists("Servers already exist"):
+            for batch in batched(aggregates, self._batch_size):
+                servers = [aggregate.to_dict() for aggregate in batch]
+                session.execute(
+                    insert(ServerDbModel),
+                    column_values(ServerDbModel, servers),
+                )
+                self._insert_children(session, servers)
+                session.commit()
+
+    def upsert_many(self, aggregates: list[Server]) -> None:
         with self._session as session:
-            model = session.get(entity=ServerDbModel, ident=id)
-            session.delete(model)
-            session.commit()
+            servers_plan = upsert_statement(session, ServerDbModel)
+            credentials_plan = upsert_statement(session, CredentialDbModel)
+            for batch in batched(aggregates, self._batch_size):
+                servers = [aggregate.to_dict() for aggregate in batch]
+                session.execute(
+                    servers_plan.statement,
+                    column_values(ServerDbModel, servers),
+                )
+                # The servers already stored keep their id, their children
+                # are written under it.
+                ids = dict(
+                    session.execute(
+                        select(ServerDbModel.name, ServerDbModel.id).where(
+                            ServerDbModel.name.in_(
+                                [server["name"] for server in servers]
+                            )
+                        )
+                    ).all()
+                )
+                for server in servers:
+                    for child in (
+                        server["credentials"] + server["applications"]
+                    ):
+                        child["server_id"] = ids[server["name"]]
+                credentials = [
+                    credential
+                    for server in servers
+                    for credential in server["credentials"]
+                ]
+                applications = [
+                    application
+                    for server in servers
+                    for application in server["applications"]
+                ]
+                if credentials:
+                    session.execute(
+                        credentials_plan.statement,
+                        column_values(CredentialDbModel, credentials),
+                    )
+                session.execute(
+                    delete(CredentialDbModel)
+                    .where(
+                        CredentialDbModel.server_id.in_(ids.values()),
+                        tuple_(
+                            CredentialDbModel.server_id,
+                            CredentialDbModel.username,
+                        ).not_in(
+                            [
+                                (
+                                    credential["server_id"],
+                                    credential["username"],
+                                )
+                                for credential in credentials
+                            ]
+                        ),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                session.execute(
+                    delete(ServerApplicationDbModel)
+                    .where(
+                        ServerApplicationDbModel.server_id.in_(ids.values())
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if applications:
+                    session.execute(
+                        insert(ServerApplicationDbModel),
+                        column_values(ServerApplicationDbModel, applications),
+                    )
+                session.commit()
+
+    def update_many(self, aggregates: list[Server]) -> None:
+        with self._session as session, already_exists("Servers already exist"):
+            for batch in batched(aggregates, self._batch_size):
+                servers = [aggregate.to_dict() for aggregate in batch]
+                ids = [server["id"] for server in servers]
+                session.execute(
+                    update(ServerDbModel),
+                    column_values(ServerDbModel, servers),
+                )
+                # The children are replaced by the ones of the aggregates.
+                session.execute(
+                    delete(CredentialDbModel)
+                    .where(CredentialDbModel.server_id.in_(ids))
+                    .execution_options(synchronize_session=False)
+                )
+                session.execute(
+                    delete(ServerApplicationDbModel)
+                    .where(ServerApplicationDbModel.server_id.in_(ids))
+                    .execution_options(synchronize_session=False)
+                )
+                self._insert_children(session, servers)
+                session.commit()
+
+    def discard_many(self, ids: list[str]) -> None:
+        with self._session as session:
+            for batch in batched(ids, self._batch_size):
+                session.execute(
+                    update(ServerDbModel)
+                    .where(ServerDbModel.id.in_(batch))
+                    .values(discarded=True)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+    def delete_many(self, ids: list[str]) -> None:
+        with self._session as session:
+            for batch in batched(ids, self._batch_size):
+                # The children go first, their foreign keys don't cascade.
+                session.execute(
+                    delete(CredentialDbModel)
+                    .where(CredentialDbModel.server_id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                session.execute(
+                    delete(ServerApplicationDbModel)
+                    .where(ServerApplicationDbModel.server_id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                session.execute(
+                    delete(ServerDbModel)
+                    .where(ServerDbModel.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+
+    def _write_children(self, session: Session, aggregate: Server) -> None:
+        # The collection events carry the changes, applied in order.
+        for domain_event in aggregate.domain_events:
+            if isinstance(domain_event, Server.CredentialChanged):
+                write_changes(
+                    session,
+                    CredentialDbModel,
+                    "id",
+                    added=domain_event.added,
+                    removed=domain_event.removed,
+                    modified=domain_event.modified,
+                )
+            elif isinstance(domain_event, Server.ApplicationChanged):
+                write_changes(
+                    session,
+                    ServerApplicationDbModel,
+                    "application_id",
+                    added=domain_event.added,
+                    removed=domain_event.removed,
+                    modified=[
+                        {"server_id": aggregate.id.value, **application}
+                        for application in domain_event.modified
+                    ],
+                    where=(
+                        ServerApplicationDbModel.server_id
+                        == aggregate.id.value,
+                    ),
+                )
+
+    def _insert_children(self, session: Session, servers: list[dict]) -> None:
+        credentials = [
+            credential
+            for server in servers
+            for credential in server["credentials"]
+        ]
+        applications = [
+            application
+            for server in servers
+            for application in server["applications"]
+        ]
+        if credentials:
+            session.execute(
+                insert(CredentialDbModel),
+                column_values(CredentialDbModel, credentials),
+            )
+        if applications:
+            session.execute(
+                insert(ServerApplicationDbModel),
+                column_values(ServerApplicationDbModel, applications),
+            )
+
+    def _iter_rows(
+        self,
+        sort: list[str] | None,
+        fields: list[str] | None,
+        chunk_size: int | None,
+        kwargs: dict,
+    ) -> Iterator[list[dict]]:
+        with self._session as session:
+            filters = parse_filters(ServerDbModel, kwargs)
+            plan = find_many_plan(
+                ServerDbModel,
+                fields=fields or [],
+                filters=filters,
+                sort=sort or [],
+                rows=True,
+            )
+            yield from iter_rows(
+                session,
+                ServerDbModel,
+                plan,
+                query_parameters(ServerDbModel, filters),
+                chunk_size=chunk_size or self._batch_size,
+            )
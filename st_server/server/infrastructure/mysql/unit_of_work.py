@@ -0,0 +1,267 @@
+"""Unit of work implementations."""
+
+import asyncio
+import json
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    message,
+)
+from st_server.server.infrastructure.mysql.models.outbox import OutboxDbModel
+from st_server.server.infrastructure.mysql.replica import pin_primary
+from st_server.server.infrastructure.mysql.repositories.application_repository import (
+    ApplicationRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.repositories.async_application_repository import (
+    AsyncApplicationRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.repositories.async_credential_repository import (
+    AsyncCredentialRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.repositories.async_server_repository import (
+    AsyncServerRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.repositories.credential_repository import (
+    CredentialRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.repositories.server_repository import (
+    ServerRepositoryImpl,
+)
+from st_server.shared.domain.repositories.unit_of_work import (
+    AsyncUnitOfWork,
+    UnitOfWork,
+)
+from st_server.shared.domain.value_objects.domain_event import DomainEvent
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWorkSession:
+    """Session of the repositories of a unit of work.
+
+    The repositories enter their session and commit it on every call. While
+    the unit of work is active, entering returns the shared session without
+    closing it afterwards, and committing only flushes. The repositories see
+    each other's writes and the unit of work commits once. Otherwise it is
+    the session itself.
+    """
+
+    def __init__(self, session: Session, depth: int = 0) -> None:
+        self._session = session
+        self.depth = depth
+
+    def __enter__(self):
+        if self.depth:
+            return self
+        return self._session.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if not self.depth:
+            self._session.__exit__(exc_type, exc_value, traceback)
+
+    def commit(self) -> None:
+        self._session.flush()
+        # The bulk updates skip the identity map, the objects loaded before
+        # them are read again on their next access.
+        self._session.expire_all()
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
+
+
+class AsyncUnitOfWorkSession:
+    """Async session of the repositories of an async unit of work.
+
+    The async repositories run the sync ones through `run_sync`, which get
+    a `UnitOfWorkSession` over the sync session.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+        self.depth = 0
+
+    async def run_sync(self, call: callable):
+        return await self._session.run_sync(
+            lambda session: call(UnitOfWorkSession(session, depth=self.depth))
+        )
+
+
+class UnitOfWorkImpl(UnitOfWork):
+    """Unit of work over a SQLAlchemy session.
+
+    The server, credential and application repositories share the session,
+    one transaction and one connection per service call. The unit of work
+    doesn't close the session, it lives as long as the request.
+
+    The units of work can be nested, only the outermost one commits. A
+    commit that fails is rolled back.
+
+    The domain events added to the unit of work are written to the outbox
+    in the same transaction, see `add_events`, and the callbacks added with
+    `after_commit` are called once it commits.
+    """
+
+    def __init__(
+        self, session: Session, batch_size: int | None = None
+    ) -> None:
+        self._session = session
+        self._shared = UnitOfWorkSession(session)
+        self._events: list[DomainEvent] = []
+        self._callbacks: list[callable] = []
+        self.servers = ServerRepositoryImpl(
+            session=self._shared, batch_size=batch_size
+        )
+        self.credentials = CredentialRepositoryImpl(
+            session=self._shared, batch_size=batch_size
+        )
+        self.applications = ApplicationRepositoryImpl(
+            session=self._shared, batch_size=batch_size
+        )
+
+    def add_events(self, domain_events: list[DomainEvent]) -> None:
+        """Adds the domain events written to the outbox on commit.
+
+        Raises `RuntimeError` outside a `with` block, the events would be
+        written without their aggregate.
+        """
+        _check_active(self._shared.depth)
+        self._events.extend(domain_events)
+
+    def after_commit(self, callback: callable) -> None:
+        """Adds a callback called once the transaction commits.
+
+        The callbacks are dropped when the transaction is rolled back, and
+        their errors are logged, the transaction being committed already.
+        """
+        _check_active(self._shared.depth)
+        self._callbacks.append(callback)
+
+    def begin(self) -> None:
+        # Read-modify-writes read from the primary, not a lagging replica.
+        pin_primary(self._session)
+        self._shared.depth += 1
+
+    def commit(self) -> None:
+        self._shared.depth -= 1
+        if not self._shared.depth:
+            events, self._events = self._events, []
+            callbacks, self._callbacks = self._callbacks, []
+            try:
+                if events:
+                    self._session.execute(
+                        insert(OutboxDbModel), outbox_rows(events)
+                    )
+                self._session.commit()
+            except Exception:
+                # `__exit__` doesn't roll back a failed commit.
+                self._session.rollback()
+                raise
+            _call(callbacks)
+
+    def rollback(self) -> None:
+        self._shared.depth -= 1
+        if not self._shared.depth:
+            self._events = []
+            self._callbacks = []
+            self._session.rollback()
+
+
+class AsyncUnitOfWorkImpl(AsyncUnitOfWork):
+    """Async unit of work over a SQLAlchemy async session.
+
+    Same behaviour as `UnitOfWorkImpl`, for the async repositories.
+    """
+
+    def __init__(
+        self, session: AsyncSession, batch_size: int | None = None
+    ) -> None:
+        self._session = session
+        self._shared = AsyncUnitOfWorkSession(session)
+        self._events: list[DomainEvent] = []
+        self._callbacks: list[callable] = []
+        self.servers = AsyncServerRepositoryImpl(
+            session=self._shared, batch_size=batch_size
+        )
+        self.credentials = AsyncCredentialRepositoryImpl(
+            session=self._shared, batch_size=batch_size
+        )
+        self.applications = AsyncApplicationRepositoryImpl(
+            session=self._shared, batch_size=batch_size
+        )
+
+    def add_events(self, domain_events: list[DomainEvent]) -> None:
+        """Adds the domain events written to the outbox on commit."""
+        _check_active(self._shared.depth)
+        self._events.extend(domain_events)
+
+    def after_commit(self, callback: callable) -> None:
+        """Adds a callback called once the transaction commits.
+
+        The callbacks are called on a thread, not on the event loop.
+        """
+        _check_active(self._shared.depth)
+        self._callbacks.append(callback)
+
+    def begin(self) -> None:
+        pin_primary(self._session.sync_session)
+        self._shared.depth += 1
+
+    async def commit(self) -> None:
+        self._shared.depth -= 1
+        if not self._shared.depth:
+            events, self._events = self._events, []
+            callbacks, self._callbacks = self._callbacks, []
+            try:
+                if events:
+                    await self._session.execute(
+                        insert(OutboxDbModel), outbox_rows(events)
+                    )
+                await self._session.commit()
+            except Exception:
+                await self._session.rollback()
+                raise
+            if callbacks:
+                # A callback may block, e.g. on a full queue, off the loop.
+                await asyncio.to_thread(_call, callbacks)
+
+    async def rollback(self) -> None:
+        self._shared.depth -= 1
+        if not self._shared.depth:
+            self._events = []
+            self._callbacks = []
+            await self._session.rollback()
+
+
+def outbox_rows(domain_events: list[DomainEvent]) -> list[dict]:
+    """Returns the outbox rows of the domain events, as routed to RabbitMQ."""
+    rows = []
+    for domain_event in domain_events:
+        exchange, routing_key, body = message(domain_event)
+        rows.append(
+            {
+                "exchange": exchange,
+                "routing_key": routing_key,
+                "body": json.dumps(body),
+                "occurred_on": domain_event.occurred_on,
+            }
+        )
+    return rows
+
+
+def _call(callbacks: list[callable]) -> None:
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("After commit callback %r failed", callback)
+
+
+def _check_active(depth: int) -> None:
+    if not depth:
+        raise RuntimeError(
+            "The domain events are added within a unit of work block"
+        )
@@ -3,6 +3,9 @@
 from fastapi import FastAPI
 from fastapi.middleware import cors
 
+from st_server.server.infrastructure.message_bus.background_message_bus import (
+    close_background_message_bus,
+)
 from st_server.server.interface.api.routers.application import (
     router as application_router,
 )
@@ -15,6 +18,9 @@ from st_server.server.interface.api.routers.server import (
 
 app = FastAPI()
 
+# Publishes the queued domain events before the process exits.
+app.add_event_handler("shutdown", close_background_message_bus)
+
 app.add_middleware(
     cors.CORSMiddleware,
     allow_origins=["*"],
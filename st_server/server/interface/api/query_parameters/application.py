@@ -11,3 +11,4 @@ class ApplicationQueryParameter(BaseModel):
     version: str | None = None
     architect: str | None = None
     discarded: bool | None = None
+    include_discarded: bool | None = None
@@ -16,3 +16,4 @@ class CredentialQueryParameter(BaseModel):
     public_ip: str | None = None
     public_port: str | None = None
     discarded: bool | None = None
+    include_discarded: bool | None = None
@@ -14,3 +14,4 @@ class ServerQueryParameter(BaseModel):
     ram: str | None = None
     hdd: str | None = None
     discarded: bool | None = None
+    include_discarded: bool | None = None
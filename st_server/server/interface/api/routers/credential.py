@@ -4,15 +4,33 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.concurrency import run_in_threadpool
 
+from st_server.server.application.dtos.credential import CredentialReadDto
+from st_server.server.application.services.async_credential import (
+    AsyncCredentialService,
+)
 from st_server.server.application.services.credential import CredentialService
-from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
-    RabbitMQMessageBus,
+from st_server.server.infrastructure.message_bus import (
+    config as message_bus_config,
+)
+from st_server.server.infrastructure.message_bus.after_commit_message_bus import (
+    AfterCommitMessageBus,
+)
+from st_server.server.infrastructure.message_bus.background_message_bus import (
+    background_message_bus,
+)
+from st_server.server.infrastructure.message_bus.outbox_message_bus import (
+    OutboxMessageBus,
 )
 from st_server.server.infrastructure.mysql import db
 from st_server.server.infrastructure.mysql.repositories.credential_repository import (
     CredentialRepositoryImpl,
 )
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+    UnitOfWorkImpl,
+)
 from st_server.server.interface.api.query_parameters.credential import (
     CredentialQueryParameter,
 )
@@ -29,67 +47,143 @@ from st_server.shared.application.exceptions import (
     PaginationError,
     SortError,
 )
+from st_server.shared.helper.client import client_key
+from st_server.shared.helper.concurrency import run_service
+from st_server.shared.helper.export import (
+    EXPORT_FORMAT_PATTERN,
+    export_response,
+)
+from st_server.shared.helper.fields import encode_fields
 
 router = APIRouter()
 auth_scheme = HTTPBearer()
 
 
-def get_db_session():
-    """Yields a database session."""
-    session = db.SessionLocal()
+async def get_db_session(request: Request):
+    """Yields a database session, async when `[database] async` is enabled.
+
+    The client is identified by a hash of its access token, or its address,
+    for the read-your-writes window of the replicas.
+    """
+    info = {"client": client_key(request)}
+    if db.db_async:
+        async with db.AsyncSessionLocal(info=info) as session:
+            yield session
+        return
+    session = db.SessionLocal(info=info)
     try:
         yield session
     finally:
-        session.close()
+        await run_in_threadpool(session.close)
+
+
+def get_unit_of_work(session: db.SessionLocal = Depends(get_db_session)):
+    """Yields the unit of work of the request."""
+    if db.db_async:
+        yield AsyncUnitOfWorkImpl(session=session)
+    else:
+        yield UnitOfWorkImpl(session=session)
 
 
 def get_credential_repository(
-    session: db.SessionLocal = Depends(get_db_session),
+    unit_of_work: UnitOfWorkImpl = Depends(get_unit_of_work),
 ):
-    """Yields a Credential repository."""
-    yield CredentialRepositoryImpl(session=session)
+    """Yields a Credential repository of the unit of work."""
+    yield unit_of_work.credentials
 
 
-def get_message_bus():
-    """Yields a message bus."""
-    yield RabbitMQMessageBus(
-        host="localhost", port=5672, username="admin", password="admin"
-    )
+def get_export_session(request: Request):
+    """Yields a sync database session for the exports.
+
+    The exports stream the rows from a server-side cursor through the sync
+    repository, whatever `[database] async` is.
+    """
+    session = db.SessionLocal(info={"client": client_key(request)})
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def get_message_bus(unit_of_work: UnitOfWorkImpl = Depends(get_unit_of_work)):
+    """Yields a message bus writing the domain events to the outbox.
+
+    With `[message_bus] publisher = background`, yields the background
+    message bus of the process instead, once the unit of work commits.
+    """
+    if message_bus_config.message_bus_publisher == "background":
+        yield AfterCommitMessageBus(
+            message_bus=background_message_bus(),
+            unit_of_work=unit_of_work,
+        )
+    else:
+        yield OutboxMessageBus(unit_of_work=unit_of_work)
 
 
 def get_credential_service(
     repository: CredentialRepositoryImpl = Depends(get_credential_repository),
-    message_bus: RabbitMQMessageBus = Depends(get_message_bus),
+    message_bus: OutboxMessageBus = Depends(get_message_bus),
+    unit_of_work: UnitOfWorkImpl = Depends(get_unit_of_work),
 ):
     """Yields a Credential service."""
-    yield CredentialService(repository=repository, message_bus=message_bus)
+    if db.db_async:
+        yield AsyncCredentialService(
+            repository=repository,
+            message_bus=message_bus,
+            unit_of_work=unit_of_work,
+        )
+    else:
+        yield CredentialService(
+            repository=repository,
+            message_bus=message_bus,
+            unit_of_work=unit_of_work,
+        )
+
+
+def get_credential_export_service(
+    session: db.SessionLocal = Depends(get_export_session),
+):
+    """Yields a Credential service for the exports.
+
+    The exports only read through the export session, without a unit of
+    work or a message bus.
+    """
+    yield CredentialService(
+        repository=CredentialRepositoryImpl(session=session),
+        message_bus=None,
+    )
 
 
 @router.get("", response_model=list[CredentialRead])
-def get_all(
+async def get_all(
     limit: int = Query(default=25),
     offset: int = Query(default=0),
+    cursor: str | None = Query(default=None),
     sort: list[str] | None = Query(default=None),
     filter: CredentialQueryParameter = Depends(),
     fields: list[str] | None = Query(default=None),
+    count: str = Query(default="exact"),
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
     request: Request = None,
     credential_service: CredentialService = Depends(get_credential_service),
 ):
     """Route to get all Credentials."""
     try:
-        credentials = credential_service.find_many(
+        credentials = await run_service(
+            credential_service.find_many,
             fields=fields,
             limit=limit,
             offset=offset,
+            cursor=cursor,
             sort=sort,
+            count=count,
             **filter.model_dump(exclude_none=True),
             access_token=authorization.credentials,
         )
         if not credentials._items:
             raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
         return JSONResponse(
-            content=jsonable_encoder(obj=credentials),
+            content=encode_fields(credentials, fields=fields),
             status_code=status.HTTP_200_OK,
         )
     except AuthenticationError as e:
@@ -110,8 +204,48 @@ def get_all(
         )
 
 
+@router.get("/export")
+async def export(
+    format: str = Query(default="ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    sort: list[str] | None = Query(default=None),
+    filter: CredentialQueryParameter = Depends(),
+    fields: list[str] | None = Query(default=None),
+    authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    credential_service: CredentialService = Depends(
+        get_credential_export_service
+    ),
+):
+    """Route to export all Credentials as NDJSON or CSV, streamed."""
+    try:
+        credentials = credential_service.iter_many(
+            sort=sort,
+            fields=fields,
+            **filter.model_dump(exclude_none=True),
+            access_token=authorization.credentials,
+        )
+        return await export_response(
+            credentials,
+            dto=CredentialReadDto,
+            format=format,
+            fields=fields,
+            filename="credentials",
+        )
+    except AuthenticationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
+        )
+    except SortError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+    except FilterError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+
+
 @router.get("/{id}", response_model=CredentialRead)
-def get(
+async def get(
     id: str,
     fields: list[str] | None = Query(default=None),
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
@@ -119,10 +253,13 @@ def get(
 ):
     """Route to get an Credential by id."""
     try:
-        credential = credential_service.find_one(
-            id=id, fields=fields, access_token=authorization.credentials
+        credential = await run_service(
+            credential_service.find_one,
+            id=id,
+            fields=fields,
+            access_token=authorization.credentials,
         )
-        return JSONResponse(content=jsonable_encoder(obj=credential))
+        return JSONResponse(content=encode_fields(credential, fields=fields))
     except AuthenticationError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
@@ -134,14 +271,15 @@ def get(
 
 
 @router.post("", response_model=CredentialRead)
-def create(
+async def create(
     credential_in: CredentialCreate,
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
     credential_service: CredentialService = Depends(get_credential_service),
 ):
     """Route to create an Credential."""
     try:
-        credential = credential_service.add_one(
+        credential = await run_service(
+            credential_service.add_one,
             data=credential_in.to_dict(),
             access_token=authorization.credentials,
         )
@@ -168,7 +306,7 @@ def create(
 
 
 @router.put("/{id}", response_model=CredentialRead)
-def update(
+async def update(
     id: str,
     credential_in: CredentialUpdate,
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
@@ -176,7 +314,8 @@ def update(
 ):
     """Route to update an Credential."""
     try:
-        credential = credential_service.update_one(
+        credential = await run_service(
+            credential_service.update_one,
             id=id,
             data=credential_in.to_dict(),
             access_token=authorization.credentials,
@@ -208,15 +347,17 @@ def update(
 
 
 @router.delete("/{id}")
-def discard(
+async def discard(
     id: str,
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
     credential_service: CredentialService = Depends(get_credential_service),
 ):
     """Route to discard an Credential."""
     try:
-        credential_service.discard_one(
-            id=id, access_token=authorization.credentials
+        await run_service(
+            credential_service.discard_one,
+            id=id,
+            access_token=authorization.credentials,
         )
         return JSONResponse(
             content=jsonable_encoder(obj={"message": "Server deleted"}),
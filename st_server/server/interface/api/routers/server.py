@@ -5,15 +5,33 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt.exceptions import ExpiredSignatureError
+from starlette.concurrency import run_in_threadpool
 
+from st_server.server.application.dtos.server import ServerReadDto
+from st_server.server.application.services.async_server import (
+    AsyncServerService,
+)
 from st_server.server.application.services.server import ServerService
-from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
-    RabbitMQMessageBus,
+from st_server.server.infrastructure.message_bus import (
+    config as message_bus_config,
+)
+from st_server.server.infrastructure.message_bus.after_commit_message_bus import (
+    AfterCommitMessageBus,
+)
+from st_server.server.infrastructure.message_bus.background_message_bus import (
+    background_message_bus,
+)
+from st_server.server.infrastructure.message_bus.outbox_message_bus import (
+    OutboxMessageBus,
 )
 from st_server.server.infrastructure.mysql import db
 from st_server.server.infrastructure.mysql.repositories.server_repository import (
     ServerRepositoryImpl,
 )
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+    UnitOfWorkImpl,
+)
 from st_server.server.interface.api.query_parameters.server import (
     ServerQueryParameter,
 )
@@ -30,65 +48,143 @@ from st_server.shared.application.exceptions import (
     PaginationError,
     SortError,
 )
+from st_server.shared.helper.client import client_key
+from st_server.shared.helper.concurrency import run_service
+from st_server.shared.helper.export import (
+    EXPORT_FORMAT_PATTERN,
+    export_response,
+)
+from st_server.shared.helper.fields import encode_fields
 
 router = APIRouter()
 auth_scheme = HTTPBearer()
 
 
-def get_db_session():
-    """Yields a database session."""
-    session = db.SessionLocal()
+async def get_db_session(request: Request):
+    """Yields a database session, async when `[database] async` is enabled.
+
+    The client is identified by a hash of its access token, or its address,
+    for the read-your-writes window of the replicas.
+    """
+    info = {"client": client_key(request)}
+    if db.db_async:
+        async with db.AsyncSessionLocal(info=info) as session:
+            yield session
+        return
+    session = db.SessionLocal(info=info)
     try:
         yield session
     finally:
-        session.close()
+        await run_in_threadpool(session.close)
 
 
-def get_server_repository(session: db.SessionLocal = Depends(get_db_session)):
-    """Yields a Server repository."""
-    yield ServerRepositoryImpl(session=session)
+def get_unit_of_work(session: db.SessionLocal = Depends(get_db_session)):
+    """Yields the unit of work of the request."""
+    if db.db_async:
+        yield AsyncUnitOfWorkImpl(session=session)
+    else:
+        yield UnitOfWorkImpl(session=session)
 
 
-def get_message_bus():
-    """Yields a message bus."""
-    yield RabbitMQMessageBus(
-        host="localhost", port=5672, username="admin", password="admin"
-    )
+def get_server_repository(
+    unit_of_work: UnitOfWorkImpl = Depends(get_unit_of_work),
+):
+    """Yields a Server repository of the unit of work."""
+    yield unit_of_work.servers
+
+
+def get_export_session(request: Request):
+    """Yields a sync database session for the exports.
+
+    The exports stream the rows from a server-side cursor through the sync
+    repository, whatever `[database] async` is.
+    """
+    session = db.SessionLocal(info={"client": client_key(request)})
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def get_message_bus(unit_of_work: UnitOfWorkImpl = Depends(get_unit_of_work)):
+    """Yields a message bus writing the domain events to the outbox.
+
+    With `[message_bus] publisher = background`, yields the background
+    message bus of the process instead, once the unit of work commits.
+    """
+    if message_bus_config.message_bus_publisher == "background":
+        yield AfterCommitMessageBus(
+            message_bus=background_message_bus(),
+            unit_of_work=unit_of_work,
+        )
+    else:
+        yield OutboxMessageBus(unit_of_work=unit_of_work)
 
 
 def get_server_service(
     repository: ServerRepositoryImpl = Depends(get_server_repository),
-    message_bus: RabbitMQMessageBus = Depends(get_message_bus),
+    message_bus: OutboxMessageBus = Depends(get_message_bus),
+    unit_of_work: UnitOfWorkImpl = Depends(get_unit_of_work),
 ):
     """Yields a Server service."""
-    yield ServerService(repository=repository, message_bus=message_bus)
+    if db.db_async:
+        yield AsyncServerService(
+            repository=repository,
+            message_bus=message_bus,
+            unit_of_work=unit_of_work,
+        )
+    else:
+        yield ServerService(
+            repository=repository,
+            message_bus=message_bus,
+            unit_of_work=unit_of_work,
+        )
+
+
+def get_server_export_service(
+    session: db.SessionLocal = Depends(get_export_session),
+):
+    """Yields a Server service for the exports.
+
+    The exports only read through the export session, without a unit of
+    work or a message bus.
+    """
+    yield ServerService(
+        repository=ServerRepositoryImpl(session=session),
+        message_bus=None,
+    )
 
 
 @router.get("", response_model=list[ServerRead])
-def get_all(
+async def get_all(
     limit: int = Query(default=25),
     offset: int = Query(default=0),
+    cursor: str | None = Query(default=None),
     sort: list[str] | None = Query(default=None),
     filter: ServerQueryParameter = Depends(),
     fields: list[str] | None = Query(default=None),
+    count: str = Query(default="exact"),
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
     request: Request = None,
     server_service: ServerService = Depends(get_server_service),
 ):
     """Route to get all Servers."""
     try:
-        servers = server_service.find_many(
+        servers = await run_service(
+            server_service.find_many,
             fields=fields,
             limit=limit,
             offset=offset,
+            cursor=cursor,
             sort=sort,
+            count=count,
             **filter.model_dump(exclude_none=True),
             access_token=authorization.credentials,
         )
         if not servers._items:
             raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
         return JSONResponse(
-            content=jsonable_encoder(obj=servers),
+            content=encode_fields(servers, fields=fields),
             status_code=status.HTTP_200_OK,
         )
     except ExpiredSignatureError as e:
@@ -113,8 +209,50 @@ def get_all(
         )
 
 
+@router.get("/export")
+async def export(
+    format: str = Query(default="ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    sort: list[str] | None = Query(default=None),
+    filter: ServerQueryParameter = Depends(),
+    fields: list[str] | None = Query(default=None),
+    authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    server_service: ServerService = Depends(get_server_export_service),
+):
+    """Route to export all Servers as NDJSON or CSV, streamed."""
+    try:
+        servers = server_service.iter_many(
+            sort=sort,
+            fields=fields,
+            **filter.model_dump(exclude_none=True),
+            access_token=authorization.credentials,
+        )
+        return await export_response(
+            servers,
+            dto=ServerReadDto,
+            format=format,
+            fields=fields,
+            filename="servers",
+        )
+    except ExpiredSignatureError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
+        )
+    except PermissionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
+        )
+    except SortError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+    except FilterError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+
+
 @router.get("/{id}", response_model=ServerRead)
-def get(
+async def get(
     id: str,
     fields: list[str] | None = Query(default=None),
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
@@ -122,10 +260,13 @@ def get(
 ):
     """Route to get a Server by id."""
     try:
-        server = server_service.find_one(
-            id=id, fields=fields, access_token=authorization.credentials
+        server = await run_service(
+            server_service.find_one,
+            id=id,
+            fields=fields,
+            access_token=authorization.credentials,
         )
-        return JSONResponse(content=jsonable_encoder(obj=server))
+        return JSONResponse(content=encode_fields(server, fields=fields))
     except AuthenticationError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
@@ -137,15 +278,17 @@ def get(
 
 
 @router.post("", response_model=ServerRead)
-def create(
+async def create(
     server_in: ServerCreate,
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
     server_service: ServerService = Depends(get_server_service),
 ):
     """Route to create a Server."""
     try:
-        server = server_service.add_one(
-            data=server_in.to_dict(), access_token=authorization.credentials
+        server = await run_service(
+            server_service.add_one,
+            data=server_in.to_dict(),
+            access_token=authorization.credentials,
         )
         return JSONResponse(
             content=jsonable_encoder(obj=server),
@@ -170,7 +313,7 @@ def create(
 
 
 @router.put("/{id}", response_model=ServerRead)
-def update(
+async def update(
     id: str,
     server_in: ServerUpdate,
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
@@ -178,7 +321,8 @@ def update(
 ):
     """Route to update a Server."""
     try:
-        server = server_service.update_one(
+        server = await run_service(
+            server_service.update_one,
             id=id,
             data=server_in.to_dict(),
             access_token=authorization.credentials,
@@ -210,15 +354,17 @@ def update(
 
 
 @router.delete("/{id}")
-def discard(
+async def discard(
     id: str,
     authorization: HTTPAuthorizationCredentials = Depends(auth_scheme),
     server_service: ServerService = Depends(get_server_service),
 ):
     """Route to discard a Server."""
     try:
-        server_service.discard_one(
-            id=id, access_token=authorization.credentials
+        await run_service(
+            server_service.discard_one,
+            id=id,
+            access_token=authorization.credentials,
         )
         return JSONResponse(
             content=jsonable_encoder(obj={"message": "Server deleted"}),
@@ -1,6 +1,6 @@
 """Server schema."""
 
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass
 
 
 @dataclass(frozen=True)
@@ -11,8 +11,9 @@ class ServerBase:
     hdd: str | None = None
     environment: str | None = None
     operating_system: dict | None = None
-    credentials: list = field(default_factory=list)
-    applications: list = field(default_factory=list)
+    # None leaves the collection as it is on update.
+    credentials: list | None = None
+    applications: list | None = None
     status: str | None = None
 
     def to_dict(self) -> dict:
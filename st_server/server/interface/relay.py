@@ -0,0 +1,50 @@
+"""Outbox relay process.
+
+Run it with `python -m st_server.server.interface.relay`.
+"""
+
+from datetime import timedelta
+
+from st_server.server.infrastructure.message_bus.config import (
+    broker_host,
+    broker_password,
+    broker_port,
+    broker_username,
+    message_bus_batch_size,
+    message_bus_content_type,
+    message_bus_flush_interval,
+    message_bus_outbox_retention_days,
+)
+from st_server.server.infrastructure.message_bus.outbox_relay import (
+    OutboxRelay,
+)
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    RabbitMQMessageBus,
+)
+from st_server.server.infrastructure.mysql import db
+
+# The exchanges of the aggregates publishing domain events.
+EXCHANGES = ["server", "credential", "application"]
+
+
+def main() -> None:
+    message_bus = RabbitMQMessageBus(
+        host=broker_host,
+        port=broker_port,
+        username=broker_username,
+        password=broker_password,
+        batch_size=message_bus_batch_size,
+        content_type=message_bus_content_type,
+    )
+    message_bus.declare_exchanges(exchanges=EXCHANGES)
+    OutboxRelay(
+        session_factory=db.SessionLocal,
+        message_bus=message_bus,
+        batch_size=message_bus_batch_size,
+        interval=message_bus_flush_interval,
+        retention=timedelta(days=message_bus_outbox_retention_days),
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
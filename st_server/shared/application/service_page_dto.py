@@ -7,9 +7,11 @@ from dataclasses import dataclass, field
 class ServicePageDto:
     """Dataclass to represent the paginated service response."""
 
-    _total: int
+    _total: int | None
     _limit: int
     _offset: int
     _prev_offset: int | None = None
     _next_offset: int | None = None
+    _cursor: str | None = None
+    _next_cursor: str | None = None
     _items: list = field(default_factory=list)
@@ -7,5 +7,6 @@ from st_server.shared.domain.entities.entity import Entity
 class RepositoryPageDto:
     """Dataclass to represent the response from the repository with pagination."""
 
-    _total: int
+    _total: int | None
     _items: list[Entity] = field(default_factory=list)
+    _next_cursor: str | None = None
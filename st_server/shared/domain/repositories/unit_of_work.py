@@ -0,0 +1,69 @@
+"""Unit of work interfaces."""
+
+from abc import ABCMeta, abstractmethod
+
+
+class UnitOfWork(metaclass=ABCMeta):
+    """Unit of work interface.
+
+    A unit of work spans one service call. Within its `with` block, the
+    repositories of the unit of work share one transaction, committed once
+    when the block exits, or rolled back when it raises.
+    """
+
+    def __enter__(self) -> "UnitOfWork":
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    @abstractmethod
+    def begin(self) -> None:
+        """Starts sharing the transaction between the repositories."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Commits the transaction."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def rollback(self) -> None:
+        """Rolls back the transaction."""
+        raise NotImplementedError
+
+
+class AsyncUnitOfWork(metaclass=ABCMeta):
+    """Async unit of work interface.
+
+    Same behaviour as `UnitOfWork`, with an `async with` block.
+    """
+
+    async def __aenter__(self) -> "AsyncUnitOfWork":
+        self.begin()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+
+    @abstractmethod
+    def begin(self) -> None:
+        """Starts sharing the transaction between the repositories."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def commit(self) -> None:
+        """Commits the transaction."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        """Rolls back the transaction."""
+        raise NotImplementedError
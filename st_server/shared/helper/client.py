@@ -0,0 +1,17 @@
+"""Identifies the client of a request."""
+
+import hashlib
+
+from fastapi import Request
+
+
+def client_key(request: Request) -> str | None:
+    """Returns the key of the client of the request.
+
+    The client is identified by a hash of its access token, or by its
+    address, so the tokens aren't kept in memory.
+    """
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else None
@@ -0,0 +1,16 @@
+"""Runs the sync and async services from async routes."""
+
+import inspect
+
+from starlette.concurrency import run_in_threadpool
+
+
+async def run_service(method: callable, *args, **kwargs):
+    """Calls a service method from an async route.
+
+    The async services are awaited on the event loop. The sync ones block on
+    the database, so they run in the thread pool.
+    """
+    if inspect.iscoroutinefunction(inspect.unwrap(method)):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
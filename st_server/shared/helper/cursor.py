@@ -0,0 +1,30 @@
+"""Encodes and decodes keyset pagination cursors."""
+
+import base64
+import binascii
+import json
+
+from st_server.shared.application.exceptions import PaginationError
+
+
+def encode_cursor(sort: list[str], values: list) -> str:
+    """Encodes the sort criteria and the values of the last row of a page."""
+    payload = json.dumps(
+        {"sort": sort, "values": values}, default=str, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: list[str] | None = None) -> list:
+    """Decodes a cursor and returns the values of the row it points to.
+
+    The cursor is only valid for the sort criteria it was issued with.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        cursor_sort, values = payload["sort"], payload["values"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise PaginationError("The cursor is not valid")
+    if cursor_sort != (sort or []):
+        raise PaginationError("The cursor does not match the sort criteria")
+    return values
@@ -0,0 +1,95 @@
+"""Streams exports as NDJSON or CSV."""
+
+import csv
+import dataclasses
+import io
+import itertools
+import json
+from collections.abc import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from st_server.shared.helper.fields import encode_fields
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_FORMAT_PATTERN = "^({})$".format("|".join(EXPORT_FORMATS))
+# Rows per chunk of the response, each chunk costs a hop to the threadpool.
+EXPORT_CHUNK_ROWS = 500
+
+
+def export_chunks(
+    items: Iterable,
+    dto: type,
+    format: str,
+    fields: list[str] | None = None,
+    size: int = EXPORT_CHUNK_ROWS,
+) -> Iterator[str]:
+    """Yields the DTOs encoded as NDJSON or CSV, `size` rows per chunk.
+
+    Only the `fields` are written when given, else every field of the DTO.
+    In CSV, the nested values are written as JSON.
+    """
+    columns = fields or [field.name for field in dataclasses.fields(dto)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    items = iter(items)
+    # The first item is read before anything is written, so an invalid
+    # filter fails the request instead of the stream.
+    first = next(items, None)
+    if format == "csv":
+        writer.writerow(columns)
+    rows = itertools.chain([first], items) if first is not None else ()
+    for count, item in enumerate(rows, start=1):
+        row = encode_fields(item, fields=columns)
+        if format == "csv":
+            writer.writerow(_csv_cell(row.get(column)) for column in columns)
+        else:
+            buffer.write(
+                json.dumps({column: row.get(column) for column in columns})
+            )
+            buffer.write("\n")
+        if count % size == 0:
+            yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
+
+
+async def export_response(
+    items: Iterable,
+    dto: type,
+    format: str,
+    fields: list[str] | None = None,
+    filename: str = "export",
+) -> StreamingResponse:
+    """Returns a response streaming the DTOs as NDJSON or CSV.
+
+    The first chunk is encoded before the response starts, so the errors of
+    the query are raised to the route.
+    """
+    chunks = export_chunks(items, dto=dto, format=format, fields=fields)
+    first = await run_in_threadpool(next, chunks, None)
+    return StreamingResponse(
+        content=itertools.chain([first], chunks) if first is not None else (),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": 'attachment; filename="{}.{}"'.format(
+                filename, format
+            )
+        },
+    )
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _drain(buffer: io.StringIO) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
@@ -0,0 +1,29 @@
+"""Encodes sparse fieldsets."""
+
+import dataclasses
+
+from fastapi.encoders import jsonable_encoder
+
+from st_server.shared.application.service_page_dto import ServicePageDto
+
+
+def encode_fields(obj, fields: list[str] | None = None):
+    """Returns the DTO, or the page of DTOs, encoded with only the `fields`.
+
+    Every field is encoded when no `fields` are given. The other fields are
+    never read, so their nested DTOs aren't encoded either.
+    """
+    if isinstance(obj, ServicePageDto):
+        return {
+            **jsonable_encoder(dataclasses.replace(obj, _items=[])),
+            "_items": [encode_fields(item, fields) for item in obj._items],
+        }
+    if not fields:
+        return jsonable_encoder(obj)
+    return jsonable_encoder(
+        {
+            field.name: getattr(obj, field.name)
+            for field in dataclasses.fields(obj)
+            if field.name in fields
+        }
+    )
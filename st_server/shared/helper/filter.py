@@ -4,8 +4,18 @@ from functools import wraps
 
 from st_server.shared.application.exceptions import FilterError
 
-KNOWN_PARAMS = ["limit", "offset", "sort", "fields", "access_token"]
-OPERATORS = ["eq", "gt", "ge", "lt", "le", "in", "btw", "lk"]
+KNOWN_PARAMS = [
+    "limit",
+    "offset",
+    "cursor",
+    "sort",
+    "fields",
+    "count",
+    "chunk_size",
+    "include_discarded",
+    "access_token",
+]
+OPERATORS = ["eq", "gt", "ge", "lt", "le", "in", "btw", "lk", "sw", "prefix"]
 
 
 def validate_filter(func):
@@ -16,6 +26,8 @@ def validate_filter(func):
         filters = [(k, v) for k, v in kwargs.items() if k not in KNOWN_PARAMS]
         if filters:
             for _filter in filters:
+                if not isinstance(_filter[1], str):
+                    continue
                 operator = _filter[1].split(":")[0]
                 if operator not in OPERATORS:
                     raise FilterError
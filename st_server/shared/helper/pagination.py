@@ -3,6 +3,9 @@
 from functools import wraps
 
 from st_server.shared.application.exceptions import PaginationError
+from st_server.shared.helper.cursor import decode_cursor
+
+COUNT_STRATEGIES = ["exact", "estimated", "none"]
 
 
 def validate_pagination(func):
@@ -12,6 +15,8 @@ def validate_pagination(func):
     def wrapped(*args, **kwargs):
         limit = kwargs.get("limit", None)
         offset = kwargs.get("offset", None)
+        cursor = kwargs.get("cursor", None)
+        count = kwargs.get("count", None)
 
         if limit is not None:
             try:
@@ -33,6 +38,14 @@ def validate_pagination(func):
                 raise PaginationError(
                     "The offset number cannot be less than 0"
                 )
+        if cursor is not None:
+            decode_cursor(cursor, kwargs.get("sort", None))
+        if count is not None and count not in COUNT_STRATEGIES:
+            raise PaginationError(
+                "The count must be one of: {}".format(
+                    ", ".join(COUNT_STRATEGIES)
+                )
+            )
         return func(*args, **kwargs)
 
     return wrapped
@@ -0,0 +1,142 @@
+"""RabbitMQ message bus benchmarks.
+
+Run with `pytest tests/benchmark -s` to see the figures.
+"""
+
+import time
+
+import pika
+
+from st_server.server.domain.entities.application import Application
+from st_server.server.infrastructure.message_bus.background_message_bus import (
+    BackgroundMessageBus,
+)
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    RabbitMQMessageBus,
+)
+
+MESSAGES = 1000
+# Round trip to a local broker.
+ROUND_TRIP = 0.0002
+
+
+class StandInChannel:
+    """Channel of a broker answering each synchronous call in a round trip.
+
+    The publishes are pipelined, only the confirmations wait.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.is_open = True
+
+    def tx_select(self):
+        time.sleep(ROUND_TRIP)
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self._connection.unconfirmed += 1
+
+    def tx_commit(self):
+        time.sleep(ROUND_TRIP)
+        self._connection.confirmed += self._connection.unconfirmed
+        self._connection.unconfirmed = 0
+
+
+class StandInConnection:
+    def __init__(self, parameters):
+        self.is_closed = False
+        self.unconfirmed = 0
+        self.confirmed = 0
+        StandInConnection.last = self
+
+    def channel(self):
+        return StandInChannel(self)
+
+    def process_data_events(self, time_limit=None):
+        pass
+
+    def close(self):
+        self.is_closed = True
+
+
+def _best_of(function: callable, repeat: int = 3) -> float:
+    """Returns the best seconds of some calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_publish_confirmed_per_message_vs_per_batch(monkeypatch):
+    monkeypatch.setattr(pika, "BlockingConnection", StandInConnection)
+    messages = [("server", "created", str(i)) for i in range(MESSAGES)]
+
+    results = []
+    for batch_size in [1, 10, 100, 1000]:
+        message_bus = RabbitMQMessageBus(
+            host="stand-in-{}".format(batch_size),
+            port=5672,
+            username="admin",
+            password="admin",
+            batch_size=batch_size,
+        )
+        elapsed = _best_of(
+            lambda: message_bus.publish_messages(messages=messages)
+        )
+        connection = StandInConnection.last
+        assert connection.unconfirmed == 0
+        assert connection.confirmed == MESSAGES * 3
+        results.append((batch_size, elapsed))
+
+    print("\n{:<8}{:>12}{:>14}".format("batch", "ms", "messages/s"))
+    for batch_size, elapsed in results:
+        print(
+            "{:<8}{:>12.2f}{:>14.0f}".format(
+                batch_size, elapsed * 1000, MESSAGES / elapsed
+            )
+        )
+
+    assert results[-1][1] < results[0][1]
+
+
+def _p99(function: callable, calls: int = 200) -> float:
+    """Returns the 99th percentile seconds of the calls."""
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[int(calls * 0.99) - 1]
+
+
+def test_publish_latency_direct_vs_background(monkeypatch):
+    monkeypatch.setattr(pika, "BlockingConnection", StandInConnection)
+    rabbitmq_message_bus = RabbitMQMessageBus(
+        host="stand-in-latency",
+        port=5672,
+        username="admin",
+        password="admin",
+        batch_size=100,
+    )
+    background_message_bus = BackgroundMessageBus(
+        message_bus=rabbitmq_message_bus
+    )
+    domain_events = Application.create(
+        name="nginx", version="1.0", architect="x86_64"
+    ).domain_events
+
+    direct = _p99(
+        lambda: rabbitmq_message_bus.publish(domain_events=domain_events)
+    )
+    background = _p99(
+        lambda: background_message_bus.publish(domain_events=domain_events)
+    )
+    background_message_bus.close()
+
+    print("\n{:<12}{:>12}".format("publish", "p99 ms"))
+    for name, elapsed in [("direct", direct), ("background", background)]:
+        print("{:<12}{:>12.3f}".format(name, elapsed * 1000))
+
+    assert background < direct
@@ -0,0 +1,188 @@
+"""Server repository benchmarks.
+
+Run with `pytest tests/benchmark -s` to see the figures.
+"""
+
+import time
+from uuid import uuid4
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import joinedload
+
+from st_server.server.application.dtos.server import ServerReadDto
+from st_server.server.infrastructure.mysql.models.application import (
+    ApplicationDbModel,
+)
+from st_server.server.infrastructure.mysql.models.credential import (
+    CredentialDbModel,
+)
+from st_server.server.infrastructure.mysql.models.server import ServerDbModel
+from st_server.server.infrastructure.mysql.models.server_application import (
+    ServerApplicationDbModel,
+)
+from st_server.server.infrastructure.mysql.query import find_many_plan
+from st_server.server.infrastructure.mysql.repositories.server_repository import (
+    ServerRepositoryImpl,
+)
+from tests.conftest import SessionLocal, engine
+
+SERVERS = 10
+CREDENTIALS = 20
+APPLICATIONS = 30
+
+
+def _add_wide_servers(environment: str, prefix: str = "") -> None:
+    session = SessionLocal()
+    applications = [
+        ApplicationDbModel(
+            id=uuid4().hex,
+            name=uuid4().hex,
+            version="1.0",
+            architect="x86_64",
+            discarded=False,
+        )
+        for _ in range(APPLICATIONS)
+    ]
+    session.add_all(applications)
+    for _ in range(SERVERS):
+        server_id = uuid4().hex
+        session.add(
+            ServerDbModel(
+                id=server_id,
+                name=prefix + uuid4().hex,
+                environment=environment,
+                operating_system={
+                    "name": "Ubuntu",
+                    "version": "22.04",
+                    "architecture": "x86_64",
+                },
+                status="running",
+                discarded=False,
+                credentials=[
+                    CredentialDbModel(
+                        id=uuid4().hex,
+                        server_id=server_id,
+                        connection_type="SSH",
+                        username=uuid4().hex,
+                        password="secret",
+                        discarded=False,
+                    )
+                    for _ in range(CREDENTIALS)
+                ],
+                applications=[
+                    ServerApplicationDbModel(
+                        server_id=server_id, application_id=application.id
+                    )
+                    for application in applications
+                ],
+            )
+        )
+    session.commit()
+
+
+def _measure(statement, parameters: dict) -> tuple[int, int, float, list]:
+    """Returns the rows fetched, statements, seconds and loaded servers."""
+    executed = []
+
+    def record(conn, cursor, sql, sql_parameters, context, executemany):
+        executed.append((sql, sql_parameters))
+
+    event.listen(engine, "after_cursor_execute", record)
+    session = SessionLocal()
+    try:
+        start = time.perf_counter()
+        servers = session.execute(statement, parameters).unique().scalars()
+        servers = [
+            (len(server.credentials), len(server.applications))
+            for server in servers
+        ]
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+        session.close()
+    cursor = engine.raw_connection().cursor()
+    rows = 0
+    for sql, sql_parameters in executed:
+        cursor.execute("SELECT COUNT(*) FROM ({})".format(sql), sql_parameters)
+        rows += cursor.fetchone()[0]
+    return rows, len(executed), elapsed, servers
+
+
+def test_wide_aggregates_joined_vs_selectin():
+    environment = uuid4().hex
+    _add_wide_servers(environment=environment)
+    parameters = {"filter_environment": environment, "limit": SERVERS}
+
+    joined = (
+        select(ServerDbModel)
+        .options(joinedload("*"))
+        .where(ServerDbModel.environment == environment)
+        .order_by(ServerDbModel.id)
+        .limit(SERVERS)
+    )
+    selectin = find_many_plan(
+        ServerDbModel,
+        fields=[],
+        filters={"environment": ("eq", environment)},
+        sort=[],
+        limit=SERVERS,
+    ).statement
+
+    before = _measure(joined, parameters)
+    after = _measure(selectin, parameters)
+
+    print(
+        "\n{:<10}{:>8}{:>12}{:>12}".format(
+            "loader", "rows", "statements", "ms"
+        )
+    )
+    for name, (rows, statements, elapsed, _) in [
+        ("joined", before),
+        ("selectin", after),
+    ]:
+        print(
+            "{:<10}{:>8}{:>12}{:>12.2f}".format(
+                name, rows, statements, elapsed * 1000
+            )
+        )
+
+    assert before[3] == after[3] == [(CREDENTIALS, APPLICATIONS)] * SERVERS
+    assert before[0] == SERVERS * CREDENTIALS * APPLICATIONS
+    assert after[0] == SERVERS * (1 + CREDENTIALS + APPLICATIONS)
+
+
+def _best_of(function: callable, repeat: int = 5) -> tuple[float, list]:
+    """Returns the best seconds of some calls and the last result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def test_find_many_aggregates_vs_rows():
+    prefix = uuid4().hex
+    _add_wide_servers(environment="DEV", prefix=prefix)
+    repository = ServerRepositoryImpl(session=SessionLocal())
+    name = "sw:{}".format(prefix)
+
+    hydrated, aggregates = _best_of(
+        lambda: [
+            ServerReadDto.from_entity(server=server)
+            for server in repository.find_many(name=name)._items
+        ]
+    )
+    read, rows = _best_of(
+        lambda: [
+            ServerReadDto.from_dict(server)
+            for server in repository.read_many(name=name)._items
+        ]
+    )
+
+    print("\n{:<12}{:>12}".format("path", "ms"))
+    for path, elapsed in [("aggregates", hydrated), ("rows", read)]:
+        print("{:<12}{:>12.2f}".format(path, elapsed * 1000))
+
+    assert len(rows) == SERVERS
+    assert rows == aggregates
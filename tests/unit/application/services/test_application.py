@@ -1,7 +1,7 @@
 import pytest
 
 from st_server.server.application.dtos.application import ApplicationReadDto
-from st_server.shared.application.exceptions import NotFound
+from st_server.shared.application.exceptions import AlreadyExists, NotFound
 from tests.utils.factories.application_factory import ApplicationFactory
 
 
@@ -60,3 +60,40 @@ def test_delete_one_ok(mock_application_service):
     application = ApplicationFactory()
 
     mock_application_service.delete_one(id=application.id.value)
+
+
+def test_add_many_ok(mock_application_service):
+    data = [
+        application.to_dict()
+        for application in ApplicationFactory.build_batch(3)
+    ]
+
+    applications_created = mock_application_service.add_many(data=data)
+
+    assert [application.name for application in applications_created] == [
+        item["name"] for item in data
+    ]
+
+
+def test_add_many_already_exists(mock_application_service):
+    application = ApplicationFactory()
+    data = [ApplicationFactory.build().to_dict(), application.to_dict()]
+
+    with pytest.raises(AlreadyExists):
+        mock_application_service.add_many(data=data)
+
+
+def test_upsert_many_ok(mock_application_service):
+    application = ApplicationFactory()
+    data = [ApplicationFactory.build().to_dict(), application.to_dict()]
+
+    mock_application_service.upsert_many(data=data)
+    mock_application_service.upsert_many(data=data)
+    applications_found = mock_application_service.find_many(
+        name="in:{}".format(",".join(item["name"] for item in data))
+    )
+
+    assert applications_found._total == 2
+    assert application.id.value in [
+        application.id for application in applications_found._items
+    ]
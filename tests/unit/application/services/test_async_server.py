@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from st_server.server.application.dtos.server import ServerReadDto
+from st_server.server.application.services.async_server import (
+    AsyncServerService,
+)
+from st_server.server.infrastructure.mysql.db import Base
+from st_server.server.infrastructure.mysql.repositories.async_server_repository import (
+    AsyncServerRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+)
+from st_server.shared.application.exceptions import NotFound
+from tests.utils.factories.server_factory import ServerFactory
+
+
+@pytest.fixture(scope="module")
+def async_session_local():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", poolclass=StaticPool
+    )
+
+    async def create_all():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_all())
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture(scope="function")
+def mock_async_server_service(async_session_local, mock_message_bus):
+    yield AsyncServerService(
+        repository=AsyncServerRepositoryImpl(session=async_session_local()),
+        message_bus=mock_message_bus,
+    )
+
+
+def test_add_one_and_find_many_ok(mock_async_server_service):
+    data = ServerFactory.build().to_dict()
+
+    async def run():
+        server = await mock_async_server_service.add_one(data=data)
+        servers = await mock_async_server_service.find_many(
+            name="eq:{}".format(server.name)
+        )
+        return server, servers
+
+    server_created, servers_found = asyncio.run(run())
+
+    assert isinstance(server_created, ServerReadDto)
+    assert servers_found._total == 1
+    assert servers_found._items[0].id == server_created.id
+
+
+def test_update_one_ok(mock_async_server_service):
+    data = ServerFactory.build().to_dict()
+
+    async def run():
+        server = await mock_async_server_service.add_one(data=data)
+        await mock_async_server_service.update_one(
+            id=server.id, data={"status": "running"}
+        )
+        return await mock_async_server_service.find_one(id=server.id)
+
+    server_found = asyncio.run(run())
+
+    assert server_found.status == "running"
+
+
+def test_find_one_not_found(mock_async_server_service):
+    with pytest.raises(NotFound):
+        asyncio.run(mock_async_server_service.find_one(id="1234"))
+
+
+def test_update_one_in_unit_of_work_ok(async_session_local, mock_message_bus):
+    unit_of_work = AsyncUnitOfWorkImpl(session=async_session_local())
+    service = AsyncServerService(
+        repository=unit_of_work.servers,
+        message_bus=mock_message_bus,
+        unit_of_work=unit_of_work,
+    )
+    data = ServerFactory.build().to_dict()
+
+    async def run():
+        server = await service.add_one(data=data)
+        await service.update_one(id=server.id, data={"status": "running"})
+        return await service.find_one(id=server.id)
+
+    server_found = asyncio.run(run())
+
+    assert server_found.status == "running"
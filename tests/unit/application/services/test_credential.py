@@ -1,7 +1,7 @@
 import pytest
 
 from st_server.server.application.dtos.credential import CredentialReadDto
-from st_server.shared.application.exceptions import NotFound
+from st_server.shared.application.exceptions import AlreadyExists, NotFound
 from tests.utils.factories.credential_factory import CredentialFactory
 
 
@@ -58,3 +58,23 @@ def test_delete_one_ok(mock_credential_service):
     credential = CredentialFactory()
 
     mock_credential_service.delete_one(id=credential.id.value)
+
+
+def test_add_many_ok(mock_credential_service):
+    data = [
+        credential.to_dict() for credential in CredentialFactory.build_batch(3)
+    ]
+
+    credentials_created = mock_credential_service.add_many(data=data)
+
+    assert [credential.username for credential in credentials_created] == [
+        item["username"] for item in data
+    ]
+
+
+def test_add_many_already_exists(mock_credential_service):
+    credential = CredentialFactory()
+    data = [CredentialFactory.build().to_dict(), credential.to_dict()]
+
+    with pytest.raises(AlreadyExists):
+        mock_credential_service.add_many(data=data)
@@ -1,7 +1,17 @@
 import pytest
+from sqlalchemy import event
 
 from st_server.server.application.dtos.server import ServerReadDto
-from st_server.shared.application.exceptions import NotFound
+from st_server.server.domain.entities.credential import Credential
+from st_server.server.domain.value_objects.environment import Environment
+from st_server.server.interface.api.schemas.server import ServerUpdate
+from st_server.shared.application.exceptions import (
+    AlreadyExists,
+    NotFound,
+    PaginationError,
+)
+from tests.conftest import engine
+from tests.utils.factories.credential_factory import CredentialFactory
 from tests.utils.factories.server_factory import ServerFactory
 
 
@@ -16,6 +26,99 @@ def test_find_many_ok(mock_server_service):
     assert isinstance(servers_found._items[0], ServerReadDto)
 
 
+def test_find_many_prefix_ok(mock_server_service):
+    servers = [ServerFactory(name="prefix_{}".format(i)) for i in range(2)]
+    ServerFactory(name="prefixX")
+
+    servers_found = mock_server_service.find_many(name="sw:prefix_")
+
+    assert sorted(server.name for server in servers_found._items) == sorted(
+        server.name for server in servers
+    )
+
+
+def test_find_many_cursor_ok(mock_server_service):
+    servers = ServerFactory.create_batch(5)
+    ids = "in:{}".format(",".join([server.id.value for server in servers]))
+
+    servers_found = []
+    page = mock_server_service.find_many(limit=2, sort=["name:desc"], id=ids)
+    servers_found.extend(page._items)
+    while page._next_cursor:
+        page = mock_server_service.find_many(
+            limit=2, cursor=page._next_cursor, sort=["name:desc"], id=ids
+        )
+        servers_found.extend(page._items)
+
+    assert page._total == 5
+    assert [server.name for server in servers_found] == sorted(
+        [server.name for server in servers], reverse=True
+    )
+
+
+def test_find_many_cursor_sort_mismatch(mock_server_service):
+    ServerFactory.create_batch(3)
+    page = mock_server_service.find_many(limit=2, sort=["name:asc"])
+
+    with pytest.raises(PaginationError):
+        mock_server_service.find_many(
+            limit=2, cursor=page._next_cursor, sort=["name:desc"]
+        )
+
+
+def test_find_many_count_none_ok(mock_server_service):
+    servers = ServerFactory.create_batch(3)
+
+    servers_found = mock_server_service.find_many(
+        limit=2,
+        count="none",
+        id="in:{}".format(",".join([server.id.value for server in servers])),
+    )
+
+    assert servers_found._total is None
+    assert len(servers_found._items) == 2
+    assert servers_found._next_offset == 2
+
+
+def test_find_many_count_estimated_ok(mock_server_service):
+    environment = Environment.from_string(value="ESTIMATED")
+    ServerFactory.create_batch(3, environment=environment)
+
+    servers_found = mock_server_service.find_many(
+        count="estimated", environment="eq:ESTIMATED"
+    )
+    ServerFactory(environment=environment)
+    servers_cached = mock_server_service.find_many(
+        count="estimated", environment="eq:ESTIMATED"
+    )
+    servers_counted = mock_server_service.find_many(
+        count="exact", environment="eq:ESTIMATED"
+    )
+
+    assert servers_found._total == 3
+    assert servers_cached._total == 3
+    assert servers_counted._total == 4
+
+
+def test_find_many_count_invalid(mock_server_service):
+    with pytest.raises(PaginationError):
+        mock_server_service.find_many(count="approximate")
+
+
+def test_iter_many_ok(mock_server_service):
+    servers = ServerFactory.create_batch(5)
+
+    servers_found = mock_server_service.iter_many(
+        sort=["name:desc"],
+        chunk_size=2,
+        id="in:{}".format(",".join([server.id.value for server in servers])),
+    )
+
+    assert [server.name for server in servers_found] == sorted(
+        [server.name for server in servers], reverse=True
+    )
+
+
 def test_find_one_ok(mock_server_service):
     server = ServerFactory()
 
@@ -25,6 +128,20 @@ def test_find_one_ok(mock_server_service):
     assert server.id.value == server_found.id
 
 
+def test_find_one_reads_the_aggregate_fields(
+    mock_server_service, mock_server_repository
+):
+    server = ServerFactory()
+    CredentialFactory.create_batch(2, server_id=server.id)
+
+    server_found = mock_server_service.find_one(id=server.id.value)
+
+    assert len(server_found.credentials) == 2
+    assert server_found == ServerReadDto.from_entity(
+        mock_server_repository.find_one(id=server.id.value)
+    )
+
+
 def test_find_one_not_found(mock_server_service):
     with pytest.raises(NotFound):
         mock_server_service.find_one(id="1234")
@@ -40,6 +157,15 @@ def test_add_one_ok(mock_server_service):
     assert server.name == server_created.name
 
 
+def test_add_one_already_exists(mock_server_service):
+    server = ServerFactory()
+
+    with pytest.raises(AlreadyExists):
+        mock_server_service.add_one(
+            data=ServerFactory.build(name=server.name).to_dict()
+        )
+
+
 def test_update_one_ok(mock_server_service):
     server = ServerFactory()
     data = {"name": "SuperTest"}
@@ -52,7 +178,246 @@ def test_update_one_ok(mock_server_service):
     assert server_updated.name == data["name"]
 
 
-def test_delete_one_ok(mock_server_service):
+def test_update_one_writes_changed_columns(mock_server_service):
     server = ServerFactory()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        mock_server_service.update_one(
+            id=server.id.value, data={"status": "running"}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    writes = [s for s in statements if not s.startswith("SELECT")]
+
+    assert len(writes) == 1
+    assert writes[0].startswith("UPDATE server SET status=")
+    assert mock_server_service.find_one(id=server.id.value).status == "running"
+
+
+def test_update_one_already_exists(mock_server_service):
+    server, other = ServerFactory.create_batch(2)
+
+    with pytest.raises(AlreadyExists):
+        mock_server_service.update_one(
+            id=server.id.value, data={"name": other.name}
+        )
+
+
+def test_update_many_already_exists(mock_server_service):
+    server, other = ServerFactory.create_batch(2)
+
+    with pytest.raises(AlreadyExists):
+        mock_server_service.update_many(
+            data=[{"id": server.id.value, "name": other.name}]
+        )
+
+
+def test_update_one_keeps_the_omitted_collections(mock_server_service):
+    server = ServerFactory(credentials=CredentialFactory.build_batch(2))
+
+    mock_server_service.update_one(
+        id=server.id.value, data=ServerUpdate(status="running").to_dict()
+    )
+    server_found = mock_server_service.find_one(id=server.id.value)
+
+    assert server_found.status == "running"
+    assert len(server_found.credentials) == 2
+
+
+def test_update_one_writes_changed_credentials(mock_server_repository):
+    server = ServerFactory(credentials=CredentialFactory.build_batch(3))
+    server = mock_server_repository.find_one(id=server.id.value)
+    kept, modified, removed = server.credentials
+    added = CredentialFactory.build(server_id=server.id)
+    server.credentials = [
+        kept,
+        Credential.from_dict(data={**modified.to_dict(), "username": "x"}),
+        added,
+    ]
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        mock_server_repository.update_one(aggregate=server)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    writes = [s for s in statements if not s.startswith("SELECT")]
+
+    assert len(writes) == 3
+    assert writes[0].startswith("DELETE FROM credential WHERE credential.id")
+    assert writes[1].startswith("INSERT INTO credential")
+    assert writes[2].startswith("UPDATE credential SET username=")
+    assert sorted(
+        credential.username
+        for credential in mock_server_repository.find_one(
+            id=server.id.value
+        ).credentials
+    ) == sorted([kept.username, "x", added.username])
+
+
+def test_delete_many_deletes_the_children(
+    mock_server_service, mock_server_repository
+):
+    servers = [
+        ServerFactory(credentials=CredentialFactory.build_batch(2))
+        for _ in range(2)
+    ]
+
+    mock_server_service.delete_many(
+        ids=[server.id.value for server in servers]
+    )
+
+    with engine.connect() as connection:
+        assert not connection.exec_driver_sql(
+            "SELECT 1 FROM credential WHERE server_id IN (?, ?)",
+            tuple(server.id.value for server in servers),
+        ).all()
+
+
+def test_delete_one_ok(mock_server_service):
+    server = ServerFactory(credentials=CredentialFactory.build_batch(2))
 
     mock_server_service.delete_one(id=server.id.value)
+
+    with engine.connect() as connection:
+        assert not connection.exec_driver_sql(
+            "SELECT 1 FROM credential WHERE server_id = ?",
+            (server.id.value,),
+        ).all()
+        assert not connection.exec_driver_sql(
+            "SELECT 1 FROM server WHERE id = ?", (server.id.value,)
+        ).all()
+
+
+def test_delete_one_not_found(mock_server_service):
+    with pytest.raises(NotFound):
+        mock_server_service.delete_one(id="1234")
+
+
+def test_add_many_ok(mock_server_service, mock_message_bus, monkeypatch):
+    published = []
+    monkeypatch.setattr(
+        mock_message_bus,
+        "publish",
+        lambda domain_events: published.append(domain_events),
+    )
+    data = [server.to_dict() for server in ServerFactory.build_batch(3)]
+
+    servers_created = mock_server_service.add_many(data=data)
+    servers_found = mock_server_service.find_many(
+        id="in:{}".format(",".join([server.id for server in servers_created]))
+    )
+
+    assert [server.name for server in servers_created] == [
+        item["name"] for item in data
+    ]
+    assert servers_found._total == 3
+    assert len(published) == 1
+    assert len(published[0]) == 3
+
+
+def test_add_many_already_exists(mock_server_service):
+    server = ServerFactory()
+    data = [ServerFactory.build().to_dict(), server.to_dict()]
+
+    with pytest.raises(AlreadyExists):
+        mock_server_service.add_many(data=data)
+
+
+def test_upsert_many_ok(mock_server_service, mock_server_repository):
+    server = ServerFactory()
+    credentials = CredentialFactory.build_batch(2, server_id=server.id)
+    new_server = ServerFactory.build()
+
+    for cpu, credential in [("64", credentials[0]), ("128", credentials[1])]:
+        mock_server_repository.upsert_many(
+            aggregates=[
+                ServerFactory.build(
+                    name=server.name, cpu=cpu, credentials=[credential]
+                ),
+                new_server,
+            ]
+        )
+    server_found = mock_server_service.find_one(id=server.id.value)
+
+    assert server_found.cpu == "128"
+    assert [
+        credential.username for credential in server_found.credentials
+    ] == [credentials[1].username]
+    assert mock_server_service.find_one(id=new_server.id.value)
+
+
+def test_update_many_ok(mock_server_service):
+    servers = ServerFactory.create_batch(2)
+    data = [
+        {"id": server.id.value, "name": "SuperTest{}".format(i)}
+        for i, server in enumerate(servers)
+    ]
+
+    servers_updated = mock_server_service.update_many(data=data)
+    servers_found = mock_server_service.find_many(
+        sort=["name:asc"],
+        id="in:{}".format(",".join([server.id.value for server in servers])),
+    )
+
+    assert [server.name for server in servers_updated] == [
+        "SuperTest0",
+        "SuperTest1",
+    ]
+    assert [server.name for server in servers_found._items] == [
+        "SuperTest0",
+        "SuperTest1",
+    ]
+
+
+def test_update_many_not_found(mock_server_service):
+    server = ServerFactory()
+    data = [{"id": server.id.value}, {"id": "1234"}]
+
+    with pytest.raises(NotFound):
+        mock_server_service.update_many(data=data)
+
+
+def test_discard_many_ok(mock_server_service):
+    servers = ServerFactory.create_batch(2)
+    ids = [server.id.value for server in servers]
+
+    mock_server_service.discard_many(ids=ids)
+
+    assert all(
+        server.discarded
+        for server in mock_server_service.find_many(
+            include_discarded=True, id="in:{}".format(",".join(ids))
+        )._items
+    )
+    assert not mock_server_service.find_many(
+        id="in:{}".format(",".join(ids))
+    )._items
+
+
+def test_delete_many_ok(mock_server_service):
+    servers = ServerFactory.create_batch(2)
+    ids = [server.id.value for server in servers]
+
+    mock_server_service.delete_many(ids=ids)
+
+    for id in ids:
+        with pytest.raises(NotFound):
+            mock_server_service.find_one(id=id)
+
+
+def test_delete_many_not_found(mock_server_service):
+    server = ServerFactory()
+
+    with pytest.raises(NotFound, match="'1234'"):
+        mock_server_service.delete_many(ids=[server.id.value, "1234"])
+
+    assert mock_server_service.find_one(id=server.id.value)
@@ -0,0 +1,34 @@
+from st_server.server.domain.entities.credential import Credential
+from st_server.server.domain.entities.server import Server
+from tests.utils.factories.credential_factory import CredentialFactory
+from tests.utils.factories.server_factory import ServerFactory
+
+
+def test_credential_changed_carries_only_the_changes():
+    kept, modified, removed = CredentialFactory.build_batch(3)
+    server = ServerFactory.build(credentials=[kept, modified, removed])
+    server.clear_domain_events()
+    added = CredentialFactory.build()
+    renamed = Credential.from_dict(
+        data={**modified.to_dict(), "username": "renamed"}
+    )
+
+    server.update(credentials=[kept, renamed, added])
+
+    (domain_event,) = server.domain_events
+    assert isinstance(domain_event, Server.CredentialChanged)
+    assert domain_event.added == [added.to_dict()]
+    assert domain_event.removed == [removed.id.value]
+    assert domain_event.modified == [
+        {"id": modified.id.value, "username": "renamed"}
+    ]
+
+
+def test_unchanged_collection_registers_no_domain_event():
+    credentials = CredentialFactory.build_batch(2)
+    server = ServerFactory.build(credentials=credentials)
+    server.clear_domain_events()
+
+    server.update(credentials=list(reversed(credentials)), applications=[])
+
+    assert server.domain_events == []
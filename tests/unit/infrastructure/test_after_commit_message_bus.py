@@ -0,0 +1,117 @@
+"""After commit message bus tests."""
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from st_server.server.domain.entities.application import Application
+from st_server.server.infrastructure.message_bus.after_commit_message_bus import (
+    AfterCommitMessageBus,
+)
+from st_server.server.infrastructure.mysql.db import Base
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+    UnitOfWorkImpl,
+)
+
+
+class RecordingMessageBus:
+    def __init__(self, fail: bool = False):
+        self.domain_events = []
+        self.fail = fail
+
+    def publish(self, domain_events):
+        self.thread = threading.current_thread()
+        if self.fail:
+            raise RuntimeError("The message bus is closed")
+        self.domain_events.extend(domain_events)
+
+
+def _unit_of_work() -> UnitOfWorkImpl:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return UnitOfWorkImpl(session=sessionmaker(bind=engine)())
+
+
+def test_publishes_the_committed_domain_events_only():
+    """Test."""
+    recording_message_bus = RecordingMessageBus()
+    unit_of_work = _unit_of_work()
+    message_bus = AfterCommitMessageBus(
+        message_bus=recording_message_bus, unit_of_work=unit_of_work
+    )
+    rolled_back = Application.create(
+        name="nginx", version="1.25", architect="x86"
+    )
+    committed = Application.create(
+        name="redis", version="7.2", architect="x86"
+    )
+    domain_events = list(committed.domain_events)
+
+    with pytest.raises(ValueError):
+        with unit_of_work:
+            message_bus.publish(domain_events=rolled_back.domain_events)
+            raise ValueError
+    with unit_of_work:
+        with unit_of_work:
+            message_bus.publish(domain_events=committed.domain_events)
+            committed.clear_domain_events()
+        assert recording_message_bus.domain_events == []
+
+    assert recording_message_bus.domain_events == domain_events
+
+
+def test_a_failing_publish_does_not_fail_the_commit():
+    """Test."""
+    unit_of_work = _unit_of_work()
+    message_bus = AfterCommitMessageBus(
+        message_bus=RecordingMessageBus(fail=True), unit_of_work=unit_of_work
+    )
+
+    with unit_of_work:
+        message_bus.publish(
+            domain_events=Application.create(
+                name="nginx", version="1.25", architect="x86"
+            ).domain_events
+        )
+
+
+def test_publish_outside_unit_of_work():
+    """Test."""
+    message_bus = AfterCommitMessageBus(
+        message_bus=RecordingMessageBus(), unit_of_work=_unit_of_work()
+    )
+
+    with pytest.raises(RuntimeError):
+        message_bus.publish(domain_events=[])
+
+
+def test_async_publishes_off_the_event_loop():
+    """Test."""
+    recording_message_bus = RecordingMessageBus()
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    domain_events = Application.create(
+        name="nginx", version="1.25", architect="x86"
+    ).domain_events
+
+    async def run():
+        unit_of_work = AsyncUnitOfWorkImpl(
+            session=async_sessionmaker(bind=engine)()
+        )
+        message_bus = AfterCommitMessageBus(
+            message_bus=recording_message_bus, unit_of_work=unit_of_work
+        )
+        async with unit_of_work:
+            message_bus.publish(domain_events=domain_events)
+        await engine.dispose()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+
+    assert recording_message_bus.domain_events == domain_events
+    assert recording_message_bus.thread is not loop_thread
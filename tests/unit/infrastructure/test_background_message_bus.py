@@ -0,0 +1,131 @@
+"""Background message bus tests."""
+
+import threading
+import time
+
+import pytest
+
+from st_server.server.domain.entities.application import Application
+from st_server.server.infrastructure.message_bus import (
+    background_message_bus,
+)
+from st_server.server.infrastructure.message_bus.background_message_bus import (
+    BackgroundMessageBus,
+)
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    message,
+)
+
+
+class RecordingRabbitMQMessageBus:
+    def __init__(self, fail: bool = False):
+        self.messages = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def publish_messages(self, messages):
+        self.release.wait()
+        if self.fail:
+            raise ConnectionError("broker down")
+        self.messages.extend(messages)
+
+
+def _domain_events(count: int) -> list:
+    return [
+        domain_event
+        for i in range(count)
+        for domain_event in Application.create(
+            name=str(i), version="1.0", architect="x86_64"
+        ).domain_events
+    ]
+
+
+def test_publish_does_not_wait_on_the_broker_and_close_flushes():
+    """Test."""
+    rabbitmq_message_bus = RecordingRabbitMQMessageBus()
+    rabbitmq_message_bus.release.clear()
+    message_bus = BackgroundMessageBus(message_bus=rabbitmq_message_bus)
+
+    message_bus.publish(domain_events=_domain_events(3))
+    assert rabbitmq_message_bus.messages == []
+    rabbitmq_message_bus.release.set()
+    message_bus.close()
+
+    assert [
+        routing_key for _, routing_key, _ in rabbitmq_message_bus.messages
+    ] == ["created"] * 3
+    with pytest.raises(RuntimeError):
+        message_bus.publish(domain_events=_domain_events(1))
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    """Test."""
+    rabbitmq_message_bus = RecordingRabbitMQMessageBus()
+    rabbitmq_message_bus.release.clear()
+    message_bus = BackgroundMessageBus(
+        message_bus=rabbitmq_message_bus, maxsize=2, policy="drop_oldest"
+    )
+    domain_events = _domain_events(6)
+
+    # The worker may take the first messages before the broker hangs.
+    message_bus.publish(domain_events=domain_events)
+    rabbitmq_message_bus.release.set()
+    message_bus.close()
+
+    assert message_bus.dropped + len(rabbitmq_message_bus.messages) == 6
+    assert rabbitmq_message_bus.messages[-2:] == [
+        message(domain_event) for domain_event in domain_events[-2:]
+    ]
+
+
+def test_spill_keeps_the_messages_the_broker_refused(tmp_path):
+    """Test."""
+    spill_path = str(tmp_path / "message_bus.spill")
+    message_bus = BackgroundMessageBus(
+        message_bus=RecordingRabbitMQMessageBus(fail=True),
+        policy="spill",
+        spill_path=spill_path,
+    )
+    message_bus.publish(domain_events=_domain_events(2))
+    message_bus.close()
+
+    rabbitmq_message_bus = RecordingRabbitMQMessageBus()
+    message_bus = BackgroundMessageBus(
+        message_bus=rabbitmq_message_bus,
+        policy="spill",
+        spill_path=spill_path,
+    )
+    message_bus.close()
+
+    assert len(rabbitmq_message_bus.messages) == 2
+    assert not (tmp_path / "message_bus.spill").exists()
+
+
+def test_idle_worker_does_not_open_the_spill_file(tmp_path, monkeypatch):
+    """Test."""
+    opened = []
+    monkeypatch.setattr(
+        background_message_bus,
+        "open",
+        lambda *args: opened.append(args) or open(*args),
+        raising=False,
+    )
+    message_bus = BackgroundMessageBus(
+        message_bus=RecordingRabbitMQMessageBus(),
+        policy="spill",
+        spill_path=str(tmp_path / "message_bus.spill"),
+    )
+
+    time.sleep(0.3)
+    message_bus.close()
+
+    assert opened == []
+
+
+def test_unknown_policy():
+    """Test."""
+    with pytest.raises(ValueError):
+        BackgroundMessageBus(
+            message_bus=RecordingRabbitMQMessageBus(), policy="ignore"
+        )
@@ -0,0 +1,80 @@
+"""Message encoding tests."""
+
+import json
+
+import pytest
+
+from st_server.server.domain.entities.credential import Credential
+from st_server.server.domain.entities.server import Server
+from st_server.server.infrastructure.message_bus.encoding import (
+    JSON,
+    MSGPACK,
+    encode,
+    routing,
+)
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    message,
+)
+
+
+def _credential_changed() -> Server.CredentialChanged:
+    credential = Credential.from_dict(
+        data={
+            "id": "a" * 32,
+            "server_id": "b" * 32,
+            "connection_type": "SSH",
+            "username": "root",
+            "password": "secret",
+            "discarded": False,
+        }
+    )
+    return Server.CredentialChanged(
+        aggregate_id="b" * 32,
+        added=[credential],
+        removed=["c" * 32],
+        modified=[],
+    )
+
+
+def test_routing_is_computed_once_per_event_class():
+    """Test."""
+    routing.cache_clear()
+
+    for _ in range(3):
+        assert routing(Server.CpuChanged) == ("server", "cpu.changed")
+    assert routing(Server.Created) == ("server", "created")
+
+    assert routing.cache_info().misses == 2
+
+
+def test_message_encodes_the_nested_entities_structurally():
+    """Test."""
+    exchange, routing_key, body = message(_credential_changed())
+
+    assert (exchange, routing_key) == ("server", "credential.changed")
+    assert body["removed"] == ["c" * 32]
+    assert body["added"][0]["username"] == "root"
+    assert body["added"][0]["connection_type"] == "SSH"
+
+
+def test_encode_json():
+    """Test."""
+    _, _, body = message(_credential_changed())
+
+    encoded = encode(body, content_type=JSON)
+
+    assert json.loads(encoded) == body
+    assert encode(encoded, content_type=JSON) == encoded
+
+
+def test_encode_msgpack():
+    """Test."""
+    msgpack = pytest.importorskip("msgpack")
+    _, _, body = message(_credential_changed())
+
+    encoded = encode(body, content_type=MSGPACK)
+
+    assert msgpack.unpackb(encoded) == body
+    assert len(encoded) < len(json.dumps(body))
+    # The JSON bodies of the outbox are packed the same.
+    assert encode(json.dumps(body), content_type=MSGPACK) == encoded
@@ -0,0 +1,117 @@
+"""In memory message bus tests."""
+
+import asyncio
+import threading
+
+import pytest
+
+from st_server.server.domain.entities.application import Application
+from st_server.server.domain.entities.server import Server
+from st_server.server.infrastructure.message_bus.in_memory_message_bus import (
+    InMemoryMessageBus,
+)
+from st_server.shared.domain.value_objects.domain_event import DomainEvent
+
+
+def _cpu_changed(aggregate_id: str, cpu: int) -> Server.CpuChanged:
+    return Server.CpuChanged(
+        aggregate_id=aggregate_id, old_value=cpu - 1, new_value=cpu
+    )
+
+
+def test_dispatch_over_the_mro_and_the_wildcards():
+    """Test."""
+    message_bus = InMemoryMessageBus()
+    handled = {"base": [], "server": [], "all": [], "cpu": []}
+    message_bus.subscribe(DomainEvent, handled["base"].append)
+    message_bus.subscribe("server.*", handled["server"].append)
+    message_bus.subscribe("*", handled["all"].append)
+    server_event = _cpu_changed("a", 2)
+    application_event = Application.Discarded(aggregate_id="b")
+
+    message_bus.publish(domain_events=[server_event, application_event])
+    message_bus.subscribe(Server.CpuChanged, handled["cpu"].append)
+    message_bus.publish(domain_events=[server_event])
+
+    assert handled["base"] == [server_event, application_event, server_event]
+    assert handled["server"] == [server_event, server_event]
+    assert handled["all"] == handled["base"]
+    assert handled["cpu"] == [server_event]
+
+
+def test_inline_raises_and_records_the_errors():
+    """Test."""
+    message_bus = InMemoryMessageBus()
+
+    def failing(domain_event):
+        raise RuntimeError("handler failed")
+
+    message_bus.subscribe(Server.CpuChanged, failing)
+
+    with pytest.raises(RuntimeError):
+        message_bus.publish(domain_events=[_cpu_changed("a", 2)])
+    stats = message_bus.stats()[failing]
+    assert (stats.calls, stats.errors) == (1, 1)
+
+
+def test_thread_keeps_the_order_of_each_aggregate():
+    """Test."""
+    message_bus = InMemoryMessageBus(executor="thread", workers=4)
+    release = threading.Event()
+    handled = []
+
+    def handler(domain_event):
+        release.wait()
+        handled.append((domain_event.aggregate_id, domain_event.new_value))
+
+    message_bus.subscribe(Server.CpuChanged, handler)
+
+    # Publishing doesn't wait on the handlers.
+    message_bus.publish(
+        domain_events=[
+            _cpu_changed(aggregate_id, cpu)
+            for cpu in range(20)
+            for aggregate_id in ["a", "b", "c"]
+        ]
+    )
+    release.set()
+    message_bus.close()
+
+    for aggregate_id in ["a", "b", "c"]:
+        assert [cpu for key, cpu in handled if key == aggregate_id] == list(
+            range(20)
+        )
+    assert message_bus.stats()[handler].calls == 60
+
+
+def test_asyncio_awaits_the_handlers_in_order():
+    """Test."""
+    handled = []
+
+    async def handler(domain_event):
+        await asyncio.sleep(0.001 if domain_event.new_value % 2 else 0)
+        handled.append((domain_event.aggregate_id, domain_event.new_value))
+
+    async def main():
+        message_bus = InMemoryMessageBus(
+            executor="asyncio", loop=asyncio.get_running_loop()
+        )
+        message_bus.subscribe("server.*", handler)
+        message_bus.publish(
+            domain_events=[
+                _cpu_changed(aggregate_id, cpu)
+                for cpu in range(5)
+                for aggregate_id in ["a", "b"]
+            ]
+        )
+        await message_bus.aclose()
+        return message_bus.stats()[handler]
+
+    stats = asyncio.run(main())
+
+    for aggregate_id in ["a", "b"]:
+        assert [cpu for key, cpu in handled if key == aggregate_id] == list(
+            range(5)
+        )
+    assert stats.calls == 10
+    assert stats.max_seconds >= 0.001
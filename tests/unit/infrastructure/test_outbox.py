@@ -0,0 +1,173 @@
+"""Outbox tests."""
+
+import json
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from st_server.server.application.services.application import (
+    ApplicationService,
+)
+from st_server.server.infrastructure.message_bus.outbox_message_bus import (
+    OutboxMessageBus,
+)
+from st_server.server.infrastructure.message_bus.outbox_relay import (
+    OutboxRelay,
+)
+from st_server.server.infrastructure.mysql.db import Base
+from st_server.server.infrastructure.mysql.models.outbox import OutboxDbModel
+from st_server.server.infrastructure.mysql.unit_of_work import UnitOfWorkImpl
+from st_server.shared.application.exceptions import NotFound
+from st_server.shared.helper.time import now
+
+
+class RecordingRabbitMQMessageBus:
+    def __init__(self):
+        self.messages = []
+
+    def publish_messages(self, messages):
+        self.messages.extend(messages)
+
+
+class FlakyRabbitMQMessageBus(RecordingRabbitMQMessageBus):
+    def __init__(self, failures, stop):
+        super().__init__()
+        self.failures = failures
+        self.stop = stop
+
+    def publish_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker down")
+        super().publish_messages(messages)
+        self.stop.set()
+
+
+def _session_local():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _service(session_local):
+    unit_of_work = UnitOfWorkImpl(session=session_local())
+    return ApplicationService(
+        repository=unit_of_work.applications,
+        message_bus=OutboxMessageBus(unit_of_work=unit_of_work),
+        unit_of_work=unit_of_work,
+    )
+
+
+def _outbox(session_local):
+    with session_local() as session:
+        return session.execute(select(OutboxDbModel)).scalars().all()
+
+
+def test_events_written_with_the_aggregate():
+    """Test."""
+    session_local = _session_local()
+    service = _service(session_local)
+
+    application = service.add_one(
+        data={"name": "nginx", "version": "1.25", "architect": "x86"}
+    )
+    with pytest.raises(NotFound):
+        service.update_one(id="1234", data={"version": "1.26"})
+
+    (message,) = _outbox(session_local)
+    assert (message.exchange, message.routing_key) == (
+        "application",
+        "created",
+    )
+    assert json.loads(message.body)["aggregate_id"] == application.id
+    assert message.sent_on is None
+
+
+def test_events_outside_unit_of_work():
+    """Test."""
+    unit_of_work = UnitOfWorkImpl(session=_session_local()())
+
+    with pytest.raises(RuntimeError):
+        OutboxMessageBus(unit_of_work=unit_of_work).publish(domain_events=[])
+
+
+def test_relay_publishes_in_order_and_marks_sent():
+    """Test."""
+    session_local = _session_local()
+    service = _service(session_local)
+    application = service.add_one(
+        data={"name": "nginx", "version": "1.25", "architect": "x86"}
+    )
+    service.update_one(id=application.id, data={"version": "1.26"})
+    message_bus = RecordingRabbitMQMessageBus()
+    relay = OutboxRelay(
+        session_factory=session_local,
+        message_bus=message_bus,
+        batch_size=1,
+    )
+
+    assert relay.relay() == 1
+    assert relay.relay() == 1
+    assert relay.relay() == 0
+
+    assert [routing_key for _, routing_key, _ in message_bus.messages] == [
+        "created",
+        "version.changed",
+    ]
+    assert all(message.sent_on for message in _outbox(session_local))
+
+
+def test_relay_retries_a_failing_batch():
+    """Test."""
+    session_local = _session_local()
+    _service(session_local).add_one(
+        data={"name": "nginx", "version": "1.25", "architect": "x86"}
+    )
+    stop = threading.Event()
+    message_bus = FlakyRabbitMQMessageBus(failures=2, stop=stop)
+
+    OutboxRelay(
+        session_factory=session_local,
+        message_bus=message_bus,
+        interval=0.001,
+    ).run(stop=stop)
+
+    assert [routing_key for _, routing_key, _ in message_bus.messages] == [
+        "created"
+    ]
+    assert all(message.sent_on for message in _outbox(session_local))
+
+
+def test_relay_prunes_the_messages_sent_before_the_retention():
+    """Test."""
+    session_local = _session_local()
+    service = _service(session_local)
+    application = service.add_one(
+        data={"name": "nginx", "version": "1.25", "architect": "x86"}
+    )
+    service.update_one(id=application.id, data={"version": "1.26"})
+    service.update_one(id=application.id, data={"version": "1.27"})
+    relay = OutboxRelay(
+        session_factory=session_local,
+        message_bus=RecordingRabbitMQMessageBus(),
+        batch_size=2,
+        retention=timedelta(days=7),
+    )
+    relay.relay()
+    with session_local() as session:
+        session.execute(
+            update(OutboxDbModel)
+            .where(OutboxDbModel.sent_on.is_not(None))
+            .values(sent_on=now() - timedelta(days=8))
+        )
+        session.commit()
+    relay.relay()
+
+    assert relay.prune() == 2
+
+    (message,) = _outbox(session_local)
+    assert message.sent_on > now() - timedelta(days=7)
@@ -0,0 +1,168 @@
+"""Query plan tests."""
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from st_server.server.infrastructure.mysql.models.server import ServerDbModel
+from st_server.server.infrastructure.mysql.query import (
+    PlanCache,
+    compile_filter,
+    count_total,
+    find_many_plan,
+    parse_filters,
+    plan_cache,
+    query_parameters,
+)
+from st_server.shared.application.exceptions import FilterError
+
+
+def test_find_many_plan_is_cached_per_shape():
+    """Test."""
+    plan_cache.clear()
+    filters = parse_filters(ServerDbModel, {"name": "eq:web-01"})
+    plan = find_many_plan(
+        ServerDbModel, fields=[], filters=filters, sort=[], limit=25
+    )
+
+    filters = parse_filters(ServerDbModel, {"name": "eq:web-02"})
+    plan_again = find_many_plan(
+        ServerDbModel, fields=[], filters=filters, sort=[], limit=25
+    )
+
+    assert plan_again is plan
+    assert plan_cache.hits == 1
+    assert plan_cache.misses == 1
+    assert query_parameters(ServerDbModel, filters)["filter_name"] == "web-02"
+
+
+def test_find_many_plan_differs_per_shape():
+    """Test."""
+    plan_cache.clear()
+    filters = parse_filters(ServerDbModel, {"name": "eq:web-01"})
+    plan = find_many_plan(
+        ServerDbModel, fields=[], filters=filters, sort=[], limit=25
+    )
+
+    filters = parse_filters(ServerDbModel, {"name": "lk:web"})
+    plan_like = find_many_plan(
+        ServerDbModel, fields=[], filters=filters, sort=[], limit=25
+    )
+
+    assert plan_like is not plan
+    assert plan_cache.misses == 2
+
+
+def test_find_many_plan_rows_selects_only_the_fields():
+    """Test."""
+    plan = find_many_plan(
+        ServerDbModel,
+        fields=["name", "status"],
+        filters={},
+        sort=["cpu:asc"],
+        rows=True,
+    )
+
+    assert [column.key for column in plan.statement.selected_columns] == [
+        "id",
+        "name",
+        "cpu",
+        "status",
+    ]
+    assert plan.relationships == ()
+
+
+def test_plan_cache_evicts_least_recently_used():
+    """Test."""
+    cache = PlanCache(maxsize=2)
+
+    cache.get_or_build(("a",), object)
+    cache.get_or_build(("b",), object)
+    cache.get_or_build(("a",), object)
+    cache.get_or_build(("c",), object)
+
+    assert len(cache) == 2
+    cache.get_or_build(("b",), object)
+    assert cache.misses == 4
+
+
+def test_compile_filter_prefix_is_sargable():
+    """Test."""
+    predicate = compile_filter(ServerDbModel, "name", "sw")
+
+    sql = str(predicate.compile(dialect=mysql.dialect()))
+
+    assert compile_filter(ServerDbModel, "name", "sw") is predicate
+    assert sql.startswith("server.name LIKE")
+    assert "lower" not in sql
+
+
+def test_parse_filters_excludes_discarded():
+    """Test."""
+    assert parse_filters(ServerDbModel, {"name": "eq:web"}) == {
+        "name": ("eq", "web"),
+        "discarded": ("eq", False),
+    }
+    assert parse_filters(
+        ServerDbModel, {"name": "eq:web", "include_discarded": True}
+    ) == {"name": ("eq", "web")}
+    assert parse_filters(ServerDbModel, {"discarded": "eq:true"}) == {
+        "discarded": ("eq", "true")
+    }
+
+
+def test_query_parameters_coerce_and_escape():
+    """Test."""
+    filters = parse_filters(
+        ServerDbModel,
+        {
+            "name": "sw:web_01%",
+            "discarded": "eq:false",
+            "environment": 'in:"DEV,QA",PROD',
+        },
+    )
+
+    parameters = query_parameters(ServerDbModel, filters)
+
+    assert parameters["filter_name"] == "web\\_01\\%%"
+    assert parameters["filter_discarded"] is False
+    assert parameters["filter_environment"] == ["DEV,QA", "PROD"]
+
+
+def test_query_parameters_invalid_value():
+    """Test."""
+    filters = parse_filters(ServerDbModel, {"discarded": "eq:maybe"})
+
+    with pytest.raises(FilterError):
+        query_parameters(ServerDbModel, filters)
+
+
+class InnoDBStatsSession:
+    """Session of a MySQL database answering the table statistics."""
+
+    def __init__(self):
+        self.statements = []
+
+    def get_bind(self, *args, **kwargs):
+        return type("Engine", (), {"dialect": mysql.dialect()})
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(str(statement))
+        return type("Result", (), {"scalar": lambda self: 42})()
+
+
+def test_estimated_count_uses_the_table_statistics_without_filters():
+    """Test."""
+    session = InnoDBStatsSession()
+    filters = parse_filters(ServerDbModel, {})
+
+    total = count_total(
+        session,
+        ServerDbModel,
+        statement=None,
+        parameters={},
+        strategy="estimated",
+        key=filters,
+    )
+
+    assert total.result() == 42
+    assert "information_schema" in session.statements[0].lower()
@@ -0,0 +1,181 @@
+"""RabbitMQ message bus tests."""
+
+import pika
+import pytest
+from pika.exceptions import StreamLostError
+
+from st_server.server.infrastructure.message_bus.rabbitmq_connection_pool import (
+    RabbitMQConnectionPool,
+)
+from st_server.server.infrastructure.message_bus.rabbitmq_message_bus import (
+    RabbitMQMessageBus,
+)
+
+
+class FakeChannel:
+    def __init__(self, connection):
+        self._connection = connection
+
+    @property
+    def is_open(self):
+        return not self._connection.is_closed
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        if FakeConnection.fail:
+            FakeConnection.fail -= 1
+            raise StreamLostError("lost")
+        self._connection.published.append((exchange, routing_key, body))
+
+    def tx_select(self):
+        self._connection.transactional = True
+
+    def tx_commit(self):
+        self._connection.commits.append(len(self._connection.published))
+
+    def tx_rollback(self):
+        self._connection.published = self._connection.published[
+            : (self._connection.commits or [0])[-1]
+        ]
+
+
+class FakeConnection:
+    opened = []
+    fail = 0
+
+    def __init__(self, parameters):
+        self.is_closed = False
+        self.published = []
+        self.transactional = False
+        self.commits = []
+        FakeConnection.opened.append(self)
+
+    def channel(self):
+        return FakeChannel(self)
+
+    def process_data_events(self, time_limit=None):
+        pass
+
+    def close(self):
+        self.is_closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_connection(monkeypatch):
+    FakeConnection.opened = []
+    FakeConnection.fail = 0
+    monkeypatch.setattr(pika, "BlockingConnection", FakeConnection)
+
+
+def _pool():
+    return RabbitMQConnectionPool(
+        host="localhost", port=5672, username="admin", password="admin"
+    )
+
+
+def test_pool_reuses_the_connection():
+    """Test."""
+    pool = _pool()
+
+    for _ in range(3):
+        with pool.channel() as channel:
+            channel.basic_publish("server", "created", "{}")
+
+    assert len(FakeConnection.opened) == 1
+    assert len(FakeConnection.opened[0].published) == 3
+
+
+def test_pool_reopens_a_closed_connection():
+    """Test."""
+    pool = _pool()
+    with pool.channel():
+        pass
+    FakeConnection.opened[0].close()
+
+    with pool.channel() as channel:
+        channel.basic_publish("server", "created", "{}")
+
+    assert len(FakeConnection.opened) == 2
+    assert FakeConnection.opened[1].published
+
+
+def test_pool_keeps_the_connection_after_an_error():
+    """Test."""
+    pool = RabbitMQConnectionPool(
+        host="localhost",
+        port=5672,
+        username="admin",
+        password="admin",
+        transactional=True,
+    )
+
+    with pytest.raises(ValueError):
+        with pool.channel() as channel:
+            channel.basic_publish("server", "created", "{}")
+            raise ValueError
+    with pool.channel() as channel:
+        channel.basic_publish("server", "deleted", "{}")
+        channel.tx_commit()
+
+    (connection,) = FakeConnection.opened
+    assert not connection.is_closed
+    assert connection.published == [("server", "deleted", "{}")]
+
+
+def test_pool_closes_a_connection_broken_by_an_error():
+    """Test."""
+    pool = _pool()
+
+    with pytest.raises(ValueError):
+        with pool.channel():
+            FakeConnection.opened[0].is_closed = True
+            raise ValueError
+    with pool.channel():
+        pass
+
+    assert len(FakeConnection.opened) == 2
+
+
+def test_bus_publishes_lazily_and_retries_on_a_lost_connection():
+    """Test."""
+    message_bus = RabbitMQMessageBus(
+        host="broker", port=5672, username="admin", password="admin"
+    )
+    assert not FakeConnection.opened
+    FakeConnection.fail = 1
+
+    message_bus.publish_messages(messages=[("server", "created", "{}")])
+
+    first, second = FakeConnection.opened
+    assert first.is_closed
+    assert second.published == [("server", "created", "{}")]
+
+
+def test_bus_confirms_each_batch_once():
+    """Test."""
+    message_bus = RabbitMQMessageBus(
+        host="batching-broker",
+        port=5672,
+        username="admin",
+        password="admin",
+        batch_size=2,
+    )
+
+    message_bus.publish_messages(
+        messages=[("server", "created", str(i)) for i in range(5)]
+    )
+
+    (connection,) = FakeConnection.opened
+    assert connection.transactional
+    assert len(connection.published) == 5
+    assert connection.commits == [2, 4, 5]
+
+
+def test_bus_publishes_nothing_without_messages():
+    """Test."""
+    message_bus = RabbitMQMessageBus(
+        host="broker", port=5672, username="admin", password="admin"
+    )
+
+    message_bus.publish(domain_events=[])
+
+    assert not FakeConnection.opened
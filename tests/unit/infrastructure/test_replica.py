@@ -0,0 +1,158 @@
+"""Replica routing tests."""
+
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+
+from st_server.server.infrastructure.mysql.db import Base
+from st_server.server.infrastructure.mysql.models.application import (
+    ApplicationDbModel,
+)
+from st_server.server.infrastructure.mysql.replica import (
+    ReplicaRouter,
+    RoutingSession,
+)
+from st_server.server.infrastructure.mysql.repositories.application_repository import (
+    ApplicationRepositoryImpl,
+)
+from st_server.server.infrastructure.mysql.unit_of_work import UnitOfWorkImpl
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _add_application(session, name):
+    session.execute(
+        insert(ApplicationDbModel).values(
+            id=name, name=name, version="1", architect="x86", discarded=False
+        )
+    )
+    session.commit()
+
+
+def _names(session):
+    return session.execute(select(ApplicationDbModel.name)).scalars().all()
+
+
+def test_reads_go_to_replica_and_writes_to_primary():
+    """Test."""
+    primary, replica = _engine(), _engine()
+    router = ReplicaRouter(replicas=[replica], lag=lambda engine: 0)
+
+    _add_application(RoutingSession(bind=primary, router=router), "written")
+
+    assert _names(RoutingSession(bind=primary, router=router)) == []
+    assert _names(RoutingSession(bind=primary)) == ["written"]
+
+
+def test_lagging_replica_fails_over_to_primary():
+    """Test."""
+    primary, replica = _engine(), _engine()
+    _add_application(RoutingSession(bind=primary), "written")
+    router = ReplicaRouter(
+        replicas=[replica], max_lag=5, lag=lambda engine: 30
+    )
+
+    assert _names(RoutingSession(bind=primary, router=router)) == ["written"]
+
+
+def test_read_your_writes_window():
+    """Test."""
+    primary, replica = _engine(), _engine()
+    router = ReplicaRouter(
+        replicas=[replica], read_your_writes=60, lag=lambda engine: 0
+    )
+
+    _add_application(
+        RoutingSession(bind=primary, router=router, info={"client": "a"}),
+        "written",
+    )
+    session = RoutingSession(bind=primary, router=router, info={"client": "a"})
+    other = RoutingSession(bind=primary, router=router, info={"client": "b"})
+
+    assert _names(session) == ["written"]
+    assert _names(other) == []
+
+
+def test_reads_of_a_session_stay_on_one_replica():
+    """Test."""
+    primary, replicas = _engine(), [_engine(), _engine()]
+    _add_application(RoutingSession(bind=replicas[0]), "first")
+    _add_application(RoutingSession(bind=replicas[1]), "second")
+    router = ReplicaRouter(replicas=replicas, lag=lambda engine: 0)
+    session = RoutingSession(bind=primary, router=router)
+
+    assert len({tuple(_names(session)) for _ in range(4)}) == 1
+
+
+def test_unit_of_work_reads_from_the_primary():
+    """Test."""
+    primary, replica = _engine(), _engine()
+    _add_application(RoutingSession(bind=primary), "written")
+    router = ReplicaRouter(replicas=[replica], lag=lambda engine: 0)
+    unit_of_work = UnitOfWorkImpl(
+        session=RoutingSession(bind=primary, router=router)
+    )
+
+    with unit_of_work:
+        assert unit_of_work.applications.find_one(id="written") is not None
+
+
+def test_aggregates_are_loaded_from_the_primary():
+    """Test."""
+    primary, replica = _engine(), _engine()
+    _add_application(RoutingSession(bind=primary), "written")
+    router = ReplicaRouter(replicas=[replica], lag=lambda engine: 0)
+    repository = ApplicationRepositoryImpl(
+        session=RoutingSession(bind=primary, router=router)
+    )
+
+    assert repository.find_one(id="written") is not None
+
+
+def test_expired_writes_are_dropped():
+    """Test."""
+    router = ReplicaRouter(
+        replicas=[_engine()], read_your_writes=0.01, lag=lambda engine: 0
+    )
+    for client in range(100):
+        router.record_write(str(client))
+    time.sleep(0.02)
+
+    router.record_write("last")
+
+    assert list(router._writes) == ["last"]
+
+
+def test_reads_go_back_to_the_replica_once_the_window_expires():
+    """Test."""
+    router = ReplicaRouter(
+        replicas=[_engine()], read_your_writes=0.01, lag=lambda engine: 0
+    )
+    router.record_write("a")
+
+    assert router.replica("a") is None
+    time.sleep(0.02)
+    assert router.replica("a") is not None
+    assert "a" not in router._writes
+
+
+def test_write_windows_are_bounded():
+    """Test."""
+    router = ReplicaRouter(
+        replicas=[_engine()],
+        read_your_writes=60,
+        lag=lambda engine: 0,
+        max_clients=2,
+    )
+
+    for client in ["a", "b", "a", "c"]:
+        router.record_write(client)
+
+    assert list(router._writes) == ["a", "c"]
+    assert router.replica("b") is not None
+    assert router.replica("a") is None
@@ -0,0 +1,157 @@
+"""Unit of work tests."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from st_server.server.application.services.application import (
+    ApplicationService,
+)
+from st_server.server.domain.entities.application import Application
+from st_server.server.infrastructure.mysql.db import Base
+from st_server.server.infrastructure.mysql.unit_of_work import (
+    AsyncUnitOfWorkImpl,
+    UnitOfWorkImpl,
+)
+from st_server.shared.application.exceptions import AlreadyExists, NotFound
+from st_server.shared.infrastructure.message_bus.message_bus import MessageBus
+
+
+class RecordingMessageBus(MessageBus):
+    def __init__(self):
+        self.domain_events = []
+
+    def publish(self, domain_events):
+        self.domain_events.extend(domain_events)
+
+
+def _unit_of_work():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = Session(bind=engine)
+    commits = []
+    event.listen(session, "after_commit", commits.append)
+    return UnitOfWorkImpl(session=session), commits
+
+
+def _application(name="nginx"):
+    return Application.create(name=name, version="1.25", architect="x86")
+
+
+def test_unit_of_work_commits_once():
+    """Test."""
+    unit_of_work, commits = _unit_of_work()
+
+    with unit_of_work:
+        unit_of_work.applications.add_one(aggregate=_application("nginx"))
+        unit_of_work.applications.add_many(
+            aggregates=[_application("redis"), _application("mysql")]
+        )
+        assert len(unit_of_work.applications.get_ids()) == 3
+
+    assert len(commits) == 1
+    assert len(unit_of_work.applications.get_ids()) == 3
+
+
+def test_unit_of_work_rolls_back_on_error():
+    """Test."""
+    unit_of_work, commits = _unit_of_work()
+
+    with pytest.raises(AlreadyExists):
+        with unit_of_work:
+            unit_of_work.applications.add_one(aggregate=_application())
+            unit_of_work.applications.add_one(aggregate=_application())
+
+    assert not commits
+    assert unit_of_work.applications.get_ids() == []
+
+
+def test_unit_of_work_rolls_back_a_failed_commit(monkeypatch):
+    """Test."""
+    unit_of_work, commits = _unit_of_work()
+    session = unit_of_work._session
+
+    def commit():
+        raise RuntimeError("Deadlock found when trying to get lock")
+
+    monkeypatch.setattr(session, "commit", commit)
+    with pytest.raises(RuntimeError):
+        with unit_of_work:
+            unit_of_work.applications.add_one(aggregate=_application("nginx"))
+    monkeypatch.undo()
+    with unit_of_work:
+        unit_of_work.applications.add_one(aggregate=_application("redis"))
+
+    assert len(commits) == 1
+    assert [
+        application.name
+        for application in unit_of_work.applications.find_many()._items
+    ] == ["redis"]
+
+
+def test_async_unit_of_work_rolls_back_a_failed_commit(monkeypatch):
+    """Test."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def commit():
+        raise RuntimeError("Deadlock found when trying to get lock")
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session = AsyncSession(bind=engine)
+        unit_of_work = AsyncUnitOfWorkImpl(session=session)
+        monkeypatch.setattr(session, "commit", commit)
+        with pytest.raises(RuntimeError):
+            async with unit_of_work:
+                await unit_of_work.applications.add_one(
+                    aggregate=_application("nginx")
+                )
+        monkeypatch.undo()
+        async with unit_of_work:
+            await unit_of_work.applications.add_one(
+                aggregate=_application("redis")
+            )
+        ids = await unit_of_work.applications.get_ids()
+        await session.close()
+        await engine.dispose()
+        return ids
+
+    assert len(asyncio.run(run())) == 1
+
+
+def test_unit_of_work_without_block_commits_per_call():
+    """Test."""
+    unit_of_work, commits = _unit_of_work()
+
+    unit_of_work.applications.add_one(aggregate=_application("nginx"))
+    unit_of_work.applications.add_one(aggregate=_application("redis"))
+
+    assert len(commits) == 2
+
+
+def test_service_mutation_in_one_transaction():
+    """Test."""
+    unit_of_work, commits = _unit_of_work()
+    message_bus = RecordingMessageBus()
+    service = ApplicationService(
+        repository=unit_of_work.applications,
+        message_bus=message_bus,
+        unit_of_work=unit_of_work,
+    )
+    application = service.add_one(
+        data={"name": "nginx", "version": "1.25", "architect": "x86"}
+    )
+
+    service.update_one(id=application.id, data={"version": "1.26"})
+
+    assert len(commits) == 2
+    assert len(message_bus.domain_events) == 2
+    assert service.find_one(id=application.id).version == "1.26"
+    with pytest.raises(NotFound):
+        service.update_one(id="1234", data={"version": "1.27"})
+    assert len(commits) == 2
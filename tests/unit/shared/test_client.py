@@ -0,0 +1,27 @@
+from starlette.requests import Request
+
+from st_server.shared.helper.client import client_key
+
+
+def _request(headers=()):
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (name.encode(), value.encode()) for name, value in headers
+            ],
+            "client": ("10.0.0.1", 50000),
+        }
+    )
+
+
+def test_client_key_hashes_the_access_token():
+    key = client_key(_request([("authorization", "Bearer secret")]))
+
+    assert "secret" not in key
+    assert key == client_key(_request([("authorization", "Bearer secret")]))
+    assert key != client_key(_request([("authorization", "Bearer other")]))
+
+
+def test_client_key_without_access_token():
+    assert client_key(_request()) == "10.0.0.1"
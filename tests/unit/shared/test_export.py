@@ -0,0 +1,44 @@
+import json
+
+from st_server.server.application.dtos.server import ServerReadDto
+from st_server.shared.helper.export import export_chunks
+
+SERVERS = [
+    ServerReadDto(id=str(i), name="server-{}".format(i), operating_system={})
+    for i in range(5)
+]
+
+
+def test_export_chunks_ndjson_fields():
+    chunks = list(
+        export_chunks(
+            SERVERS, dto=ServerReadDto, format="ndjson", fields=["id", "name"]
+        )
+    )
+
+    assert [json.loads(line) for line in "".join(chunks).splitlines()] == [
+        {"id": server.id, "name": server.name} for server in SERVERS
+    ]
+
+
+def test_export_chunks_csv_chunked():
+    chunks = list(
+        export_chunks(
+            SERVERS,
+            dto=ServerReadDto,
+            format="csv",
+            fields=["name", "operating_system", "cpu"],
+            size=2,
+        )
+    )
+
+    assert len(chunks) == 3
+    assert "".join(chunks).splitlines() == ["name,operating_system,cpu"] + [
+        "{},{{}},".format(server.name) for server in SERVERS
+    ]
+
+
+def test_export_chunks_csv_empty():
+    assert list(
+        export_chunks([], dto=ServerReadDto, format="csv", fields=["name"])
+    ) == ["name\n"]
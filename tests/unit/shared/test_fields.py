@@ -0,0 +1,32 @@
+from st_server.server.application.dtos.credential import CredentialReadDto
+from st_server.server.application.dtos.server import ServerReadDto
+from st_server.shared.application.service_page_dto import ServicePageDto
+from st_server.shared.helper.fields import encode_fields
+
+SERVER = ServerReadDto(
+    id="1",
+    name="web",
+    status="RUNNING",
+    credentials=[CredentialReadDto(id="2", username="root")],
+)
+
+
+def test_encode_fields_only_requested():
+    assert encode_fields(SERVER, fields=["id", "name", "status"]) == {
+        "name": "web",
+        "status": "RUNNING",
+        "id": "1",
+    }
+
+
+def test_encode_fields_page():
+    page = ServicePageDto(_total=1, _limit=25, _offset=1, _items=[SERVER])
+
+    content = encode_fields(page, fields=["id"])
+
+    assert content["_total"] == 1
+    assert content["_items"] == [{"id": "1"}]
+
+
+def test_encode_fields_all():
+    assert encode_fields(SERVER)["credentials"][0]["username"] == "root"
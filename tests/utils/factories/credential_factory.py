@@ -25,7 +25,7 @@ class CredentialFactory(factory.Factory):
             ConnectionType.from_string(value="RDP"),
         ]
     )
-    username = factory.Faker("name")
+    username = factory.Sequence(lambda n: "user-{}".format(n))
     password = factory.Faker("name")
     local_ip = factory.Faker("ipv4")
     local_port = factory.Faker("pyint")
@@ -18,7 +18,7 @@ class ServerFactory(factory.Factory):
     class Meta:
         model = Server
 
-    name = factory.Faker("name")
+    name = factory.Sequence(lambda n: "server-{}".format(n))
     cpu = factory.Faker("pyint")
     ram = factory.Faker("pyint")
     hdd = factory.Faker("pyint")